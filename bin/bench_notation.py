@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from hivegame.notation import parse_command, read_games
+from hivegame.selfplay import play_game
+
+
+def write_corpus(path, games, seed):
+    """Writes games random games separated by blank lines."""
+    with open(path, 'w') as f:
+        for i in range(games):
+            (commands, result) = play_game('random', 'random', seed + i)
+            f.write('\n'.join(commands) + '\n\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the notation parser on a corpus of game logs."
+    )
+    parser.add_argument(
+        'files', nargs='*',
+        help="game logs to parse (default: a corpus of random games)"
+    )
+    parser.add_argument(
+        '-g', '--games', type=int, default=50,
+        help="random games in the generated corpus"
+    )
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=5, help="passes over the files"
+    )
+    args = parser.parse_args()
+
+    files = args.files
+    tmp = None
+    if len(files) == 0:
+        tmp = tempfile.NamedTemporaryFile(suffix='.log', delete=False)
+        tmp.close()
+        write_corpus(tmp.name, args.games, 0)
+        files = [tmp.name]
+
+    try:
+        size = sum(os.path.getsize(f) for f in files) * args.repeat
+        start = time.time()
+        games = moves = 0
+        for i in range(args.repeat):
+            for path in files:
+                for game in read_games(path):
+                    games += 1
+                    moves += len(game)
+        elapsed = time.time() - start
+        print("streaming parser: %d games %d moves %8.3fs %8.2f MB/s "
+              "%10.0f moves/s" % (
+                  games, moves, elapsed, size / elapsed / 1e6,
+                  moves / elapsed
+              ))
+
+        # one command at a time, like the shell client
+        start = time.time()
+        for i in range(args.repeat):
+            for path in files:
+                with open(path) as f:
+                    for line in f:
+                        cmd = line.strip()
+                        if cmd != '':
+                            parse_command(cmd)
+        elapsed = time.time() - start
+        print("parse_command:    %d games %d moves %8.3fs %8.2f MB/s "
+              "%10.0f moves/s" % (
+                  games, moves, elapsed, size / elapsed / 1e6,
+                  moves / elapsed
+              ))
+    finally:
+        if tmp is not None:
+            os.remove(tmp.name)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#! /usr/bin/env python
+
+import argparse
+import multiprocessing
+import sys
+from hivegame.parallel import ParallelSearch
+from hivegame.perft import FIXTURES, load_fixture
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the root split search with a single worker."
+    )
+    parser.add_argument(
+        'fixtures', nargs='*', default=sorted(FIXTURES),
+        help="fixtures to run (default: all)"
+    )
+    parser.add_argument(
+        '-d', '--depth', type=int, default=3, help="search depth"
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, default=multiprocessing.cpu_count(),
+        help="worker processes (default: one per cpu)"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    single = ParallelSearch(1)
+    with ParallelSearch(args.workers) as parallel:
+        for name in args.fixtures:
+            print("%s:" % name)
+            results = []
+            for searcher in (single, parallel):
+                action = searcher.search(load_fixture(name), args.depth)
+                stats = searcher.stats
+                results.append((action, stats))
+                print(
+                    "  %2d workers: %-30s score %6s %9d nodes %8.3fs "
+                    "%8.0f nodes/s" % (
+                        searcher.workers, action, stats['score'],
+                        stats['nodes'], stats['seconds'], stats['nodes/s']
+                    )
+                )
+            ((action1, stats1), (actionN, statsN)) = results
+            if stats1['score'] != statsN['score']:
+                print("  scores differ!")
+                failed = True
+            print("  speedup: %.2fx" % (
+                stats1['seconds'] / statsN['seconds']
+            ))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
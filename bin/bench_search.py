@@ -0,0 +1,56 @@
+#! /usr/bin/env python
+
+import argparse
+import sys
+from hivegame.alphabeta import AlphaBeta
+from hivegame.perft import FIXTURES, load_fixture
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the alpha-beta search from fixed positions."
+    )
+    parser.add_argument(
+        'fixtures', nargs='*', default=sorted(FIXTURES),
+        help="fixtures to run (default: all)"
+    )
+    parser.add_argument(
+        '-d', '--depth', type=int, default=None, help="maximum depth"
+    )
+    parser.add_argument(
+        '-t', '--seconds', type=float, default=5.0,
+        help="time limit per fixture"
+    )
+    parser.add_argument(
+        '--tt-size', type=int, default=1 << 18,
+        help="transposition table entries"
+    )
+    args = parser.parse_args()
+
+    for name in args.fixtures:
+        hive = load_fixture(name)
+        searcher = AlphaBeta(ttSize=args.tt_size)
+        action = searcher.search(hive, args.depth, args.seconds)
+        print("%s: %s" % (name, action))
+        for it in searcher.iterations:
+            print(
+                "  depth %2d: score %6d %9d nodes %8.3fs %8.0f nodes/s  "
+                "branching %5.1f  ebf %5.1f  cutoffs %d (%.0f%% first)  "
+                "tt hits %d" % (
+                    it['depth'], it['score'], it['nodes'], it['seconds'],
+                    it['nodes/s'], it['branching'], it['ebf'],
+                    it['cutoffs'],
+                    100.0 * it['firstCutoffs'] / it['cutoffs']
+                    if it['cutoffs'] else 0,
+                    it['ttHits']
+                )
+            )
+        tt = searcher.tt
+        print("  tt: %d/%d used  %d stores  %d replacements" % (
+            len(tt), tt.size, tt.stores, tt.replacements
+        ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
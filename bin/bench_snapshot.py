@@ -0,0 +1,68 @@
+#! /usr/bin/env python
+
+import argparse
+import copy
+import pickle
+import sys
+import time
+from hivegame.hive import Hive
+from hivegame.perft import FIXTURES, load_fixture
+
+
+def timeit(fun, repeat):
+    start = time.time()
+    for i in range(repeat):
+        fun()
+    return (time.time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare snapshot/restore/clone with deepcopy and pickle."
+    )
+    parser.add_argument(
+        'fixtures', nargs='*', default=sorted(FIXTURES),
+        help="fixtures to run (default: all)"
+    )
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=1000, help="copies per method"
+    )
+    args = parser.parse_args()
+
+    for name in args.fixtures:
+        hive = load_fixture(name)
+        # drop the cache that a deepcopy would copy too
+        hive._destCache.clear()
+        snapshot = hive.snapshot()
+        pickled = pickle.dumps(hive, pickle.HIGHEST_PROTOCOL)
+        target = Hive()
+        results = [
+            # what copy.deepcopy(hive) did before it used the snapshot
+            ('deepcopy', timeit(
+                lambda: copy.deepcopy(hive.__dict__), args.repeat
+            )),
+            ('pickle dumps', timeit(
+                lambda: pickle.dumps(hive, pickle.HIGHEST_PROTOCOL),
+                args.repeat
+            )),
+            ('pickle loads', timeit(
+                lambda: pickle.loads(pickled), args.repeat
+            )),
+            ('snapshot', timeit(hive.snapshot, args.repeat)),
+            ('restore', timeit(
+                lambda: target.restore(snapshot), args.repeat
+            )),
+            ('clone', timeit(hive.clone, args.repeat)),
+        ]
+        print("%s: snapshot %d bytes, pickle %d bytes" % (
+            name, len(snapshot), len(pickled)
+        ))
+        for (method, seconds) in results:
+            print("  %-12s %8.1f us %10.0f copies/s" % (
+                method, seconds * 1e6, 1 / seconds if seconds > 0 else 0
+            ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
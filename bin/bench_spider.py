@@ -0,0 +1,127 @@
+#! /usr/bin/env python
+
+import argparse
+import random
+import sys
+import time
+from hivegame.hive import Hive
+
+
+def ring_spider_move(hive, spider, startCell, endCell):
+    """
+    The spider validator used before the path generator: three BFS rings
+    sharing the same visited set.
+    """
+    pic = hive.piecesInCell[startCell]
+    pic.pop()
+
+    visited = set([startCell])
+    step = set([startCell])
+    for i in range(3):
+        found = set()
+        for c in step:
+            found.update(hive._bee_moves(c))
+        found.difference_update(visited)
+        visited.update(found)
+        step = found
+
+    pic.append(str(spider))
+    return endCell in step
+
+
+def collect_positions(games, seed):
+    """
+    Plays random games and returns a list of (actions, spiders, targets) for
+    every position with a spider that is free to move.
+    """
+    rnd = random.Random(seed)
+    res = []
+    for g in range(games):
+        hive = Hive()
+        hive.setup()
+        actions = []
+        for ply in range(80):
+            spiders = [
+                pp for (name, pp) in sorted(hive.playedPieces.items())
+                if pp['piece'].kind == 'S' and
+                hive.piecesInCell[pp['cell']][-1] == name
+            ]
+            if len(spiders) > 0:
+                # every free cell touching the hive
+                targets = set()
+                for (cell, pic) in hive.piecesInCell.items():
+                    if len(pic) > 0:
+                        targets.update(
+                            c for c in hive.board.get_neighbors(cell)
+                            if hive._is_cell_free(c)
+                        )
+                res.append((list(actions), spiders, sorted(targets)))
+            moves = hive.legal_moves()
+            if len(moves) == 0:
+                break
+            actions.append(rnd.choice(moves))
+            hive.action(*actions[-1])
+    return res
+
+
+def replay(actions):
+    hive = Hive()
+    hive.setup()
+    for (actionType, action) in actions:
+        hive.action(actionType, action)
+    return hive
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the spider path generator with the ring validator."
+    )
+    parser.add_argument('-g', '--games', type=int, default=20)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    positions = collect_positions(args.games, args.seed)
+    queries = 0
+    ringTime = 0.0
+    pathTime = 0.0
+    differences = 0
+    for (actions, spiders, targets) in positions:
+        hive = replay(actions)
+        for pp in spiders:
+            piece = pp['piece']
+            cell = hive.locate(str(piece))
+
+            start = time.time()
+            ring = set(
+                t for t in targets if ring_spider_move(hive, piece, cell, t)
+            )
+            ringTime += time.time() - start
+
+            start = time.time()
+            path = set(
+                t for t in targets if hive._valid_spider_move(piece, cell, t)
+            )
+            pathTime += time.time() - start
+
+            queries += len(targets)
+            if ring != path:
+                differences += 1
+                if not ring.issubset(path):
+                    print("ring validator accepts a path rejected cell!")
+                    return 1
+
+    print("positions: %d  spiders: %d  queries: %d" % (
+        len(positions), sum(len(s) for (h, s, t) in positions), queries
+    ))
+    print("ring validator:  %.3fs  %10.0f queries/s" % (
+        ringTime, queries / ringTime
+    ))
+    print("path generator:  %.3fs  %10.0f queries/s" % (
+        pathTime, queries / pathTime
+    ))
+    print("spiders with extra destinations: %d" % differences)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+
+import argparse
+import sys
+from hivegame.book import DEFAULT_PLIES, OpeningBook, build_book
+from hivegame.hive import Hive
+from hivegame.notation import format_action, parse_command
+from hivegame.replay import find_logs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build and query opening books."
+    )
+    commands = parser.add_subparsers(dest='command')
+    build = commands.add_parser(
+        'build', help="build an opening book from game logs"
+    )
+    build.add_argument('output', help="book file to write")
+    build.add_argument(
+        'paths', nargs='+', help="game logs or directories of game logs"
+    )
+    build.add_argument(
+        '-n', '--plies', type=int, default=DEFAULT_PLIES,
+        help="plies of each game added to the book (default %(default)s)"
+    )
+    build.add_argument(
+        '-p', '--pattern', default='*.log',
+        help="file name pattern searched in directories"
+    )
+    probe = commands.add_parser(
+        'probe', help="list the book moves of a position"
+    )
+    probe.add_argument('input', help="book file to read")
+    probe.add_argument(
+        'moves', nargs='*', help="moves in notation leading to the position"
+    )
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        builder = build_book(
+            find_logs(args.paths, args.pattern), args.output, args.plies
+        )
+        print("%d positions from %d games written to %s (%d skipped)" % (
+            len(builder), builder.games, args.output, builder.skipped
+        ))
+    elif args.command == 'probe':
+        hive = Hive()
+        hive.setup()
+        for cmd in args.moves:
+            hive.action(*parse_command(cmd))
+        with OpeningBook(args.input) as book:
+            stats = book.lookup(hive)
+            if stats is None:
+                print("position not in the book")
+                return 1
+            print("white %d  draw %d  black %d" % stats)
+            for (action, score, games) in book.candidates(hive):
+                print("%-12s %5.1f%% %d games" % (
+                    format_action(*action), 100 * score, games
+                ))
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
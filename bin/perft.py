@@ -0,0 +1,41 @@
+#! /usr/bin/env python
+
+import argparse
+import sys
+from hivegame.perft import FIXTURES, benchmark
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count and time move generation from fixed positions."
+    )
+    parser.add_argument(
+        'fixtures', nargs='*', default=sorted(FIXTURES),
+        help="fixtures to run (default: all)"
+    )
+    parser.add_argument(
+        '-d', '--depth', type=int, default=3, help="maximum depth"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.fixtures:
+        print("%s:" % name)
+        for (depth, nodes, elapsed, expected) in benchmark(name, args.depth):
+            if expected is None:
+                status = "no reference"
+            elif expected == nodes:
+                status = "ok"
+            else:
+                status = "FAILED expected %s" % expected
+                failed = True
+            nps = nodes / elapsed if elapsed > 0 else 0
+            print("  depth %d: %10d nodes %8.3fs %10.0f nodes/s  %s" % (
+                depth, nodes, elapsed, nps, status
+            ))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
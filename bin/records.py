@@ -0,0 +1,45 @@
+#! /usr/bin/env python
+
+import argparse
+import sys
+from hivegame.record import notation2records, records2notation
+from hivegame.replay import find_logs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert between game logs and binary game records."
+    )
+    commands = parser.add_subparsers(dest='command')
+    pack = commands.add_parser(
+        'pack', help="pack game logs into a record file"
+    )
+    pack.add_argument('output', help="record file to write")
+    pack.add_argument(
+        'paths', nargs='+', help="game logs or directories of game logs"
+    )
+    pack.add_argument(
+        '-p', '--pattern', default='*.log',
+        help="file name pattern searched in directories"
+    )
+    unpack = commands.add_parser(
+        'unpack', help="write the games of a record file in notation"
+    )
+    unpack.add_argument('input', help="record file to read")
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        count = notation2records(
+            find_logs(args.paths, args.pattern), args.output
+        )
+        print("%d games written to %s" % (count, args.output))
+    elif args.command == 'unpack':
+        records2notation(args.input, sys.stdout)
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
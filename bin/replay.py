@@ -0,0 +1,59 @@
+#! /usr/bin/env python
+
+import argparse
+import sys
+from hivegame.replay import RESULT_NAMES, run
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay game logs through the rules engine."
+    )
+    parser.add_argument(
+        'paths', nargs='+', help="game logs or directories of game logs"
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, default=None,
+        help="worker processes (default: one per cpu)"
+    )
+    parser.add_argument(
+        '-p', '--pattern', default='*.log',
+        help="file name pattern searched in directories"
+    )
+    parser.add_argument(
+        '-q', '--quiet', action='store_true',
+        help="only report illegal games and the totals"
+    )
+    args = parser.parse_args()
+
+    def report(r):
+        if r['game'] is None:
+            print("%s: ERROR %s" % (r['path'], r['error']))
+        elif r['illegal'] is not None:
+            (lineno, cmd, reason) = r['illegal']
+            print("%s#%d: ILLEGAL line %d %s: %s" % (
+                r['path'], r['game'], lineno, cmd, reason
+            ))
+        elif not args.quiet:
+            print("%s#%d: %s %d plies %.3fs" % (
+                r['path'], r['game'], RESULT_NAMES[r['result']],
+                r['plies'], r['seconds']
+            ))
+
+    stats = run(args.paths, args.workers, args.pattern, report)
+
+    print("files: %d  games: %d  plies: %d  %.3fs  %.2f games/s" % (
+        stats['files'], stats['games'], stats['plies'], stats['seconds'],
+        stats['games/s']
+    ))
+    print("illegal: %d  errors: %d  results: %s" % (
+        stats['illegal'], stats['errors'], "  ".join(
+            "%s %d" % (RESULT_NAMES[r], n)
+            for (r, n) in sorted(stats['results'].items())
+        )
+    ))
+    return 1 if stats['illegal'] or stats['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
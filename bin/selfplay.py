@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+
+import argparse
+import sys
+from hivegame.hive import Hive
+from hivegame.selfplay import AGENTS, DEFAULT_MAX_PLIES, run
+
+
+RESULT_NAMES = {
+    Hive.WHITE_WIN: 'white',
+    Hive.BLACK_WIN: 'black',
+    Hive.DRAW: 'draw',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play games between agents across a pool of processes."
+    )
+    parser.add_argument(
+        '-n', '--games', type=int, default=100, help="number of games"
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, default=None,
+        help="worker processes (default: one per cpu)"
+    )
+    parser.add_argument(
+        '--white', default='random',
+        help="white agent, one of %s or module:callable" % sorted(AGENTS)
+    )
+    parser.add_argument(
+        '--black', default='random',
+        help="black agent, one of %s or module:callable" % sorted(AGENTS)
+    )
+    parser.add_argument(
+        '-o', '--output', default='games',
+        help="directory where the game logs are written"
+    )
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument(
+        '--max-plies', type=int, default=DEFAULT_MAX_PLIES,
+        help="plies after which a game is a draw"
+    )
+    args = parser.parse_args()
+
+    stats = run(
+        args.games, args.white, args.black, args.output, args.workers,
+        args.seed, args.max_plies
+    )
+
+    print("games: %d  plies: %d  %.3fs  %.2f games/s  %.0f plies/s" % (
+        stats['games'], stats['plies'], stats['seconds'], stats['games/s'],
+        stats['plies'] / stats['seconds'] if stats['seconds'] > 0 else 0
+    ))
+    print("results: %s" % "  ".join(
+        "%s %d" % (RESULT_NAMES[r], n)
+        for (r, n) in sorted(stats['results'].items())
+    ))
+    for (pid, worker) in sorted(stats['workers'].items()):
+        print("  worker %6d: %5d games %7d plies %8.3fs %8.2f games/s" % (
+            pid, worker['games'], worker['plies'], worker['seconds'],
+            worker['games'] / worker['seconds'] if worker['seconds'] > 0
+            else 0
+        ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
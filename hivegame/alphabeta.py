@@ -0,0 +1,372 @@
+# alphabeta.py
+# Negamax alpha-beta search with iterative deepening.
+#
+# Scores are seen by the active player. A won game scores WIN minus the
+# number of plies to the end so shorter wins are preferred.
+
+import time
+
+from hivegame.hive import Hive
+
+WIN = 100000
+INFINITY = WIN + 1000
+
+# bound stored with each transposition table entry
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# the clock is only read every that many nodes
+_CLOCK_NODES = 256
+
+# ordering scores of the transposition table move and of the killers
+_TT_MOVE_SCORE = 1 << 30
+_KILLER_SCORE = 1 << 20
+
+
+def default_evaluation(hive):
+    """
+    Scores the position for the active player: the liberties of each queen
+    and the pieces pinned by the one hive rule.
+    """
+    player = hive.get_active_player()
+    score = 0
+    for color in ('w', 'b'):
+        sign = 1 if color == player else -1
+        liberties = hive.queen_liberties(color)
+        if liberties is not None:
+            score -= sign * 100 * (6 - liberties)
+    for name in hive._pinned_pieces():
+        score -= 10 if name[0] == player else -10
+    return score
+
+
+def _to_tt(score, ply):
+    """Win scores are stored relative to the position, not the root."""
+    if score > WIN - 1000:
+        return score + ply
+    if score < -WIN + 1000:
+        return score - ply
+    return score
+
+
+def _from_tt(score, ply):
+    if score > WIN - 1000:
+        return score - ply
+    if score < -WIN + 1000:
+        return score + ply
+    return score
+
+
+class TranspositionTable(object):
+    """
+    Fixed size table of search results indexed by the position hash.
+    Each slot keeps (key, depth, score, bound, move, generation). A new entry
+    replaces the one in its slot when that entry is for the same position,
+    comes from an older search (generation) or was searched less deep.
+    """
+
+    def __init__(self, size=1 << 18):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+
+    def __len__(self):
+        return sum(1 for s in self.slots if s is not None)
+
+
+    def new_search(self):
+        """Ages the entries of the previous searches."""
+        self.generation += 1
+
+
+    def clear(self):
+        self.slots = [None] * self.size
+
+
+    def probe(self, key):
+        """Returns (depth, score, bound, move) stored for key or None."""
+        self.probes += 1
+        slot = self.slots[key % self.size]
+        if slot is None or slot[0] != key:
+            return None
+        self.hits += 1
+        return slot[1:5]
+
+
+    def store(self, key, depth, score, bound, move):
+        i = key % self.size
+        slot = self.slots[i]
+        if slot is not None and slot[0] != key:
+            if slot[5] == self.generation and slot[1] > depth:
+                return
+            self.replacements += 1
+        self.slots[i] = (key, depth, score, bound, move, self.generation)
+        self.stores += 1
+
+
+class AlphaBeta(object):
+    """
+    Negamax alpha-beta searcher.
+
+    evaluate(hive) scores a position for the active player. Moves are
+    ordered by the transposition table move, then the two killer moves of
+    the ply and then the history scores of the moves causing cutoffs.
+    The positions found in book, an OpeningBook (see hivegame/book.py), are
+    answered with the book action without searching.
+    """
+
+    def __init__(self, evaluate=None, ttSize=1 << 18, book=None):
+        self.evaluate = (
+            evaluate if evaluate is not None else default_evaluation
+        )
+        self.book = book
+        self.tt = TranspositionTable(ttSize)
+        self.killers = []
+        self.history = {}
+        # statistics of each iteration of the last search
+        self.iterations = []
+        self._deadline = None
+        self._stopped = False
+
+
+    def search(self, hive, depth=None, seconds=None):
+        """
+        Searches with iterative deepening up to depth plies or until seconds
+        passed (at least one limit must be given) and returns the best action
+        of the deepest completed iteration, as given to Hive.action, or None
+        when the game is finished.
+        """
+        if depth is None and seconds is None:
+            raise ValueError("A search needs a depth or time limit")
+        if len(hive.legal_moves()) == 0:
+            return None
+        if self.book is not None:
+            action = self.book.best_action(hive)
+            if action is not None:
+                self.iterations = []
+                return action
+
+        start = time.time()
+        self._deadline = start + seconds if seconds is not None else None
+        self._stopped = False
+        self.tt.new_search()
+        self.killers = []
+        self.history = {}
+        self.iterations = []
+        bestMove = None
+        d = 0
+        while depth is None or d < depth:
+            d += 1
+            self.killers.append([None, None])
+            self._reset_counters()
+            iterationStart = time.time()
+            score = self._negamax(hive, d, -INFINITY, INFINITY, 0)
+            if self._stopped:
+                break
+            entry = self.tt.probe(hive.get_hash())
+            bestMove = entry[3] if entry is not None else bestMove
+            self._record_iteration(d, score, bestMove, iterationStart)
+            # a forced win or loss was found
+            if abs(score) > WIN - 1000:
+                break
+
+        if bestMove is None:
+            # not even the first iteration finished
+            bestMove = self._ordered_moves(hive, None, 0)[0]
+        (piece, cell) = bestMove
+        if piece is None:
+            return ('non_play', 'pass')
+        return hive._move2action(piece, cell)
+
+
+    def search_moves(self, hive, moves, depth=None, seconds=None):
+        """
+        Searches only the given root moves, (piece, targetCell) pairs as
+        returned by Hive._generate_moves, with iterative deepening up to
+        depth plies or until seconds passed.
+        Returns a list with (depth, move, score, nodes) for each completed
+        iteration where move is the first of the best moves in the given
+        order and score its exact score. Used to split a search across
+        processes, see hivegame/parallel.py.
+        """
+        if depth is None and seconds is None:
+            raise ValueError("A search needs a depth or time limit")
+        start = time.time()
+        self._deadline = start + seconds if seconds is not None else None
+        self._stopped = False
+        self.tt.new_search()
+        self.killers = [[None, None]]
+        self.history = {}
+        res = []
+        d = 0
+        while depth is None or d < depth:
+            d += 1
+            self.killers.append([None, None])
+            self._reset_counters()
+            best = None
+            alpha = -INFINITY
+            for move in moves:
+                self.nodes += 1
+                hive._play_move(*move)
+                # later moves only need to prove they are better
+                score = -self._negamax(hive, d - 1, -INFINITY, -alpha, 1)
+                hive.undo()
+                if self._stopped:
+                    break
+                if best is None or score > alpha:
+                    (best, alpha) = (move, score)
+            if self._stopped:
+                break
+            res.append((d, best, alpha, self.nodes))
+            # a forced win, other moves can't be better
+            if alpha > WIN - 1000:
+                break
+        return res
+
+
+    def _reset_counters(self):
+        self.nodes = 0
+        self.interior = 0
+        self.generated = 0
+        self.cutoffs = 0
+        self.firstCutoffs = 0
+        self.ttHits = 0
+
+
+    def _record_iteration(self, depth, score, move, start):
+        elapsed = time.time() - start
+        previous = self.iterations[-1]['nodes'] if self.iterations else None
+        self.iterations.append({
+            'depth': depth,
+            'score': score,
+            'move': move,
+            'nodes': self.nodes,
+            'seconds': elapsed,
+            'nodes/s': self.nodes / elapsed if elapsed > 0 else 0,
+            # moves generated per expanded node
+            'branching': (
+                float(self.generated) / self.interior if self.interior else 0
+            ),
+            # growth of the tree from the previous iteration
+            'ebf': float(self.nodes) / previous if previous else 0,
+            'cutoffs': self.cutoffs,
+            # cutoffs caused by the first move searched
+            'firstCutoffs': self.firstCutoffs,
+            'ttHits': self.ttHits,
+        })
+
+
+    def _negamax(self, hive, depth, alpha, beta, ply):
+        self.nodes += 1
+        if (
+            self._deadline is not None and
+            self.nodes % _CLOCK_NODES == 0 and
+            time.time() >= self._deadline
+        ):
+            self._stopped = True
+        if self._stopped:
+            return 0
+
+        result = hive.check_victory()
+        if result != Hive.UNFINISHED:
+            if result == Hive.DRAW:
+                return 0
+            won = (result == Hive.WHITE_WIN) == (hive.activePlayer == 0)
+            return WIN - ply if won else -WIN + ply
+        if depth == 0:
+            return self.evaluate(hive)
+
+        key = hive.get_hash()
+        alphaOrig = alpha
+        ttMove = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            self.ttHits += 1
+            (ttDepth, ttScore, bound, ttMove) = entry
+            if ttDepth >= depth:
+                ttScore = _from_tt(ttScore, ply)
+                if bound == EXACT:
+                    return ttScore
+                if bound == LOWER and ttScore > alpha:
+                    alpha = ttScore
+                elif bound == UPPER and ttScore < beta:
+                    beta = ttScore
+                if alpha >= beta:
+                    return ttScore
+
+        moves = self._ordered_moves(hive, ttMove, ply)
+        self.interior += 1
+        self.generated += len(moves)
+
+        best = -INFINITY
+        bestMove = None
+        for (i, move) in enumerate(moves):
+            hive._play_move(*move)
+            score = -self._negamax(hive, depth - 1, -beta, -alpha, ply + 1)
+            hive.undo()
+            if self._stopped:
+                return 0
+            if score > best:
+                best = score
+                bestMove = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.cutoffs += 1
+                if i == 0:
+                    self.firstCutoffs += 1
+                self._update_ordering(move, depth, ply)
+                break
+
+        if best <= alphaOrig:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, _to_tt(best, ply), bound, bestMove)
+        return best
+
+
+    def _ordered_moves(self, hive, ttMove, ply):
+        moves = hive._generate_moves()
+        if len(moves) == 0:
+            return [(None, None)]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history
+
+        def order(move):
+            if move == ttMove:
+                return _TT_MOVE_SCORE
+            if move in killers:
+                return _KILLER_SCORE
+            return history.get(move, 0)
+
+        moves.sort(key=order, reverse=True)
+        return moves
+
+
+    def _update_ordering(self, move, depth, ply):
+        if move[0] is None:
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            self.killers[ply] = [move, killers[0]]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+
+_agent = None
+
+
+def alphabeta_agent(hive, rnd):
+    """Self-play agent searching 2 plies per move."""
+    global _agent
+    if _agent is None:
+        _agent = AlphaBeta()
+    return _agent.search(hive, depth=2)
@@ -42,6 +42,14 @@
 # A 'cell' is a coordinate representation of a board position (x, y)
 
 
+# Maximum number of cells kept in _hexNeighbors
+NEIGHBOR_CACHE_SIZE = 16384
+
+# Cache of the surrounding cells of the cells seen so far, shared by all the
+# hexagonal boards since it only depends on the coordinates.
+_hexNeighbors = {}
+
+
 class Board(object):
     """
     Representation of the virtual playing Board.
@@ -99,6 +107,22 @@ class Board(object):
         return (xx, yy)
 
 
+    def occupy(self, position):
+        """
+        Registers a piece placed at position (x, y).
+        The board is resized to include the position.
+        """
+        self.resize(position)
+
+
+    def vacate(self, position):
+        """
+        Registers a piece removed from position (x, y).
+        The board never shrinks so nothing is done.
+        """
+        pass
+
+
     def get_boundaries(self):
         """returns the coordinates of the board limits."""
         firstCol = -self.ref0x
@@ -145,6 +169,16 @@ class HexBoard(Board):
     HX_SE = 5  # south-east
     HX_SW = 6  # south-west
 
+    # Offsets (dx, dy) of the surrounding cells sorted clockwise starting
+    # from the left (W, NW, NE, E, SE, SW), indexed by the row parity.
+    NEIGHBOR_OFFSETS = (
+        ((-1, 0), (-1, -1), (0, -1), (1, 0), (0, 1), (-1, 1)),  # even rows
+        ((-1, 0), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1)),    # odd rows
+    )
+    # Offsets (dq, dr) of the surrounding cells in axial coordinates, in the
+    # same order.
+    AXIAL_OFFSETS = ((-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1))
+
 
     def __init__(self):
         super(HexBoard, self).__init__()
@@ -164,20 +198,52 @@ class HexBoard(Board):
         Returns a list with the surrounding positions sorted clockwise starting
         from the left
         """
-        res = super(HexBoard, self).get_surrounding(position)
-        # if in a even row we insert NW into position 1 and SW into position 5
-        (x, y) = position
-        p = y % 2
-        if p == 0:
-            res.insert(1, (x-1, y-1))
-            res.insert(5, (x-1, y+1))
-        # if in a odd row we insert NE into position 2 and SE into position 4
-        else:
-            res.insert(2, (x+1, y-1))
-            res.insert(4, (x+1, y+1))
+        return list(self.get_neighbors(position))
+
+
+    def get_neighbors(self, position):
+        """
+        Returns a tuple with the surrounding positions sorted clockwise
+        starting from the left (W, NW, NE, E, SE, SW).
+        The tuple is cached per cell and must not be modified.
+        """
+        res = _hexNeighbors.get(position)
+        if res is None:
+            (x, y) = position
+            res = tuple(
+                (x + dx, y + dy) for (dx, dy) in self.NEIGHBOR_OFFSETS[y % 2]
+            )
+            if len(_hexNeighbors) >= NEIGHBOR_CACHE_SIZE:
+                _hexNeighbors.clear()
+            _hexNeighbors[position] = res
         return res
 
 
+    def get_neighbors_many(self, positions):
+        """
+        Returns a list with the neighbors tuple (see get_neighbors) of each
+        position.
+        """
+        cache = _hexNeighbors
+        res = []
+        for position in positions:
+            n = cache.get(position)
+            if n is None:
+                n = self.get_neighbors(position)
+            res.append(n)
+        return res
+
+
+    @classmethod
+    def get_axial_neighbors(cls, position):
+        """
+        Returns a tuple with the surrounding positions of an axial (q, r)
+        position, in the same order as get_neighbors.
+        """
+        (q, r) = position
+        return tuple((q + dq, r + dr) for (dq, dr) in cls.AXIAL_OFFSETS)
+
+
     def get_dir_cell(self, cell, direction):
         """
         Translates a relative position (cell, direction) to the referred
@@ -284,11 +350,18 @@ class HexBoard(Board):
         # diagonal jump (dy != 0)
         else:
             # must move in a diagonal with slope = 2
-            nx = int((abs(dy) + (1 - p)) / 2)
-            if abs(dx) != abs(nx):
+            # going west x decreases when leaving an even row and going east
+            # x increases when leaving an odd row
+            westSteps = int((abs(dy) + (1 - p)) / 2)
+            eastSteps = int((abs(dy) + p) / 2)
+            if dx == -westSteps:
+                westward = True
+            elif dx == eastSteps:
+                westward = False
+            else:
                 return None
 
-            if dx < 0:
+            if westward:
                 if dy < 0:
                     moveDir = self.HX_NW
                 else:
@@ -300,3 +373,84 @@ class HexBoard(Board):
                     moveDir = self.HX_SE
 
         return moveDir
+
+
+class SparseHexBoard(HexBoard):
+    """
+    Hexagonal Tile Board that only stores the occupied cells.
+
+    Cells are stored in a dict keyed by axial coordinates (q, r) so the board
+    grows in any direction in constant time and never keeps empty space.
+    The public API keeps using the offset coordinates (x, y) of HexBoard,
+    the axial coordinates of a cell are:
+        q = x - floor(y / 2)
+        r = y
+    """
+
+    def __init__(self):
+        super(SparseHexBoard, self).__init__()
+        # number of pieces in each occupied cell, keyed by axial coordinates
+        self.board = {}
+        self._boundaries = None
+
+
+    @staticmethod
+    def offset2axial(position):
+        """Translates offset coordinates (x, y) into axial (q, r)."""
+        (x, y) = position
+        return (x - (y >> 1), y)
+
+
+    @staticmethod
+    def axial2offset(position):
+        """Translates axial coordinates (q, r) into offset (x, y)."""
+        (q, r) = position
+        return (q + (r >> 1), r)
+
+
+    def resize(self, position):
+        """
+        The sparse board has no size, kept for compatibility with Board.
+        returns the position (x, y)
+        """
+        return position
+
+
+    def occupy(self, position):
+        """Registers a piece placed at position (x, y)."""
+        axial = self.offset2axial(position)
+        count = self.board.get(axial, 0)
+        if count == 0:
+            self._boundaries = None
+        self.board[axial] = count + 1
+
+
+    def vacate(self, position):
+        """Registers a piece removed from position (x, y)."""
+        axial = self.offset2axial(position)
+        count = self.board[axial] - 1
+        if count == 0:
+            del self.board[axial]
+            self._boundaries = None
+        else:
+            self.board[axial] = count
+
+
+    def is_occupied(self, position):
+        """True if there is at least one piece at position (x, y)."""
+        return self.offset2axial(position) in self.board
+
+
+    def get_boundaries(self):
+        """
+        returns the offset coordinates of the limits of the occupied cells.
+        """
+        if self._boundaries is None:
+            if len(self.board) == 0:
+                self._boundaries = (0, 0, 0, 0)
+            else:
+                cells = [self.axial2offset(c) for c in self.board]
+                xs = [x for (x, y) in cells]
+                ys = [y for (x, y) in cells]
+                self._boundaries = (min(xs), min(ys), max(xs), max(ys))
+        return self._boundaries
@@ -0,0 +1,239 @@
+# book.py
+# Opening book: win/draw/loss statistics of the first plies of game corpora.
+#
+# Positions are keyed by Hive.get_canonical_hash so the positions equivalent
+# under translation, rotation and reflection share their statistics.
+#
+# Little-endian file layout:
+#   header   magic 'HVBK', uint16 version, uint16 plies, uint64 count
+#   keys     count uint64 position keys, sorted
+#   stats    count times uint32 white wins, draws, black wins
+#
+# OpeningBook maps the file in memory and finds a key with a binary search.
+
+import bisect
+import mmap
+import struct
+import sys
+from array import array
+
+from hivegame.hive import Hive, HiveException
+from hivegame.notation import iter_games, move2action
+from hivegame.replay import illegal_reason
+
+MAGIC = b'HVBK'
+VERSION = 1
+
+DEFAULT_PLIES = 10
+
+_HEADER = struct.Struct('<4sHHQ')
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class BookBuilder(object):
+    """
+    Aggregates the results of games for the positions of their first plies.
+    Games that were not finished are counted as draws, games with an illegal
+    move are skipped.
+    """
+
+    def __init__(self, plies=DEFAULT_PLIES):
+        self.plies = plies
+        # key: [white wins, draws, black wins]
+        self.stats = {}
+        self.games = 0
+        self.skipped = 0
+
+
+    def __len__(self):
+        return len(self.stats)
+
+
+    def add_game(self, moves):
+        """
+        Replays a game given as a list of move tuples and adds its result to
+        the positions of its first plies. Returns False if the game was
+        skipped.
+        """
+        hive = Hive()
+        hive.setup()
+        keys = [hive.get_canonical_hash()[0]]
+        for move in moves:
+            if illegal_reason(hive, move) is not None:
+                self.skipped += 1
+                return False
+            try:
+                hive.action(*move2action(move))
+            except HiveException:
+                self.skipped += 1
+                return False
+            if len(keys) <= self.plies:
+                keys.append(hive.get_canonical_hash()[0])
+
+        result = hive.check_victory()
+        if result == Hive.WHITE_WIN:
+            column = 0
+        elif result == Hive.BLACK_WIN:
+            column = 2
+        else:
+            column = 1
+        # a position reached twice in a game counts once
+        for key in set(keys):
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = [0, 0, 0]
+            stats[column] += 1
+        self.games += 1
+        return True
+
+
+    def add_log(self, path):
+        """Adds the games of a log file in notation."""
+        with open(path) as f:
+            for moves in iter_games(f, path):
+                self.add_game(moves)
+
+
+    def write(self, path):
+        """Writes the book file, returns the number of positions."""
+        keys = array('Q', sorted(self.stats))
+        stats = array('I')
+        for key in keys:
+            stats.extend(self.stats[key])
+        if not _LITTLE_ENDIAN:
+            keys.byteswap()
+            stats.byteswap()
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, self.plies, len(keys)))
+            f.write(keys.tobytes())
+            f.write(stats.tobytes())
+        return len(keys)
+
+
+def build_book(paths, path, plies=DEFAULT_PLIES):
+    """
+    Builds the book file path from the game logs in paths. Returns the
+    builder, with the number of games used and skipped.
+    """
+    builder = BookBuilder(plies)
+    for logPath in paths:
+        builder.add_log(logPath)
+    builder.write(path)
+    return builder
+
+
+class OpeningBook(object):
+    """Lookups in a book file mapped in memory. Use it as a context manager."""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError("Not an opening book file: %s" % path)
+        if len(self.map) < _HEADER.size:
+            self.close()
+            raise ValueError("Not an opening book file: %s" % path)
+        (magic, version, self.plies, self.count) = _HEADER.unpack_from(
+            self.map, 0
+        )
+        statsOffset = _HEADER.size + 8 * self.count
+        if (
+            magic != MAGIC or version != VERSION or
+            len(self.map) != statsOffset + 12 * self.count
+        ):
+            self.close()
+            raise ValueError("Not an opening book file: %s" % path)
+        view = memoryview(self.map)
+        keys = view[_HEADER.size:statsOffset]
+        stats = view[statsOffset:]
+        if _LITTLE_ENDIAN:
+            self.keys = keys.cast('Q')
+            self.stats = stats.cast('I')
+        else:
+            self.keys = array('Q', keys.tobytes())
+            self.keys.byteswap()
+            self.stats = array('I', stats.tobytes())
+            self.stats.byteswap()
+        view.release()
+
+
+    def close(self):
+        for name in ('keys', 'stats'):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, 'map', None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def __len__(self):
+        return self.count
+
+
+    def lookup_key(self, key):
+        """Returns (white wins, draws, black wins) of a key or None."""
+        i = bisect.bisect_left(self.keys, key)
+        if i == self.count or self.keys[i] != key:
+            return None
+        return tuple(self.stats[3 * i:3 * i + 3])
+
+
+    def lookup(self, hive):
+        """Returns (white wins, draws, black wins) of the game position."""
+        return self.lookup_key(hive.get_canonical_hash()[0])
+
+
+    def candidates(self, hive):
+        """
+        Returns a list of (action, score, games) for the legal actions
+        leading to positions in the book, where score is the average result
+        for the active player (1 win, 0.5 draw), best first. Of the actions
+        leading to symmetric positions only the first legal one is listed.
+        Past the plies of the book the list is empty, nothing is probed.
+        """
+        # the positions after turn t are t plies deep
+        if hive.turn > self.plies:
+            return []
+        player = hive.activePlayer
+        res = []
+        seen = set()
+        for (actionType, action) in hive.legal_moves():
+            hive.action(actionType, action)
+            key = hive.get_canonical_hash()[0]
+            hive.undo()
+            if key in seen:
+                continue
+            seen.add(key)
+            stats = self.lookup_key(key)
+            if stats is None:
+                continue
+            games = sum(stats)
+            wins = stats[0] if player == 0 else stats[2]
+            score = (wins + 0.5 * stats[1]) / games
+            res.append(((actionType, action), score, games))
+        res.sort(key=lambda c: (-c[1], -c[2]))
+        return res
+
+
+    def best_action(self, hive, minGames=1):
+        """
+        Returns the book action with the best score played in at least
+        minGames games, None when the position is out of the book.
+        """
+        for (action, score, games) in self.candidates(hive):
+            if games >= minGames:
+                return action
+        return None
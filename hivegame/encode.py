@@ -0,0 +1,134 @@
+# encode.py
+# Feature planes of game states for neural network evaluators.
+#
+# Requires numpy.
+#
+# Planes of each encoded game, in order:
+#   - one plane per color, piece kind and stack layer with 1 where there is a
+#     piece of that color and kind at that layer
+#   - one plane per color and piece kind filled with the fraction of those
+#     pieces still in the player hand
+#   - one plane filled with the active player (0 white, 1 black)
+#
+# The grid is centered on the bounding box of the occupied cells, the same
+# limits returned by Hive.get_board_boundaries().
+
+import numpy as np
+
+from hivegame.hive import STATE_PIECES, STATE_PLAYER, STATE_SIZE
+from hivegame.piece import COLORS, PIECE_COUNTS, PIECES
+
+KINDS = tuple(kind for (kind, count) in PIECE_COUNTS)
+
+# Highest stack: a piece with the 4 beetles on top
+MAX_LAYERS = 5
+
+# Grid size that fits every connected hive of 22 pieces in both layouts
+DEFAULT_SIZE = 26
+
+OFFSET = 'offset'
+AXIAL = 'axial'
+
+# color and kind index of each piece id
+_PIECE_COLOR = np.array([COLORS.index(p.color) for p in PIECES])
+_PIECE_KIND = np.array([KINDS.index(p.kind) for p in PIECES])
+# (color, kind) group of each piece id and number of pieces per group
+_PIECE_GROUP = _PIECE_COLOR * len(KINDS) + _PIECE_KIND
+_GROUP_SIZE = np.bincount(_PIECE_GROUP).astype(np.float32)
+
+
+def num_planes(layers=MAX_LAYERS):
+    """Number of planes of each encoded game."""
+    groups = len(COLORS) * len(KINDS)
+    return groups * layers + groups + 1
+
+
+def encode(hives, size=DEFAULT_SIZE, layers=MAX_LAYERS, layout=OFFSET,
+           dtype=np.float32):
+    """
+    Returns an array with shape (len(hives), num_planes(layers), size, size)
+    with the feature planes of each game. See encode_states.
+    """
+    states = np.empty((len(hives), STATE_SIZE), dtype=np.int32)
+    for (i, hive) in enumerate(hives):
+        states[i] = hive.state
+    return encode_states(states, size, layers, layout, dtype)
+
+
+def encode_states(states, size=DEFAULT_SIZE, layers=MAX_LAYERS,
+                  layout=OFFSET, dtype=np.float32):
+    """
+    Encodes an array of Hive.state rows with shape (n, STATE_SIZE).
+
+    In the offset layout planes are indexed by [y, x] like the HexBoard
+    cells, the grid origin row is kept even so odd rows are still the ones
+    shifted to the right. In the axial layout planes are indexed by [r, q].
+    Pieces above the last layer are drawn in the last layer.
+    """
+    states = np.asarray(states, dtype=np.int64)
+    n = states.shape[0]
+    out = np.zeros((n, num_planes(layers), size, size), dtype=dtype)
+    if n == 0:
+        return out
+
+    pieces = states[:, STATE_PIECES:].reshape(n, len(PIECES), 3)
+    xs = pieces[:, :, 0]
+    ys = pieces[:, :, 1]
+    layer = pieces[:, :, 2]
+    inBoard = layer >= 0
+
+    if layout == AXIAL:
+        cols = xs - (ys >> 1)
+    elif layout == OFFSET:
+        cols = xs
+    else:
+        raise ValueError("Unknown layout: %s" % layout)
+    rows = ys
+
+    # bounding box of the occupied cells, (0, 0, 0, 0) for an empty board
+    anyInBoard = inBoard.any(axis=1)
+    big = np.iinfo(np.int64).max
+    minCol = np.where(inBoard, cols, big).min(axis=1)
+    maxCol = np.where(inBoard, cols, -big).max(axis=1)
+    minRow = np.where(inBoard, rows, big).min(axis=1)
+    maxRow = np.where(inBoard, rows, -big).max(axis=1)
+    minCol = np.where(anyInBoard, minCol, 0)
+    maxCol = np.where(anyInBoard, maxCol, 0)
+    minRow = np.where(anyInBoard, minRow, 0)
+    maxRow = np.where(anyInBoard, maxRow, 0)
+
+    originCol = (minCol + maxCol) // 2 - size // 2
+    originRow = (minRow + maxRow) // 2 - size // 2
+    if layout == OFFSET:
+        # keep the parity of the rows
+        originRow -= originRow & 1
+
+    gridCols = cols - originCol[:, None]
+    gridRows = rows - originRow[:, None]
+    if (
+        (gridCols[inBoard] < 0).any() or (gridCols[inBoard] >= size).any() or
+        (gridRows[inBoard] < 0).any() or (gridRows[inBoard] >= size).any()
+    ):
+        raise ValueError("The hive does not fit in a %dx%d grid" % (size, size))
+
+    # piece planes
+    (game, piece) = np.nonzero(inBoard)
+    planes = (
+        _PIECE_GROUP[piece] * layers +
+        np.minimum(layer[game, piece], layers - 1)
+    )
+    out[game, planes, gridRows[game, piece], gridCols[game, piece]] = 1
+
+    # hand planes
+    groups = len(_GROUP_SIZE)
+    handStart = groups * layers
+    inHand = np.zeros((n, groups), dtype=np.float32)
+    np.add.at(inHand, (slice(None), _PIECE_GROUP), ~inBoard)
+    out[:, handStart:handStart + groups] = (
+        inHand / _GROUP_SIZE
+    )[:, :, None, None]
+
+    # active player plane
+    out[:, -1] = states[:, STATE_PLAYER][:, None, None]
+
+    return out
@@ -1,5 +1,8 @@
-from hivegame.board import HexBoard
-from hivegame.piece import HivePiece
+from array import array
+from hivegame.board import HexBoard, SparseHexBoard
+from hivegame.piece import NUM_PIECES, PIECE_IDS, PIECES
+from hivegame.symmetry import NUM_SYMMETRIES, PRIME, cell_terms, piece_weight
+from hivegame.zobrist import SIDE_KEY, hand_key, piece_key
 
 # Python 3 compatibility
 import sys
@@ -7,6 +10,67 @@ if sys.version_info[0] == 3:
     basestring = str
 
 
+# Maximum number of destination sets kept by Hive._cached_destinations
+DEST_CACHE_SIZE = 4096
+
+# Index of each color in the per cell color counters
+_COLOR_INDEX = {'w': 0, 'b': 1}
+
+# Layout of Hive.state, a flat array of ints:
+#   [turn, activePlayer, x0, y0, layer0, x1, y1, layer1, ...]
+# (x, y, layer) are the cell and stack layer of each piece id, pieces that
+# are not in the board are at (0, 0, -1).
+STATE_TURN = 0
+STATE_PLAYER = 1
+STATE_PIECES = 2
+STATE_SIZE = STATE_PIECES + 3 * NUM_PIECES
+_NOT_IN_BOARD = array('i', [0, 0, -1])
+
+# Layout of Hive.snapshot, a flat array of ints: the STATE_SIZE ints of
+# Hive.state, the number of undo records and SNAPSHOT_RECORD ints per record
+#   [pieceId, hasStart, startX, startY, targetX, targetY, turn,
+#    activePlayer, fromHand, ended, hashLow, hashHigh]
+# with pieceId -1 for passes. ended is 1 when the record ended a turn,
+# hashLow and hashHigh are then the two 32 bit halves of the position hash
+# after that turn.
+SNAPSHOT_RECORD = 12
+
+
+def _split_hash(h):
+    """Returns the 64 bit hash as two signed 32 bit ints."""
+    (low, high) = (h & 0xFFFFFFFF, h >> 32)
+    return (
+        low - (1 << 32) if low >= 1 << 31 else low,
+        high - (1 << 32) if high >= 1 << 31 else high
+    )
+
+
+def _join_hash(low, high):
+    return (low & 0xFFFFFFFF) | ((high & 0xFFFFFFFF) << 32)
+
+
+def _bee_slides(occupied):
+    """
+    Returns the indexes of the neighbours a bee can slide to given the bit
+    mask of occupied neighbours (bit i set when neighbour i is occupied).
+    The target must be free and, of the two cells adjacent to both the bee
+    and the target, one must be free and the other occupied.
+    """
+    res = []
+    for i in range(6):
+        if occupied & (1 << i):
+            continue
+        before = bool(occupied & (1 << ((i - 1) % 6)))
+        after = bool(occupied & (1 << ((i + 1) % 6)))
+        if before != after:
+            res.append(i)
+    return tuple(res)
+
+
+# Bee moves for every mask of occupied neighbours, see Hive._bee_moves
+_BEE_SLIDES = tuple(_bee_slides(occupied) for occupied in range(64))
+
+
 class HiveException(Exception):
     """Base class for exceptions."""
     pass
@@ -33,14 +97,62 @@ class Hive(object):
     DRAW = 3
 
 
-    def __init__(self):
+    def __init__(self, repetitions=None, maxTurns=None):
+        """
+        Optional draw rules: the game is a draw when a position occurs for
+        the repetitions time (3 for threefold repetition) or when maxTurns
+        turns were played, each player move or pass is a turn. Both rules
+        are off by default.
+        """
+        self.repetitions = repetitions
+        self.maxTurns = maxTurns
+        self.state = array('i', [0, 0] + [0, 0, -1] * NUM_PIECES)
         self.turn = 0
         self.activePlayer = 0
         self.players = ['w', 'b']
-        self.board = HexBoard()
+        self.board = SparseHexBoard()
         self.playedPieces = {}
         self.piecesInCell = {}
         self.unplayedPieces = {}
+        # pieces that can't move without breaking the hive, see _pinned_pieces
+        self._pinned = None
+        # zobrist hash of the pieces in the board and in hand, see get_hash
+        self._hash = 0
+        # undo records, one per placement, movement or pass. Each record is
+        # (piece, startCell, targetCell, turn, activePlayer, fromHand) with
+        # startCell None for placements and piece None for passes.
+        self._history = []
+        # (number of undo records, get_hash) of the position after each
+        # turn and the number of times each hash occurs, see repetition_count
+        self._hashHistory = []
+        self._hashCounts = {}
+        # destination sets keyed by (hash, pieceName), see _cached_destinations
+        self._destCache = {}
+        # free cells touching the hive and, per color, the free cells
+        # touching only that color. _neighborColors counts the white and
+        # black top pieces around each cell. See _update_frontier
+        self._frontier = set()
+        self._placeable = {'w': set(), 'b': set()}
+        self._neighborColors = {}
+        # translation invariant hashes of the board for each symmetry, see
+        # hivegame/symmetry.py and get_canonical_hash
+        self._symHashes = [0] * NUM_SYMMETRIES
+
+    @property
+    def turn(self):
+        return self.state[STATE_TURN]
+
+    @turn.setter
+    def turn(self, value):
+        self.state[STATE_TURN] = value
+
+    @property
+    def activePlayer(self):
+        return self.state[STATE_PLAYER]
+
+    @activePlayer.setter
+    def activePlayer(self, value):
+        self.state[STATE_PLAYER] = value
 
     def setup(self):
         """
@@ -50,6 +162,7 @@ class Hive(object):
         self.unplayedPieces['w'] = self._piece_set('w')
         self.unplayedPieces['b'] = self._piece_set('b')
         self.turn = 1
+        self._hash = self._compute_hash()
 
 
     def action(self, actionType, action):
@@ -67,8 +180,6 @@ class Hive(object):
             piece = self.unplayedPieces[player].get(actPiece, None)
             if piece is not None:
                 self.place_piece(piece, refPiece, direction)
-                # Remove piece from the unplayed set
-                del self.unplayedPieces[player][actPiece]
             else:
                 ppiece = self.playedPieces.get(actPiece, None)
                 if ppiece is None:
@@ -77,13 +188,37 @@ class Hive(object):
                     self.move_piece(ppiece['piece'], refPiece, direction)
 
         elif (actionType == 'non_play' and action == 'pass'):
-            pass
+            self._history.append(
+                (None, None, None, self.turn, self.activePlayer, False)
+            )
+        else:
+            raise HiveException("Unknown action: %s %s" % (actionType, action))
 
         # perform turn increment - TODO:if succesful
-        self.turn += 1
-        self.activePlayer ^= 1  # switch active player
+        self._end_turn()
         return True
 
+    def legal_moves(self):
+        """
+        Returns the list of legal actions for the active player.
+        Each action is an (actionType, action) pair that can be passed
+        straight to Hive.action. When the active player has no legal play the
+        only action returned is a pass. A finished game has no legal actions.
+
+        Pieces of the same kind are placed in number order (wA1 before wA2)
+        as described by the notation, so only the lowest numbered piece of
+        each kind in hand is offered for placement.
+        """
+        if self.turn <= 0 or self.check_victory() != self.UNFINISHED:
+            return []
+
+        moves = self._generate_moves()
+        if len(moves) == 0:
+            return [('non_play', 'pass')]
+
+        return [self._move2action(piece, cell) for (piece, cell) in moves]
+
+
     def get_unplayed_pieces(self, player):
         return self.unplayedPieces[player]
 
@@ -94,6 +229,52 @@ class Hive(object):
 
         return self.players[self.activePlayer]
 
+    def get_hash(self):
+        """
+        Returns a 64 bit hash of the game state.
+        The hash covers the cell and stack layer of every piece in the board,
+        the pieces in each player hand and the active player. It is updated
+        on every placement and movement instead of being computed from
+        scratch.
+        """
+        if self.activePlayer == 1:
+            return self._hash ^ SIDE_KEY
+        return self._hash
+
+    def get_canonical_hash(self):
+        """
+        Returns (key, symmetry) where key is a hash of the game state that
+        is the same for the positions equivalent under translation, rotation
+        and reflection and symmetry is the index of the symmetry giving
+        that key (see hivegame/symmetry.py). Updated with each move, only
+        the 12 candidate keys are computed here.
+        """
+        anchor = None
+        for pp in self.playedPieces.values():
+            if anchor is None or pp['piece'].id < anchor['piece'].id:
+                anchor = pp
+        if anchor is None:
+            return (self.activePlayer, 0)
+        inverses = cell_terms(anchor['cell'])[1]
+        keys = [
+            h * i % PRIME for (h, i) in zip(self._symHashes, inverses)
+        ]
+        best = min(range(NUM_SYMMETRIES), key=keys.__getitem__)
+        return (keys[best] * 2 + self.activePlayer, best)
+
+
+    def ant_destinations(self, pieceName):
+        """
+        Returns the set of cells the ant can reach in the current position.
+        The one hive rule and the turn rules are not verified here.
+        """
+        pp = self.playedPieces.get(pieceName)
+        if pp is None or pp['piece'].kind != 'A':
+            raise HiveException("Not an ant in the board")
+        if self.piecesInCell[pp['cell']][-1] != pieceName:
+            return frozenset()
+        return self._ant_destinations(pp['piece'], pp['cell'])
+
     def get_board_boundaries(self):
         """returns the coordinates of the board limits."""
         return self.board.get_boundaries()
@@ -122,7 +303,6 @@ class Hive(object):
         Moves a piece on the playing board.
         """
 
-        pieceName = str(piece)
         targetCell = self._poc2cell(refPiece, refDirection)
 
         # is the move valid
@@ -132,18 +312,7 @@ class Hive(object):
         if not self._validate_move_piece(piece, targetCell):
             raise HiveException("Invalid Piece Movement")
 
-        pp = self.playedPieces[pieceName]
-        startingCell = pp['cell']
-
-        # remove the piece from its current location
-        self.piecesInCell[startingCell].remove(pieceName)
-
-        # places the piece at the target location
-        self.board.resize(targetCell)
-        pp['cell'] = targetCell
-        pic = self.piecesInCell.setdefault(targetCell, [])
-        pic.append(str(piece))
-
+        self._apply_move(piece, targetCell)
         return targetCell
 
 
@@ -165,46 +334,218 @@ class Hive(object):
         if not self._validate_place_piece(piece, targetCell):
             raise HiveException("Invalid Piece Placement")
 
-        # places the piece at the target location
-        self.board.resize(targetCell)
-        self.playedPieces[str(piece)] = {'piece': piece, 'cell': targetCell}
-        pic = self.piecesInCell.setdefault(targetCell, [])
-        pic.append(str(piece))
-
+        self._apply_move(piece, targetCell)
         return targetCell
 
 
-    def check_victory(self):
+    def undo(self):
         """
-        Check if white wins or black wins or draw or not finished
+        Takes back the last placement, movement or pass, restoring the board,
+        the player hand, the turn and the active player.
         """
-        white = False
-        black = False
-        res = self.UNFINISHED
+        if len(self._history) == 0:
+            raise HiveException("Nothing to undo")
+
+        hashes = self._hashHistory
+        if len(hashes) > 0 and hashes[-1][0] == len(self._history):
+            h = hashes.pop()[1]
+            count = self._hashCounts[h] - 1
+            if count == 0:
+                del self._hashCounts[h]
+            else:
+                self._hashCounts[h] = count
+        (piece, startCell, targetCell, turn, activePlayer, fromHand) = (
+            self._history.pop()
+        )
+        if piece is not None:
+            pieceName = piece.name
+            self._pop_piece(pieceName, targetCell)
+            if startCell is None:
+                del self.playedPieces[pieceName]
+                if fromHand:
+                    self.unplayedPieces[piece.color][pieceName] = piece
+                    self._hash ^= hand_key(pieceName)
+            else:
+                self.playedPieces[pieceName]['cell'] = startCell
+                self._push_piece(pieceName, startCell)
 
-        # if white queen is surrounded => black wins
-        queen = self.playedPieces.get('wQ1')
-        if(
-            queen is not None and
-            len(self._occupied_surroundings(queen['cell'])) == 6
+        self.turn = turn
+        self.activePlayer = activePlayer
+
+
+    def snapshot(self):
+        """
+        Returns the game state and undo history as bytes, the flat form
+        described by SNAPSHOT_RECORD. See restore.
+        """
+        res = array('i', self.state)
+        res.append(len(self._history))
+        hashes = dict(self._hashHistory)
+        for (i, record) in enumerate(self._history):
+            (piece, startCell, targetCell, turn, activePlayer, fromHand) = (
+                record
+            )
+            if piece is None:
+                res.extend((-1, 0, 0, 0, 0, 0, turn, activePlayer, 0))
+            else:
+                (sx, sy) = startCell if startCell is not None else (0, 0)
+                (tx, ty) = targetCell
+                res.extend((
+                    piece.id, startCell is not None, sx, sy, tx, ty, turn,
+                    activePlayer, fromHand
+                ))
+            h = hashes.get(i + 1)
+            if h is None:
+                res.extend((0, 0, 0))
+            else:
+                res.append(1)
+                res.extend(_split_hash(h))
+        return res.tobytes()
+
+
+    def restore(self, snapshot):
+        """
+        Replaces the game state and undo history with the ones of a snapshot.
+        The draw rules of this game are kept.
+        """
+        data = array('i')
+        data.frombytes(snapshot)
+        if (
+            len(data) <= STATE_SIZE or
+            len(data) != STATE_SIZE + 1 + SNAPSHOT_RECORD * data[STATE_SIZE]
         ):
-            black = True
-            res = self.BLACK_WIN
+            raise ValueError("Invalid snapshot")
 
+        self.state = array('i', [0, 0] + [0, 0, -1] * NUM_PIECES)
+        self.board = SparseHexBoard()
+        self.playedPieces = {}
+        self.piecesInCell = {}
+        self.unplayedPieces = {
+            'w': self._piece_set('w'), 'b': self._piece_set('b')
+        }
+        self._pinned = None
+        self._frontier = set()
+        self._placeable = {'w': set(), 'b': set()}
+        self._neighborColors = {}
+        self._symHashes = [0] * NUM_SYMMETRIES
+        self._hash = self._compute_hash()
+
+        # pieces in the board, the lower ones of a stack first
+        inBoard = []
+        for piece in PIECES:
+            i = STATE_PIECES + 3 * piece.id
+            if data[i + 2] >= 0:
+                inBoard.append((data[i + 2], piece, (data[i], data[i + 1])))
+        for (layer, piece, cell) in sorted(inBoard, key=lambda p: p[0]):
+            del self.unplayedPieces[piece.color][piece.name]
+            self._hash ^= hand_key(piece.name)
+            self.playedPieces[piece.name] = {'piece': piece, 'cell': cell}
+            self._push_piece(piece.name, cell)
+        self.turn = data[STATE_TURN]
+        self.activePlayer = data[STATE_PLAYER]
+
+        self._history = []
+        self._hashHistory = []
+        self._hashCounts = {}
+        for i in range(STATE_SIZE + 1, len(data), SNAPSHOT_RECORD):
+            (pieceId, hasStart, sx, sy, tx, ty, turn, activePlayer,
+             fromHand, ended, low, high) = data[i:i + SNAPSHOT_RECORD]
+            if pieceId < 0:
+                self._history.append(
+                    (None, None, None, turn, activePlayer, False)
+                )
+            else:
+                self._history.append((
+                    PIECES[pieceId], (sx, sy) if hasStart else None,
+                    (tx, ty), turn, activePlayer, bool(fromHand)
+                ))
+            if ended:
+                h = _join_hash(low, high)
+                self._hashHistory.append((len(self._history), h))
+                self._hashCounts[h] = self._hashCounts.get(h, 0) + 1
+
+
+    def __getstate__(self):
+        # copies and pickles use the flat snapshot
+        return (self.snapshot(), self.repetitions, self.maxTurns)
+
+
+    def __setstate__(self, state):
+        (snapshot, repetitions, maxTurns) = state
+        self.__init__(repetitions, maxTurns)
+        self.restore(snapshot)
+
+
+    def clone(self):
+        """
+        Returns a new game with the same state, undo history and draw rules.
+        """
+        res = Hive(self.repetitions, self.maxTurns)
+        res.restore(self.snapshot())
+        return res
+
+
+    def check_victory(self):
+        """
+        Check if white wins or black wins or draw or not finished
+        """
+        # if white queen is surrounded => black wins
+        black = self._queen_neighbors('wQ1') == 6
         # if black queen is surrounded => white wins
-        queen = self.playedPieces.get('bQ1')
-        if(
-            queen is not None and
-            len(self._occupied_surroundings(queen['cell'])) == 6
-        ):
-            white = True
-            res = self.WHITE_WIN
+        white = self._queen_neighbors('bQ1') == 6
 
         # if both queens are surrounded
         if white and black:
-            res = self.DRAW
+            return self.DRAW
+        if white:
+            return self.WHITE_WIN
+        if black:
+            return self.BLACK_WIN
+
+        if (
+            self.repetitions is not None and
+            self._hashCounts.get(self.get_hash(), 0) >= self.repetitions
+        ):
+            return self.DRAW
+        if self.maxTurns is not None and self.turn > self.maxTurns:
+            return self.DRAW
+        return self.UNFINISHED
 
-        return res
+
+    def repetition_count(self):
+        """
+        Returns the number of times the current position was reached at the
+        end of a turn in this game, counting the current one.
+        """
+        return self._hashCounts.get(self.get_hash(), 0)
+
+
+    def queen_liberties(self, player):
+        """
+        Returns the number of free cells around the queen of player ('w' or
+        'b'), None if the queen is still in hand. The queen is surrounded
+        when it has no liberties.
+        """
+        occupied = self._queen_neighbors(player + 'Q1')
+        if occupied is None:
+            return None
+        return 6 - occupied
+
+
+    def _queen_neighbors(self, queenName):
+        """
+        Number of occupied cells around the queen or None if it's not in the
+        board. Read from the per cell color counters kept by
+        _update_frontier, each occupied cell counts once for the color of
+        its top piece.
+        """
+        pp = self.playedPieces.get(queenName)
+        if pp is None:
+            return None
+        counts = self._neighborColors.get(pp['cell'])
+        if counts is None:
+            return 0
+        return counts[0] + counts[1]
 
 
     def _validate_turn(self, piece, action):
@@ -233,29 +574,34 @@ class Hive(object):
         # White Queen must be placed by turn 7 (4th white action)
         if self.turn == 7:
             if 'wQ1' not in self.playedPieces:
-                if str(piece) != 'wQ1' or action != 'place':
+                if piece.name != 'wQ1' or action != 'place':
                     return False
 
         # Black Queen must be placed by turn 8 (4th black action)
         if self.turn == 8:
             if 'bQ1' not in self.playedPieces:
-                if str(piece) != 'bQ1' or action != 'place':
+                if piece.name != 'bQ1' or action != 'place':
                     return False
         return True
 
 
     def _validate_move_piece(self, moving_piece, targetCell):
         # check if the piece has been placed
-        pp = self.playedPieces.get(str(moving_piece))
+        pp = self.playedPieces.get(moving_piece.name)
         if pp is None:
             print("piece was not played yet")
             return False
 
         # check if the move it's to a different targetCell
-        if str(moving_piece) in self.piecesInCell.get(targetCell, []):
+        if moving_piece.name in self.piecesInCell.get(targetCell, []):
             print("moving to the same place")
             return False
 
+        # check if the piece has no other piece on top blocking the move
+        if self.piecesInCell[pp['cell']][-1] != moving_piece.name:
+            print("piece is covered")
+            return False
+
         # check if moving this piece won't break the hive
         if not self._one_hive(moving_piece):
             print("break _one_hive rule")
@@ -286,7 +632,7 @@ class Hive(object):
             return False
 
         # the piece was already played
-        if str(piece) in self.playedPieces:
+        if piece.name in self.playedPieces:
             return False
 
         # if it's the first turn we don't need to validate
@@ -297,18 +643,161 @@ class Hive(object):
         if self.turn == 2:
             return True
 
-        playedColor = piece.color
+        return targetCell in self._placeable[piece.color]
+
+
+    def _apply_move(self, piece, targetCell):
+        """
+        Places the piece from hand or moves it from its cell to targetCell
+        and records the undo entry. Nothing is validated and the turn is not
+        changed.
+        """
+        pieceName = piece.name
+        pp = self.playedPieces.get(pieceName)
+        if pp is None:
+            # Remove piece from the unplayed set
+            hand = self.unplayedPieces.get(piece.color, {})
+            fromHand = hand.pop(pieceName, None) is not None
+            if fromHand:
+                self._hash ^= hand_key(pieceName)
+            self._history.append(
+                (piece, None, targetCell, self.turn, self.activePlayer,
+                 fromHand)
+            )
+            self.playedPieces[pieceName] = {
+                'piece': piece, 'cell': targetCell
+            }
+        else:
+            startingCell = pp['cell']
+            self._history.append(
+                (piece, startingCell, targetCell, self.turn,
+                 self.activePlayer, False)
+            )
+            # remove the piece from its current location
+            self._pop_piece(pieceName, startingCell)
+            pp['cell'] = targetCell
+
+        # places the piece at the target location
+        self._push_piece(pieceName, targetCell)
+
+
+    def _play_move(self, piece, targetCell):
+        """
+        Plays a move returned by _generate_moves, or a pass when piece is
+        None, and ends the turn. The move is trusted to be legal.
+        """
+        if piece is None:
+            self._history.append(
+                (None, None, None, self.turn, self.activePlayer, False)
+            )
+        else:
+            self._apply_move(piece, targetCell)
+        self._end_turn()
+
 
-        occupiedCells = self._occupied_surroundings(targetCell)
-        visiblePieces = [
-            self.piecesInCell[oCell][-1] for oCell in occupiedCells
+    def _end_turn(self):
+        """Switches the active player and counts the position reached."""
+        self.turn += 1
+        self.activePlayer ^= 1  # switch active player
+        h = self.get_hash()
+        self._hashHistory.append((len(self._history), h))
+        self._hashCounts[h] = self._hashCounts.get(h, 0) + 1
+
+
+    def _push_piece(self, pieceName, cell):
+        """Puts a piece on top of the cell."""
+        self.board.occupy(cell)
+        pic = self.piecesInCell.setdefault(cell, [])
+        layer = len(pic)
+        self._hash ^= piece_key(pieceName, cell, layer)
+        pieceId = PIECE_IDS[pieceName]
+        i = STATE_PIECES + 3 * pieceId
+        (self.state[i], self.state[i + 1]) = cell
+        self.state[i + 2] = layer
+        w = piece_weight(pieceId, layer)
+        self._symHashes = [
+            (h + w * t) % PRIME
+            for (h, t) in zip(self._symHashes, cell_terms(cell)[0])
+        ]
+        oldColor = pic[-1][0] if layer > 0 else None
+        pic.append(pieceName)
+        self._update_frontier(cell, oldColor, pieceName[0])
+        self._pinned = None
+
+
+    def _pop_piece(self, pieceName, cell):
+        """Removes the piece from the top of the cell."""
+        pic = self.piecesInCell[cell]
+        layer = len(pic) - 1
+        self._hash ^= piece_key(pieceName, cell, layer)
+        pieceId = PIECE_IDS[pieceName]
+        i = STATE_PIECES + 3 * pieceId
+        self.state[i:i + 3] = _NOT_IN_BOARD
+        w = piece_weight(pieceId, layer)
+        self._symHashes = [
+            (h - w * t) % PRIME
+            for (h, t) in zip(self._symHashes, cell_terms(cell)[0])
         ]
-        res = True
-        for pName in visiblePieces:
-            if self.playedPieces[pName]['piece'].color != playedColor:
-                res = False
-                break
+        pic.pop()
+        newColor = pic[-1][0] if len(pic) > 0 else None
+        self._update_frontier(cell, pieceName[0], newColor)
+        self.board.vacate(cell)
+        self._pinned = None
+
+
+    def _update_frontier(self, cell, oldColor, newColor):
+        """
+        Updates the frontier and placement sets after the color of the top
+        piece of cell changed from oldColor to newColor (None when empty).
+        """
+        colorIndex = _COLOR_INDEX
+        if oldColor == newColor:
+            neighbors = ()
+        else:
+            neighbors = self.board.get_neighbors(cell)
+        for n in neighbors:
+            counts = self._neighborColors.get(n)
+            if counts is None:
+                counts = self._neighborColors[n] = [0, 0]
+            if oldColor is not None:
+                counts[colorIndex[oldColor]] -= 1
+            if newColor is not None:
+                counts[colorIndex[newColor]] += 1
+            if counts[0] == counts[1] == 0:
+                del self._neighborColors[n]
+            self._refresh_frontier(n)
+        self._refresh_frontier(cell)
+
+
+    def _refresh_frontier(self, cell):
+        (white, black) = self._neighborColors.get(cell, (0, 0))
+        free = not self.piecesInCell.get(cell)
+        if free and (white > 0 or black > 0):
+            self._frontier.add(cell)
+        else:
+            self._frontier.discard(cell)
+        if free and white > 0 and black == 0:
+            self._placeable['w'].add(cell)
+        else:
+            self._placeable['w'].discard(cell)
+        if free and black > 0 and white == 0:
+            self._placeable['b'].add(cell)
+        else:
+            self._placeable['b'].discard(cell)
+
 
+    def _compute_hash(self):
+        """
+        Computes the hash of the pieces in the board and in hand from scratch.
+        The active player is not included.
+        """
+        res = 0
+        for (cell, pic) in self.piecesInCell.items():
+            for layer in range(len(pic)):
+                res ^= piece_key(pic[layer], cell, layer)
+        for hand in self.unplayedPieces.values():
+            for pieceName in hand:
+                res ^= hand_key(pieceName)
         return res
 
 
@@ -321,8 +810,8 @@ class Hive(object):
         """
         Returns a list of surrounding cells that contain a piece.
         """
-        surroundings = self.board.get_surrounding(cell)
-        return [c for c in surroundings if not self._is_cell_free(c)]
+        pic = self.piecesInCell
+        return [c for c in self.board.get_neighbors(cell) if pic.get(c)]
 
 
     # TODO: rename/remove this function.
@@ -345,41 +834,22 @@ class Hive(object):
         - and there is a free cell that is adjacent to both the bee and the
           target position.
         """
-        available_moves = []
-        surroundings = self.board.get_surrounding(cell)
-        for i in range(6):
-            target = surroundings[i-1]
-            # is the target cell free?
-            if not self._is_cell_free(target):
-                continue
-            # does it have an adjacent free and an adjancent occupied cell that
-            # is also adjacent to the starting cell?
-            if (
-                self._is_cell_free(surroundings[i])
-                != self._is_cell_free(surroundings[i-2])
-            ):
-                available_moves.append(target)
-        return available_moves
+        surroundings = self.board.get_neighbors(cell)
+        pic = self.piecesInCell
+        occupied = 0
+        bit = 1
+        for c in surroundings:
+            if pic.get(c):
+                occupied |= bit
+            bit <<= 1
+        return [surroundings[i] for i in _BEE_SLIDES[occupied]]
 
 
     def _piece_set(self, color):
         """
         Return a full set of hive pieces
         """
-        pieceSet = {}
-        for i in range(3):
-            ant = HivePiece(color, 'A', i+1)
-            pieceSet[str(ant)] = ant
-            grasshopper = HivePiece(color, 'G', i+1)
-            pieceSet[str(grasshopper)] = grasshopper
-        for i in range(2):
-            spider = HivePiece(color, 'S', i+1)
-            pieceSet[str(spider)] = spider
-            beetle = HivePiece(color, 'B', i+1)
-            pieceSet[str(beetle)] = beetle
-        queen = HivePiece(color, 'Q', 1)
-        pieceSet[str(queen)] = queen
-        return pieceSet
+        return dict((p.name, p) for p in PIECES if p.color == color)
 
 
 # +++               +++
@@ -390,40 +860,60 @@ class Hive(object):
         Check if removing a piece doesn't break the one hive rule.
         Returns False if the hive is broken.
         """
-        originalPos = self.locate(str(piece))
-        # if the piece is not in the board then moving it won't break the hive
-        if originalPos is None:
-            return True
-        # if there is another piece in the same cell then the one hive rule
-        # won't be broken
-        pic = self.piecesInCell[originalPos]
-        if len(pic) > 1:
-            return True
+        return piece.name not in self._pinned_pieces()
 
-        # temporarily remove the piece
-        del self.piecesInCell[originalPos]
 
-        # Get all pieces that are in contact with the removed one and try to
-        # reach all of them from one of them.
-        occupied = self._occupied_surroundings(originalPos)
-        visited = set()
-        toExplore = set([occupied[0]])
-        toReach = set(occupied[1:])
-        res = False
-
-        while len(toExplore) > 0:
-            found = []
-            for cell in toExplore:
-                found += self._occupied_surroundings(cell)
-                visited.add(cell)
-            toExplore = set(found) - visited
-            if toReach.issubset(visited):
-                res = True
-                break
-
-        # restore the removed piece
-        self.piecesInCell[originalPos] = pic
-        return res
+    def _pinned_pieces(self):
+        """
+        Returns the set of pieces that can't be removed without breaking the
+        hive.
+        Those are the pieces alone in a cell that is an articulation point of
+        the graph of occupied cells. The set is computed with one depth first
+        search (Tarjan) and kept until the next piece placement or movement.
+        """
+        if self._pinned is not None:
+            return self._pinned
+
+        occupied = [c for (c, pic) in self.piecesInCell.items() if len(pic) > 0]
+        cutCells = set()
+        if len(occupied) > 0:
+            root = occupied[0]
+            discovery = {root: 0}
+            low = {root: 0}
+            rootChildren = 0
+            # iterative DFS, each entry is (cell, parent, neighbours iterator)
+            stack = [(root, None, iter(self._occupied_surroundings(root)))]
+            while len(stack) > 0:
+                (cell, parent, neighbours) = stack[-1]
+                for n in neighbours:
+                    if n not in discovery:
+                        discovery[n] = low[n] = len(discovery)
+                        stack.append(
+                            (n, cell, iter(self._occupied_surroundings(n)))
+                        )
+                        break
+                    elif n != parent and discovery[n] < low[cell]:
+                        low[cell] = discovery[n]
+                else:
+                    # all neighbours explored
+                    stack.pop()
+                    if parent is None:
+                        continue
+                    if low[cell] < low[parent]:
+                        low[parent] = low[cell]
+                    if parent == root:
+                        rootChildren += 1
+                    elif low[cell] >= discovery[parent]:
+                        cutCells.add(parent)
+            if rootChildren > 1:
+                cutCells.add(root)
+
+        # pieces in a stack can always leave the cell
+        self._pinned = set(
+            self.piecesInCell[c][0] for c in cutCells
+            if len(self.piecesInCell[c]) == 1
+        )
+        return self._pinned
 
 # --- ---
 
@@ -432,45 +922,22 @@ class Hive(object):
 # +++                +++
     def _valid_ant_move(self, ant, startCell, endCell):
         # check if ant has no piece on top blocking the move
-        if self.piecesInCell[startCell][-1] != str(ant):
+        if self.piecesInCell[startCell][-1] != ant.name:
             return False
-        # temporarily remove ant
-        self.piecesInCell[startCell].remove(str(ant))
-
-        toExplore = set([startCell])
-        visited = set([startCell])
-        res = False
-
-        while len(toExplore) > 0:
-            found = set()
-            for c in toExplore:
-                found.update(self._bee_moves(c))
-            found.difference_update(visited)
-            # have we found the endCell?
-            if endCell in found:
-                res = True
-                break
-
-            visited.update(found)
-            toExplore = found
-
-        # restore ant to it's original position
-        self.piecesInCell[startCell].append(str(ant))
-
-        return res
+        return endCell in self._ant_destinations(ant, startCell)
 
 
     def _valid_beetle_move(self, beetle, startCell, endCell):
         # check if beetle has no piece on top blocking the move
-        if not self.piecesInCell[startCell][-1] == str(beetle):
+        if not self.piecesInCell[startCell][-1] == beetle.name:
             return False
         # temporarily remove beetle
-        self.piecesInCell[startCell].remove(str(beetle))
+        self.piecesInCell[startCell].remove(beetle.name)
 
         res = False
         # are we on top of the hive?
         if len(self.piecesInCell[startCell]) > 0:
-            res = endCell in self.board.get_surrounding(startCell)
+            res = endCell in self.board.get_neighbors(startCell)
         else:
             res = endCell in (
                 self._bee_moves(startCell) +
@@ -478,7 +945,7 @@ class Hive(object):
             )
 
         # restore beetle to it's original position
-        self.piecesInCell[startCell].append(str(beetle))
+        self.piecesInCell[startCell].append(beetle.name)
 
         return res
 
@@ -528,34 +995,231 @@ class Hive(object):
 
     def _valid_spider_move(self, spider, startCell, endCell):
         # check if spider has no piece on top blocking the move
-        if not self.piecesInCell[startCell][-1] == str(spider):
+        if not self.piecesInCell[startCell][-1] == spider.name:
             return False
-        # temporarily remove spider
-        self.piecesInCell[startCell].remove(str(spider))
+        return endCell in self._spider_destinations(spider, startCell)
+
+# --- ---
+
+# +++                 +++
+# +++ Move generation +++
+# +++                 +++
+    def _generate_moves(self):
+        """
+        Returns a list of (piece, targetCell) with every legal placement and
+        movement of the active player.
+        """
+        player = self.get_active_player()
+        moves = []
+
+        # placements share the same target cells for every piece in hand
+        placeable = [
+            p for p in self._hand_candidates(player)
+            if self._validate_turn(p, 'place')
+        ]
+        if len(placeable) > 0:
+            cells = self._placement_cells(player)
+            for piece in placeable:
+                moves.extend([(piece, c) for c in cells])
+
+        # movements
+        for name in sorted(self.playedPieces):
+            pp = self.playedPieces[name]
+            piece = pp['piece']
+            if piece.color != player:
+                continue
+            if self.piecesInCell[pp['cell']][-1] != name:
+                continue
+            if not self._validate_turn(piece, 'move'):
+                continue
+            if not self._one_hive(piece):
+                continue
+            for c in sorted(self._piece_destinations(piece, pp['cell'])):
+                moves.append((piece, c))
+
+        return moves
+
+
+    def _hand_candidates(self, player):
+        """
+        Returns the lowest numbered piece of each kind in the player hand.
+        """
+        hand = self.unplayedPieces.get(player, {})
+        kinds = {}
+        for name in sorted(hand):
+            piece = hand[name]
+            kinds.setdefault(piece.kind, piece)
+        return [kinds[k] for k in sorted(kinds)]
+
+
+    def _placement_cells(self, player):
+        """
+        Returns the sorted list of free cells where the player can place a
+        piece from hand.
+        """
+        if self.turn == 1:
+            return [(0, 0)]
+
+        # on the second turn the piece can touch the opponent piece
+        if self.turn == 2:
+            return sorted(self._frontier)
+
+        return sorted(self._placeable[player])
+
+
+    def _piece_destinations(self, piece, startCell):
+        """
+        Returns the list of cells the piece can move to from startCell.
+        The one hive rule is not verified here.
+        """
+        dest_fun_map = {
+            'A': self._ant_destinations,
+            'B': self._beetle_destinations,
+            'G': self._grasshopper_destinations,
+            'Q': self._queen_destinations,
+            'S': self._spider_destinations
+        }
+        return dest_fun_map[piece.kind](piece, startCell)
+
+
+    def _cached_destinations(self, piece, startCell, flood):
+        """
+        Returns the destination set of piece computed by flood(startCell),
+        reusing the set computed earlier for the same position.
+        """
+        key = (self._hash, piece.name)
+        res = self._destCache.get(key)
+        if res is None:
+            if len(self._destCache) >= DEST_CACHE_SIZE:
+                self._destCache.clear()
+            # the piece is not part of the hive while it moves
+            pic = self.piecesInCell[startCell]
+            pic.pop()
+            try:
+                res = flood(startCell)
+            finally:
+                pic.append(piece.name)
+            self._destCache[key] = res
+        return res
+
+
+    def _ant_destinations(self, ant, startCell):
+        """
+        Returns the frozenset of cells reachable by the ant, found with a
+        single flood of bee moves around the hive.
+        The ant must be on top of startCell.
+        """
+        return self._cached_destinations(ant, startCell, self._ant_flood)
+
+
+    def _ant_flood(self, startCell):
+        toExplore = [startCell]
+        visited = set(toExplore)
+        while len(toExplore) > 0:
+            found = []
+            for c in toExplore:
+                for n in self._bee_moves(c):
+                    if n not in visited:
+                        visited.add(n)
+                        found.append(n)
+            toExplore = found
+
+        visited.remove(startCell)
+        return frozenset(visited)
+
+
+    def _beetle_destinations(self, beetle, startCell):
+        # temporarily remove beetle
+        self.piecesInCell[startCell].remove(beetle.name)
 
+        # are we on top of the hive?
+        if len(self.piecesInCell[startCell]) > 0:
+            res = list(self.board.get_neighbors(startCell))
+        else:
+            res = (
+                self._bee_moves(startCell) +
+                self._occupied_surroundings(startCell)
+            )
 
-        visited = set()
-        firstStep = set()
-        secondStep = set()
-        thirdStep = set()
+        # restore beetle to it's original position
+        self.piecesInCell[startCell].append(beetle.name)
 
-        visited.add(startCell)
+        return res
 
-        firstStep.update(set(self._bee_moves(startCell)))
-        visited.update(firstStep)
 
-        for c in firstStep:
-            secondStep.update(set(self._bee_moves(c)))
-        secondStep.difference_update(visited)
-        visited.update(secondStep)
+    def _grasshopper_destinations(self, grasshopper, startCell):
+        res = []
+        neighbors = self.board.get_neighbors
+        pic = self.piecesInCell
+        # the neighbors are sorted by direction, starting from W
+        for i in range(6):
+            c = neighbors(startCell)[i]
+            # must jump at least over one piece
+            if not pic.get(c):
+                continue
+            while pic.get(c):
+                c = neighbors(c)[i]
+            res.append(c)
+        return res
+
 
-        for c in secondStep:
-            thirdStep.update(set(self._bee_moves(c)))
-        thirdStep.difference_update(visited)
+    def _queen_destinations(self, queen, startCell):
+        return self._bee_moves(startCell)
 
-        # restore spider to it's original position
-        self.piecesInCell[startCell].append(str(spider))
 
-        return endCell in thirdStep
+    def _spider_destinations(self, spider, startCell):
+        """
+        Returns the frozenset of cells where the spider can stop after
+        exactly 3 bee moves without going through the same cell twice.
+        The spider must be on top of startCell.
+        """
+        return self._cached_destinations(
+            spider, startCell, self._spider_paths
+        )
+
+
+    def _spider_paths(self, startCell):
+        # every path the spider can walk, a cell can't be repeated in a path
+        paths = [(startCell,)]
+        for i in range(3):
+            found = []
+            for path in paths:
+                for c in self._bee_moves(path[-1]):
+                    if c not in path:
+                        found.append(path + (c,))
+            paths = found
+        return frozenset(path[-1] for path in paths)
+
+
+    def _move2action(self, piece, targetCell):
+        """
+        Translates a (piece, targetCell) move into an action that can be
+        given to Hive.action.
+        The reference piece is the first piece found around targetCell,
+        other than the moving piece, starting from the west and going
+        clockwise.
+        """
+        pieceName = piece.name
+        if self.turn == 1:
+            return ('play', pieceName)
+
+        # climbing on top of another piece
+        pic = self.piecesInCell.get(targetCell, [])
+        if len(pic) > 0:
+            return ('play', (pieceName, pic[-1], self.O))
+
+        surroundings = self.board.get_neighbors(targetCell)
+        for i in range(6):
+            refPieces = [
+                p for p in self.piecesInCell.get(surroundings[i], [])
+                if p != pieceName
+            ]
+            if len(refPieces) > 0:
+                # the surroundings are sorted clockwise starting from W so
+                # the direction from the reference cell is the opposite one
+                direction = (i + 3) % 6 + 1
+                return ('play', (pieceName, refPieces[-1], direction))
+
+        raise HiveException("Invalid Piece Movement")
 
 # --- ---
@@ -0,0 +1,358 @@
+# mcts.py
+# Monte Carlo Tree Search player.
+#
+# The tree is kept in parallel arrays indexed by node, the children of a
+# node are stored next to each other so a node only needs the index of its
+# first child and the number of children. A node takes about 30 bytes.
+#
+# Values are in [0, 1] (1 is a win) and the value of a node is seen by the
+# player that made the move leading to it.
+
+import math
+import random
+import time
+from array import array
+
+from hivegame.hive import Hive
+from hivegame.piece import PIECES
+from hivegame.rollout import rollout
+
+UCT = 'uct'
+PUCT = 'puct'
+
+# piece id of the pass moves and of the root node
+_PASS = -1
+_NO_MOVE = -2
+
+
+def result_value(result, player):
+    """Value of an end game status for player (0 white, 1 black)."""
+    if result == Hive.WHITE_WIN:
+        return 1.0 if player == 0 else 0.0
+    if result == Hive.BLACK_WIN:
+        return 0.0 if player == 0 else 1.0
+    return 0.5
+
+
+def uniform_prior(hive, moves):
+    """Same prior probability for every move."""
+    p = 1.0 / len(moves)
+    return [p] * len(moves)
+
+
+class MCTS(object):
+    """
+    Monte Carlo Tree Search over the Hive rules.
+
+    selection is UCT or PUCT with exploration constant c. PUCT uses
+    prior(hive, moves), returning a probability per (piece, targetCell)
+    move, and unvisited children are valued fpu.
+    evaluate(hive) returns the value of a leaf for the active player, by
+    default the result of a random rollout capped at maxPlies.
+
+    The subtree of the position reached by the moves played since the last
+    search is kept for the next search. The positions found in book, an
+    OpeningBook (see hivegame/book.py), are answered without searching.
+    """
+
+    def __init__(self, selection=UCT, c=1.4, prior=None, evaluate=None,
+                 maxPlies=100, fpu=0.5, seed=None, book=None):
+        if selection not in (UCT, PUCT):
+            raise ValueError("Unknown selection: %s" % selection)
+        self.selection = selection
+        self.c = c
+        self.prior = prior if prior is not None else uniform_prior
+        self.evaluate = (
+            evaluate if evaluate is not None else self._rollout_value
+        )
+        self.maxPlies = maxPlies
+        self.fpu = fpu
+        self.rnd = random.Random(seed)
+        self.book = book
+        # history of the game at the root of the tree
+        self._history = None
+        self.stats = {}
+        self._reset()
+
+
+    def _reset(self):
+        self.visits = array('I')
+        self.values = array('d')
+        self.priors = array('f')
+        self.parents = array('i')
+        self.firstChild = array('i')
+        self.numChildren = array('H')
+        # move leading to each node: piece id and target cell
+        self.pieces = array('b')
+        self.xs = array('h')
+        self.ys = array('h')
+        self._add_node(-1, _NO_MOVE, 0, 0, 1.0)
+
+
+    def __len__(self):
+        return len(self.visits)
+
+
+    def _add_node(self, parent, pieceId, x, y, prior):
+        self.visits.append(0)
+        self.values.append(0.0)
+        self.priors.append(prior)
+        self.parents.append(parent)
+        self.firstChild.append(-1)
+        self.numChildren.append(0)
+        self.pieces.append(pieceId)
+        self.xs.append(x)
+        self.ys.append(y)
+
+
+    def search(self, hive, iterations=None, seconds=None):
+        """
+        Searches from the current game state until iterations iterations
+        were run or seconds seconds passed, whichever comes first (at least
+        one budget must be given).
+        Returns the action with the most visits, as given to Hive.action,
+        or None when the game is finished.
+        """
+        if iterations is None and seconds is None:
+            raise ValueError("A search needs an iteration or time budget")
+        if len(hive.legal_moves()) == 0:
+            return None
+        if self.book is not None:
+            action = self.book.best_action(hive)
+            if action is not None:
+                self.stats = {
+                    'iterations': 0, 'seconds': 0.0, 'nodes': len(self),
+                    'reused': 0, 'book': True,
+                }
+                return action
+
+        reused = self._advance(hive)
+        start = time.time()
+        deadline = start + seconds if seconds is not None else None
+        done = 0
+        while iterations is None or done < iterations:
+            if deadline is not None and time.time() >= deadline:
+                break
+            self._iterate(hive)
+            done += 1
+        self._history = list(hive._history)
+
+        self.stats = {
+            'iterations': done,
+            'seconds': time.time() - start,
+            'nodes': len(self),
+            'reused': reused,
+        }
+        return self._best_action(hive)
+
+
+    def child_stats(self):
+        """
+        Returns a list of ((piece, targetCell), visits, value) for the
+        children of the root, piece is None for a pass.
+        """
+        first = self.firstChild[0]
+        res = []
+        for c in range(first, first + self.numChildren[0]):
+            visits = self.visits[c]
+            value = self.values[c] / visits if visits > 0 else None
+            res.append((self._move(c), visits, value))
+        return res
+
+
+    def _move(self, node):
+        pieceId = self.pieces[node]
+        if pieceId == _PASS:
+            return (None, None)
+        return (PIECES[pieceId], (self.xs[node], self.ys[node]))
+
+
+    def _best_action(self, hive):
+        if self.numChildren[0] == 0:
+            # the budget ran out before the root was expanded
+            moves = hive._generate_moves()
+            if len(moves) == 0:
+                return ('non_play', 'pass')
+            return hive._move2action(*moves[0])
+        first = self.firstChild[0]
+        best = max(
+            range(first, first + self.numChildren[0]),
+            key=lambda c: self.visits[c]
+        )
+        (piece, cell) = self._move(best)
+        if piece is None:
+            return ('non_play', 'pass')
+        return hive._move2action(piece, cell)
+
+
+    def _iterate(self, hive):
+        """Selection, expansion, evaluation and backpropagation."""
+        node = 0
+        played = 0
+        try:
+            # selection
+            while self.numChildren[node] > 0:
+                node = self._select(node)
+                (piece, cell) = self._move(node)
+                hive._play_move(piece, cell)
+                played += 1
+
+            result = hive.check_victory()
+            if result != Hive.UNFINISHED:
+                value = result_value(result, hive.activePlayer)
+            else:
+                self._expand(node, hive)
+                value = self.evaluate(hive)
+        finally:
+            for i in range(played):
+                hive.undo()
+
+        # backpropagation, the value of a node is seen by the player that
+        # moved into it
+        value = 1.0 - value
+        while node >= 0:
+            self.visits[node] += 1
+            self.values[node] += value
+            value = 1.0 - value
+            node = self.parents[node]
+
+
+    def _select(self, node):
+        first = self.firstChild[node]
+        children = range(first, first + self.numChildren[node])
+        visits = self.visits
+        values = self.values
+        if self.selection == UCT:
+            logVisits = math.log(max(visits[node], 1))
+            best = None
+            bestScore = -1.0
+            for c in children:
+                n = visits[c]
+                if n == 0:
+                    return c
+                score = values[c] / n + self.c * math.sqrt(logVisits / n)
+                if score > bestScore:
+                    (best, bestScore) = (c, score)
+            return best
+
+        scale = self.c * math.sqrt(visits[node])
+        priors = self.priors
+        fpu = self.fpu
+        best = None
+        bestScore = -1.0
+        for c in children:
+            n = visits[c]
+            q = values[c] / n if n > 0 else fpu
+            score = q + scale * priors[c] / (1 + n)
+            if score > bestScore:
+                (best, bestScore) = (c, score)
+        return best
+
+
+    def _expand(self, node, hive):
+        moves = hive._generate_moves()
+        if len(moves) == 0:
+            self.firstChild[node] = len(self)
+            self.numChildren[node] = 1
+            self._add_node(node, _PASS, 0, 0, 1.0)
+            return
+        priors = self.prior(hive, moves)
+        self.firstChild[node] = len(self)
+        self.numChildren[node] = len(moves)
+        for ((piece, (x, y)), p) in zip(moves, priors):
+            self._add_node(node, piece.id, x, y, p)
+
+
+    def _rollout_value(self, hive):
+        (result, plies) = rollout(hive, self.rnd, self.maxPlies)
+        return result_value(result, hive.activePlayer)
+
+
+    def _find_child(self, node, record):
+        """Returns the child reached by an undo record or -1."""
+        (piece, startCell, targetCell) = record[:3]
+        pieceId = piece.id if piece is not None else _PASS
+        first = self.firstChild[node]
+        if first < 0:
+            return -1
+        for c in range(first, first + self.numChildren[node]):
+            if self.pieces[c] != pieceId:
+                continue
+            if pieceId == _PASS or (self.xs[c], self.ys[c]) == targetCell:
+                return c
+        return -1
+
+
+    def _advance(self, hive):
+        """
+        Moves the root to the current game state, keeping the subtree of the
+        moves played since the last search. Returns the number of nodes kept.
+        """
+        history = hive._history
+        known = self._history
+        node = -1
+        if known is not None and history[:len(known)] == known:
+            node = 0
+            for record in history[len(known):]:
+                node = self._find_child(node, record)
+                if node < 0:
+                    break
+        if node < 0:
+            self._reset()
+        elif node > 0:
+            self._reroot(node)
+        return len(self) if self.visits[0] > 0 else 0
+
+
+    def _reroot(self, root):
+        """Keeps only the subtree of root, copied in breadth first order."""
+        old = (
+            self.visits, self.values, self.priors, self.firstChild,
+            self.numChildren, self.pieces, self.xs, self.ys
+        )
+        (visits, values, priors, firstChild, numChildren, pieces, xs, ys) = (
+            old
+        )
+        self._reset()
+        # _reset adds an empty root, replace it with the old one
+        for arr in (
+            self.visits, self.values, self.priors, self.parents,
+            self.firstChild, self.numChildren, self.pieces, self.xs, self.ys
+        ):
+            arr.pop()
+
+        def copy(node, parent):
+            self._add_node(
+                parent, pieces[node], xs[node], ys[node], priors[node]
+            )
+            self.visits[-1] = visits[node]
+            self.values[-1] = values[node]
+
+        copy(root, -1)
+        queue = [root]
+        i = 0
+        while i < len(queue):
+            node = queue[i]
+            first = firstChild[node]
+            if first >= 0:
+                self.firstChild[i] = len(self)
+                self.numChildren[i] = numChildren[node]
+                for c in range(first, first + numChildren[node]):
+                    copy(c, i)
+                    queue.append(c)
+            i += 1
+
+
+_agent = None
+
+
+def mcts_agent(hive, rnd):
+    """
+    Self-play agent searching 100 iterations per move with the tree kept
+    between the moves of the same game.
+    """
+    global _agent
+    if _agent is None:
+        _agent = MCTS(maxPlies=40)
+    _agent.rnd = rnd
+    return _agent.search(hive, iterations=100)
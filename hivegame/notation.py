@@ -0,0 +1,194 @@
+# notation.py
+# Move notation used by the game logs (see exampleGame.log and README.md).
+#
+# Each line has one command:
+#   wA1          first piece of the game
+#   bA1*|wA1     piece, point of contact and reference piece
+#   pass         the active player can not play
+#
+# A file can hold many games separated by blank lines. Lines starting with
+# '#' are comments.
+#
+# Commands are parsed into compact move tuples of ints
+# (piece id, reference piece id, direction), see hivegame/piece.py for the
+# ids. The first piece of a game has no reference, (piece, NONE, NONE), and
+# a pass is (NONE, NONE, NONE).
+
+from hivegame.hive import Hive
+from hivegame.piece import PIECE_IDS, PIECE_NAMES
+
+NONE = -1
+PASS = (NONE, NONE, NONE)
+
+# Point of contact of the moving piece for each direction from the reference
+DIRECTION2POC = {
+    Hive.W: '|*',
+    Hive.NW: '/*',
+    Hive.NE: '*\\',
+    Hive.E: '*|',
+    Hive.SE: '*/',
+    Hive.SW: '\\*',
+    Hive.O: '=*',
+}
+POC2DIRECTION = dict((poc, d) for (d, poc) in DIRECTION2POC.items())
+
+
+class NotationError(ValueError):
+    """
+    A command that can't be parsed. lineno is the line number (from 1) in
+    source, a file name, when the command was read from a file.
+    """
+
+    def __init__(self, message, cmd=None, lineno=None, source=None):
+        self.message = message
+        self.cmd = cmd
+        self.lineno = lineno
+        self.source = source
+        ValueError.__init__(self, str(self))
+
+
+    def __str__(self):
+        where = ''
+        if self.lineno is not None:
+            where = '%s:%d: ' % (self.source or '<input>', self.lineno)
+        if self.cmd is None:
+            return where + self.message
+        return '%s%s: "%s"' % (where, self.message, self.cmd)
+
+
+def _command_table():
+    """Every valid command with its move tuple."""
+    res = {'pass': PASS}
+    for (i, name) in enumerate(PIECE_NAMES):
+        res[name] = (i, NONE, NONE)
+        for (j, ref) in enumerate(PIECE_NAMES):
+            if i == j:
+                continue
+            for (poc, d) in POC2DIRECTION.items():
+                res[name + poc + ref] = (i, j, d)
+    return res
+
+
+_COMMANDS = _command_table()
+_MOVES = dict((move, cmd) for (cmd, move) in _COMMANDS.items())
+
+
+def _diagnose(cmd):
+    """Returns the reason why cmd is not a valid command."""
+    if len(cmd) not in (3, 8):
+        return 'Expected a piece, a piece with a point of contact and ' \
+            'reference piece or pass'
+    if cmd[:3] not in PIECE_IDS:
+        return 'Unknown piece "%s"' % cmd[:3]
+    if cmd[3:5] not in POC2DIRECTION:
+        return 'Invalid point of contact "%s"' % cmd[3:5]
+    if cmd[5:] not in PIECE_IDS:
+        return 'Unknown reference piece "%s"' % cmd[5:]
+    return 'A piece can\'t be its own reference'
+
+
+def parse_move(cmd):
+    """Returns the move tuple of a command."""
+    move = _COMMANDS.get(cmd)
+    if move is None:
+        raise NotationError(_diagnose(cmd), cmd)
+    return move
+
+
+def format_move(move):
+    """Returns the command of a move tuple."""
+    cmd = _MOVES.get(tuple(move))
+    if cmd is None:
+        raise NotationError('Invalid move %s' % (move,))
+    return cmd
+
+
+def move2action(move):
+    """Returns the (actionType, action) pair of a move for Hive.action."""
+    (piece, ref, direction) = move
+    if piece == NONE:
+        return ('non_play', 'pass')
+    if ref == NONE:
+        return ('play', PIECE_NAMES[piece])
+    return ('play', (PIECE_NAMES[piece], PIECE_NAMES[ref], direction))
+
+
+def action2move(actionType, action):
+    """Returns the move tuple of an action as given to Hive.action."""
+    if actionType == 'non_play' and action == 'pass':
+        return PASS
+    if actionType != 'play':
+        raise ValueError('Invalid action type: "%s"' % actionType)
+    if not isinstance(action, tuple):
+        return (PIECE_IDS[action], NONE, NONE)
+    (actPiece, refPiece, direction) = action
+    if refPiece is None:
+        return (PIECE_IDS[actPiece], NONE, NONE)
+    return (PIECE_IDS[actPiece], PIECE_IDS[refPiece], direction)
+
+
+def format_action(actionType, action):
+    """
+    Returns the notation of an action as given to Hive.action.
+    """
+    return format_move(action2move(actionType, action))
+
+
+def parse_command(cmd):
+    """
+    Returns the (actionType, action) pair of a command that can be given to
+    Hive.action.
+    """
+    return move2action(parse_move(cmd))
+
+
+def iter_moves(lines, source=None):
+    """
+    Parses lines lazily, yields (lineno, move) for each command and
+    (lineno, None) for the blank lines ending a game.
+    Raises NotationError with the line number of the first invalid command.
+    """
+    commands = _COMMANDS
+    lineno = 0
+    for line in lines:
+        lineno += 1
+        cmd = line.strip()
+        move = commands.get(cmd)
+        if move is None:
+            if cmd == '':
+                yield (lineno, None)
+                continue
+            if cmd[0] == '#':
+                continue
+            raise NotationError(_diagnose(cmd), cmd, lineno, source)
+        yield (lineno, move)
+
+
+def iter_games(lines, source=None):
+    """
+    Parses lines lazily and yields the list of move tuples of each game.
+    Games are separated by blank lines.
+    """
+    game = []
+    for (lineno, move) in iter_moves(lines, source):
+        if move is not None:
+            game.append(move)
+        elif len(game) > 0:
+            yield game
+            game = []
+    if len(game) > 0:
+        yield game
+
+
+def read_games(path):
+    """Yields the games of a log file or of concatenated logs."""
+    with open(path) as f:
+        for game in iter_games(f, path):
+            yield game
+
+
+def load_games(paths):
+    """Yields (path, index, moves) for each game of each file in paths."""
+    for path in paths:
+        for (i, game) in enumerate(read_games(path)):
+            yield (path, i, game)
@@ -0,0 +1,152 @@
+# parallel.py
+# Alpha-beta search split at the root across a pool of processes.
+#
+# The root moves are dealt to the workers in turn, each worker restores the
+# game from its snapshot and searches its share of the root moves with its
+# own transposition table (see AlphaBeta.search_moves).
+# With one worker the search runs in this process, with no pool and no
+# clock when only a depth is given, so its result is reproducible.
+
+import multiprocessing
+import os
+import time
+
+from hivegame.alphabeta import WIN, AlphaBeta
+from hivegame.hive import Hive
+
+
+def _search_job(job):
+    (snapshot, rules, moves, depth, seconds, evaluate, ttSize) = job
+    start = time.time()
+    hive = Hive(*rules)
+    hive.restore(snapshot)
+    searcher = AlphaBeta(evaluate, ttSize)
+    res = searcher.search_moves(hive, moves, depth, seconds)
+    return (os.getpid(), res, time.time() - start)
+
+
+def _combine(shares, order):
+    """
+    Returns (depth, move, score) of the best move among the iterations of
+    shares, the search_moves results of each share of the root moves, or
+    None when a share has no completed iteration. order gives the rank of
+    the moves in generation order, used to break ties.
+    """
+    # a forced win is the best move whatever the other shares found
+    wins = [r[-1] for r in shares if r and r[-1][2] > WIN - 1000]
+    if len(wins) > 0:
+        candidates = wins
+    elif all(shares):
+        # results of a deeper iteration only count when every share got
+        # there
+        common = min(len(r) for r in shares)
+        candidates = [r[common - 1] for r in shares]
+    else:
+        return None
+    (d, move, score, nodes) = max(
+        candidates, key=lambda c: (c[2], -order[c[1]])
+    )
+    return (d, move, score)
+
+
+class ParallelSearch(object):
+    """
+    Root splitting alpha-beta search over workers processes (None uses one
+    per cpu). The pool is kept between searches, call close() when done.
+    evaluate must be picklable (a module level function) to reach the
+    workers.
+    """
+
+    def __init__(self, workers=None, evaluate=None, ttSize=1 << 18):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.evaluate = evaluate
+        self.ttSize = ttSize
+        self.pool = None
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers)
+        # statistics of the last search
+        self.stats = {}
+
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def search(self, hive, depth=None, seconds=None):
+        """
+        Searches the game with iterative deepening up to depth plies or until
+        seconds passed and returns the best action of the deepest iteration
+        completed by every worker, or None when the game is finished.
+        Among moves with the same score the first generated one is chosen,
+        whatever the number of workers.
+        """
+        if depth is None and seconds is None:
+            raise ValueError("A search needs a depth or time limit")
+        if len(hive.legal_moves()) == 0:
+            return None
+
+        start = time.time()
+        moves = hive._generate_moves() or [(None, None)]
+        order = dict((m, i) for (i, m) in enumerate(moves))
+        workers = min(self.workers, len(moves))
+        if workers == 1 or self.pool is None:
+            searcher = AlphaBeta(self.evaluate, self.ttSize)
+            results = [(
+                os.getpid(),
+                searcher.search_moves(hive, moves, depth, seconds),
+                time.time() - start
+            )]
+        else:
+            snapshot = hive.snapshot()
+            rules = (hive.repetitions, hive.maxTurns)
+            jobs = [
+                (snapshot, rules, moves[i::workers], depth, seconds,
+                 self.evaluate, self.ttSize)
+                for i in range(workers)
+            ]
+            results = self.pool.map(_search_job, jobs)
+
+        best = _combine([res for (pid, res, elapsed) in results], order)
+        if best is not None:
+            (d, move, score) = best
+        else:
+            # not every share finished its first iteration
+            (d, move, score) = (0, moves[0], None)
+
+        elapsed = time.time() - start
+        nodes = sum(
+            sum(r[3] for r in res) for (pid, res, t) in results
+        )
+        self.stats = {
+            'depth': d,
+            'score': score,
+            'nodes': nodes,
+            'seconds': elapsed,
+            'nodes/s': nodes / elapsed if elapsed > 0 else 0,
+            # one entry per share of the root moves
+            'workers': [
+                {
+                    'pid': pid,
+                    'depth': res[-1][0] if res else 0,
+                    'nodes': sum(r[3] for r in res),
+                    'seconds': t,
+                }
+                for (pid, res, t) in results
+            ],
+        }
+
+        (piece, cell) = move
+        if piece is None:
+            return ('non_play', 'pass')
+        return hive._move2action(piece, cell)
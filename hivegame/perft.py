@@ -0,0 +1,116 @@
+# perft.py
+# Move generation counts used to verify and benchmark the rules engine
+
+import time
+
+from hivegame.hive import Hive
+
+
+# Fixed positions given as the list of actions played from the start.
+FIXTURES = {
+    # empty board, white to play
+    'opening': [],
+    # layout used by hivegame/test/hive_test.py, white to play
+    #    / \ / \ / \ / \ / \
+    #   |wB1|wS2|   |bB1|   |
+    #  / \ / \ / \ / \ / \ /
+    # |wG1|   |wS1|bS1|bG1|
+    #  \ / \ / \ / \ / \ / \
+    #   |   |wQ1|   |bQ1|   |
+    #  / \ / \ / \ / \ / \ /
+    # |   |   |   |bA1|   |
+    #  \ / \ / \ / \ / \ /
+    'midgame': [
+        ('play', 'wS1'),
+        ('play', ('bS1', 'wS1', Hive.E)),
+        ('play', ('wQ1', 'wS1', Hive.SW)),
+        ('play', ('bQ1', 'bS1', Hive.SE)),
+        ('play', ('wS2', 'wS1', Hive.NW)),
+        ('play', ('bG1', 'bS1', Hive.E)),
+        ('play', ('wB1', 'wS2', Hive.W)),
+        ('play', ('bA1', 'bQ1', Hive.SW)),
+        ('play', ('wG1', 'wB1', Hive.SW)),
+        ('play', ('bB1', 'bS1', Hive.NE)),
+    ],
+    # first 11 plies of exampleGame.log, black to play
+    'example': [
+        ('play', 'wA1'),
+        ('play', ('bA1', 'wA1', Hive.E)),
+        ('play', ('wQ1', 'wA1', Hive.NW)),
+        ('play', ('bQ1', 'bA1', Hive.NE)),
+        ('play', ('wA2', 'wA1', Hive.W)),
+        ('play', ('bA2', 'bA1', Hive.E)),
+        ('play', ('wB1', 'wA1', Hive.SW)),
+        ('play', ('bA3', 'bA1', Hive.SE)),
+        ('play', ('wB1', 'bA3', Hive.W)),
+        ('play', ('bQ1', 'wQ1', Hive.E)),
+        ('play', ('wB1', 'bA3', Hive.O)),
+    ],
+}
+
+# Number of leaf positions for each fixture indexed by depth.
+REFERENCE_COUNTS = {
+    'opening': [1, 4, 96, 1440, 21600, 516240],
+    'midgame': [1, 30, 1704, 62523],
+    'example': [1, 26, 1536, 42913],
+}
+
+
+def load_fixture(name):
+    """Returns a new game with the fixture actions played."""
+    hive = Hive()
+    hive.setup()
+    for (actionType, action) in FIXTURES[name]:
+        hive.action(actionType, action)
+    return hive
+
+
+def perft(hive, depth):
+    """
+    Counts the leaf positions reachable from the current game state by
+    playing depth actions. Finished games are not expanded.
+    """
+    if depth == 0:
+        return 1
+
+    moves = hive.legal_moves()
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for (actionType, action) in moves:
+        hive.action(actionType, action)
+        nodes += perft(hive, depth - 1)
+        hive.undo()
+    return nodes
+
+
+def divide(hive, depth):
+    """
+    Returns a dict with the perft count of depth - 1 below each legal action.
+    Useful to find which action disagrees with a reference count.
+    """
+    res = {}
+    for (actionType, action) in hive.legal_moves():
+        hive.action(actionType, action)
+        res[(actionType, action)] = perft(hive, depth - 1)
+        hive.undo()
+    return res
+
+
+def benchmark(name, depth):
+    """
+    Runs perft on a fixture for every depth up to depth.
+    Returns a list of (depth, nodes, seconds, expected) where expected is the
+    reference count or None if unknown.
+    """
+    res = []
+    reference = REFERENCE_COUNTS.get(name, [])
+    for d in range(1, depth + 1):
+        hive = load_fixture(name)
+        start = time.time()
+        nodes = perft(hive, d)
+        elapsed = time.time() - start
+        expected = reference[d] if d < len(reference) else None
+        res.append((d, nodes, elapsed, expected))
+    return res
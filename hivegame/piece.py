@@ -1,14 +1,75 @@
 # piece.py
 # Classes representing playing pieces
 
+COLORS = ('w', 'b')
+
+# Kinds of pieces and how many of each kind a player has
+PIECE_COUNTS = (('Q', 1), ('S', 2), ('B', 2), ('G', 3), ('A', 3))
+
+# Name of every piece in the game, the index of the name is the piece id
+PIECE_NAMES = tuple(
+    color + kind + str(number)
+    for color in COLORS
+    for (kind, count) in PIECE_COUNTS
+    for number in range(1, count + 1)
+)
+PIECE_IDS = dict((name, i) for (i, name) in enumerate(PIECE_NAMES))
+NUM_PIECES = len(PIECE_NAMES)
+
+
 class HivePiece(object):
-    """Representation of Playing Piece"""
+    """
+    Representation of Playing Piece
+    Pieces are immutable and interned, HivePiece('w', 'A', 1) always returns
+    the same object. Each piece has a small integer id (0 to 21) and its
+    name is computed only once.
+    """
 
-    def __init__(self, color, kind, number):
-        self.color = color      # can be 'b' or 'w'
-        self.kind = kind        # one of ['A', 'B', 'G', 'Q', 'S']
-        self.number = number    # can be [1, 2, 3]
+    __slots__ = ('color', 'kind', 'number', 'name', 'id')
+
+    _interned = {}
+
+    def __new__(cls, color, kind, number):
+        piece = cls._interned.get((color, kind, number))
+        if piece is None:
+            name = "%s%s%s" % (color, kind, number)
+            if name not in PIECE_IDS:
+                raise ValueError("Unknown piece: %s" % name)
+            piece = object.__new__(cls)
+            piece.color = color     # can be 'b' or 'w'
+            piece.kind = kind       # one of ['A', 'B', 'G', 'Q', 'S']
+            piece.number = number   # can be [1, 2, 3]
+            piece.name = name
+            piece.id = PIECE_IDS[name]
+            cls._interned[(color, kind, number)] = piece
+        return piece
 
 
     def __repr__(self):
-        return "%s%s%s" % (self.color, self.kind, self.number)
+        return self.name
+
+
+    def __reduce__(self):
+        # unpickled pieces are interned too
+        return (HivePiece, (self.color, self.kind, self.number))
+
+
+    def __copy__(self):
+        return self
+
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+# Every piece of the game indexed by id
+PIECES = tuple(
+    HivePiece(name[0], name[1], int(name[2])) for name in PIECE_NAMES
+)
+
+
+def get_piece(name):
+    """Returns the piece with the given name ('wA1') or id."""
+    if isinstance(name, int):
+        return PIECES[name]
+    return PIECES[PIECE_IDS[name]]
@@ -0,0 +1,275 @@
+# record.py
+# Compact binary format for corpora of games.
+#
+# Little-endian layout:
+#   file header   magic 'HVRC', uint16 version, uint16 0, uint64 number of
+#                 games, uint64 offset of the index table     (24 bytes)
+#   games         one after the other, each one is
+#                   uint32 number of moves, uint8 result, 3 bytes 0
+#                   one uint16 per move
+#   index table   uint64 offset of each game header
+#
+# A move is packed in 16 bits: piece id (bits 0-4), reference piece id
+# (bits 5-9) and direction (bits 10-12). Missing fields are all ones, see
+# hivegame/notation.py for the move tuples.
+#
+# RecordReader maps the file in memory, game N and move K are found with
+# the index table without reading the rest of the file.
+
+import mmap
+import struct
+import sys
+from array import array
+
+from hivegame.notation import NONE, format_move, iter_games
+
+MAGIC = b'HVRC'
+VERSION = 1
+
+# result of the games that were not labelled, see Hive for the others
+RESULT_UNKNOWN = 255
+
+_FILE_HEADER = struct.Struct('<4sHHQQ')
+_GAME_HEADER = struct.Struct('<IB3x')
+
+_PIECE_MASK = 0x1F
+_DIR_MASK = 0x7
+_NO_PIECE = _PIECE_MASK
+_NO_DIR = _DIR_MASK
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def pack_move(move):
+    """Returns the 16 bit code of a move tuple."""
+    (piece, ref, direction) = move
+    return (
+        (_NO_PIECE if piece == NONE else piece) |
+        ((_NO_PIECE if ref == NONE else ref) << 5) |
+        ((_NO_DIR if direction == NONE else direction) << 10)
+    )
+
+
+def _unpack_move(code):
+    piece = code & _PIECE_MASK
+    ref = (code >> 5) & _PIECE_MASK
+    direction = (code >> 10) & _DIR_MASK
+    return (
+        NONE if piece == _NO_PIECE else piece,
+        NONE if ref == _NO_PIECE else ref,
+        NONE if direction == _NO_DIR else direction,
+    )
+
+
+# move tuple of every code, most codes are unused
+_MOVES = tuple(_unpack_move(code) for code in range(1 << 13))
+
+
+def unpack_move(code):
+    """Returns the move tuple of a 16 bit code."""
+    return _MOVES[code]
+
+
+class RecordWriter(object):
+    """Writes games to a new record file. Use it as a context manager."""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.offsets = array('Q')
+        self.file.write(_FILE_HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+
+    def add_game(self, moves, result=RESULT_UNKNOWN):
+        """Appends a game given as a list of move tuples."""
+        self.offsets.append(self.file.tell())
+        codes = array('H', [pack_move(m) for m in moves])
+        if not _LITTLE_ENDIAN:
+            codes.byteswap()
+        self.file.write(_GAME_HEADER.pack(len(codes), result))
+        self.file.write(codes.tobytes())
+
+
+    def close(self):
+        if self.file is None:
+            return
+        indexOffset = self.file.tell()
+        offsets = self.offsets
+        if not _LITTLE_ENDIAN:
+            offsets = array('Q', offsets)
+            offsets.byteswap()
+        self.file.write(offsets.tobytes())
+        self.file.seek(0)
+        self.file.write(_FILE_HEADER.pack(
+            MAGIC, VERSION, 0, len(self.offsets), indexOffset
+        ))
+        self.file.close()
+        self.file = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordReader(object):
+    """
+    Random access to the games of a record file mapped in memory.
+    Use it as a context manager, the views returned by moves() are only
+    valid until the reader is closed and must be released before.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            self.file.close()
+            raise ValueError("Not a game record file: %s" % path)
+        self.view = memoryview(self.map)
+        if len(self.map) < _FILE_HEADER.size:
+            self.close()
+            raise ValueError("Not a game record file: %s" % path)
+        (magic, version, zero, count, indexOffset) = _FILE_HEADER.unpack_from(
+            self.map, 0
+        )
+        if (
+            magic != MAGIC or version != VERSION or
+            indexOffset < _FILE_HEADER.size or
+            indexOffset + 8 * count != len(self.map)
+        ):
+            self.close()
+            raise ValueError("Not a game record file: %s" % path)
+        self.count = count
+        self.indexOffset = indexOffset
+        index = self.view[indexOffset:indexOffset + 8 * count]
+        if _LITTLE_ENDIAN:
+            self.index = index.cast('Q')
+        else:
+            self.index = array('Q', index.tobytes())
+            self.index.byteswap()
+
+
+    def close(self):
+        try:
+            for name in ('index', 'view'):
+                view = getattr(self, name, None)
+                if isinstance(view, memoryview):
+                    view.release()
+            if getattr(self, 'map', None) is not None:
+                (m, self.map) = (self.map, None)
+                try:
+                    m.close()
+                except BufferError:
+                    raise BufferError(
+                        "The views returned by moves() must be released "
+                        "before closing the reader"
+                    )
+        finally:
+            self.file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def __len__(self):
+        return self.count
+
+
+    def __iter__(self):
+        for n in range(self.count):
+            yield self.game(n)
+
+
+    def _header(self, n):
+        if n < 0 or n >= self.count:
+            raise IndexError("game index out of range: %d" % n)
+        offset = self.index[n]
+        start = offset + _GAME_HEADER.size
+        if offset < _FILE_HEADER.size or start > self.indexOffset:
+            raise ValueError("Corrupt game record: %d" % n)
+        (length, result) = _GAME_HEADER.unpack_from(self.map, offset)
+        if start + 2 * length > self.indexOffset:
+            raise ValueError("Corrupt game record: %d" % n)
+        return (start, length, result)
+
+
+    def result(self, n):
+        """Result of game n, RESULT_UNKNOWN if it was not labelled."""
+        return self._header(n)[2]
+
+
+    def num_moves(self, n):
+        return self._header(n)[1]
+
+
+    def moves(self, n):
+        """
+        Returns the 16 bit move codes of game n, a view of the mapped file
+        on little-endian machines (no copy), see unpack_move.
+        """
+        (start, length, result) = self._header(n)
+        codes = self.view[start:start + 2 * length]
+        if _LITTLE_ENDIAN:
+            return codes.cast('H')
+        codes = array('H', codes.tobytes())
+        codes.byteswap()
+        return codes
+
+
+    def move(self, n, k):
+        """Returns the move tuple of move k of game n."""
+        (start, length, result) = self._header(n)
+        if k < 0 or k >= length:
+            raise IndexError("move index out of range: %d" % k)
+        (code,) = struct.unpack_from('<H', self.map, start + 2 * k)
+        return _MOVES[code]
+
+
+    def game(self, n):
+        """Returns the list of move tuples of game n."""
+        return [_MOVES[code] for code in self.moves(n)]
+
+
+def write_records(path, games):
+    """
+    Writes a record file from games, lists of move tuples or (moves, result)
+    pairs. Returns the number of games written.
+    """
+    count = 0
+    with RecordWriter(path) as writer:
+        for game in games:
+            if len(game) == 2 and isinstance(game[1], int):
+                writer.add_game(*game)
+            else:
+                writer.add_game(game)
+            count += 1
+    return count
+
+
+def notation2records(logPaths, path):
+    """Packs the games of notation logs into a record file."""
+    def games():
+        for logPath in logPaths:
+            with open(logPath) as f:
+                for game in iter_games(f, logPath):
+                    yield game
+    return write_records(path, games())
+
+
+def records2notation(path, out):
+    """Writes the games of a record file in notation to the file out."""
+    with RecordReader(path) as reader:
+        for n in range(len(reader)):
+            if n > 0:
+                out.write('\n')
+            for move in reader.game(n):
+                out.write(format_move(move) + '\n')
@@ -0,0 +1,199 @@
+# replay.py
+# Replays game logs through the rules engine to validate and label them.
+#
+# Every move is checked against the legal moves of the position before it
+# is played with Hive.action, so an illegal move is reported with its line
+# and the reason instead of breaking the replay.
+
+import fnmatch
+import multiprocessing
+import os
+import time
+
+from hivegame.hive import Hive, HiveException
+from hivegame.notation import NONE, NotationError, format_move, iter_moves
+from hivegame.notation import move2action
+from hivegame.piece import HivePiece, PIECES
+
+RESULT_NAMES = {
+    Hive.UNFINISHED: 'unfinished',
+    Hive.WHITE_WIN: 'white',
+    Hive.BLACK_WIN: 'black',
+    Hive.DRAW: 'draw',
+}
+
+
+def find_logs(paths, pattern='*.log'):
+    """
+    Returns the sorted list of files matching pattern in the directories of
+    paths (searched recursively), files in paths are always included.
+    """
+    res = []
+    for path in paths:
+        if not os.path.isdir(path):
+            res.append(path)
+            continue
+        for (root, dirs, files) in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if fnmatch.fnmatch(name, pattern):
+                    res.append(os.path.join(root, name))
+    return res
+
+
+def illegal_reason(hive, move):
+    """
+    Returns why the move tuple can't be played in the current game state or
+    None if it is legal.
+    """
+    if hive.check_victory() != Hive.UNFINISHED:
+        return 'the game is finished'
+    (pieceId, refId, direction) = move
+    moves = hive._generate_moves()
+    if pieceId == NONE:
+        if len(moves) > 0:
+            return 'pass with legal moves'
+        return None
+    piece = PIECES[pieceId]
+    if refId == NONE:
+        if hive.turn != 1:
+            return 'missing reference piece'
+        targetCell = (0, 0)
+    else:
+        if hive.turn == 1:
+            return 'the first piece has no reference'
+        refCell = hive.locate(PIECES[refId].name)
+        if refCell is None:
+            return 'reference piece %s is not in play' % PIECES[refId].name
+        targetCell = hive.board.get_dir_cell(refCell, direction)
+    if piece.color != hive.get_active_player():
+        return 'not the turn of %s' % piece.name
+    moves = set(moves)
+    if (piece, targetCell) not in moves:
+        # Hive.action places any piece of a kind, the legal moves only the
+        # lowest numbered one in hand as the notation requires
+        hand = hive.unplayedPieces[piece.color]
+        for number in range(1, piece.number):
+            first = HivePiece(piece.color, piece.kind, number)
+            if first.name in hand:
+                if piece.name in hand and (first, targetCell) in moves:
+                    return '%s placed out of number order' % piece.name
+                break
+        return 'illegal move for %s' % piece.name
+    return None
+
+
+def replay_moves(moves, linenos=None):
+    """
+    Replays a game given as a list of move tuples.
+    Returns a dict with the 'result' (Hive.check_victory status), the
+    number of 'plies' played, the 'seconds' it took and 'illegal', None or
+    (lineno, command, reason) of the first illegal move where lineno is
+    taken from linenos or is the index of the move.
+    """
+    start = time.time()
+    hive = Hive()
+    hive.setup()
+    illegal = None
+    plies = 0
+    for (i, move) in enumerate(moves):
+        reason = illegal_reason(hive, move)
+        if reason is None:
+            try:
+                hive.action(*move2action(move))
+            except HiveException:
+                reason = 'rejected by the engine'
+        if reason is not None:
+            lineno = linenos[i] if linenos is not None else i
+            illegal = (lineno, format_move(move), reason)
+            break
+        plies += 1
+    return {
+        'result': hive.check_victory(),
+        'plies': plies,
+        'seconds': time.time() - start,
+        'illegal': illegal,
+    }
+
+
+def replay_file(path):
+    """
+    Replays every game of a log file. Returns a list of reports, the dicts of
+    replay_moves with the 'path' and 'game' index added. A file that can't
+    be parsed gives a single report with game None and the 'error'.
+    """
+    res = []
+    try:
+        with open(path) as f:
+            games = []
+            game = ([], [])
+            for (lineno, move) in iter_moves(f, path):
+                if move is not None:
+                    game[0].append(move)
+                    game[1].append(lineno)
+                elif len(game[0]) > 0:
+                    games.append(game)
+                    game = ([], [])
+            if len(game[0]) > 0:
+                games.append(game)
+    except (NotationError, IOError) as e:
+        return [{'path': path, 'game': None, 'error': str(e)}]
+
+    for (i, (moves, linenos)) in enumerate(games):
+        report = replay_moves(moves, linenos)
+        report['path'] = path
+        report['game'] = i
+        res.append(report)
+    return res
+
+
+def run(paths, workers=None, pattern='*.log', callback=None):
+    """
+    Replays the logs found in paths with a pool of worker processes
+    (workers=None uses one per cpu, workers=1 replays in this process).
+    callback(report) is called for every game as soon as its file is done.
+    Returns a dict with the totals: files, games, plies, illegal games,
+    errors (unreadable files), results {status: count} of the legal games,
+    seconds and games/s.
+    """
+    files = find_logs(paths, pattern)
+    stats = {
+        'files': len(files),
+        'games': 0,
+        'plies': 0,
+        'illegal': 0,
+        'errors': 0,
+        'results': dict((r, 0) for r in RESULT_NAMES),
+    }
+
+    def collect(reports):
+        for report in reports:
+            if callback is not None:
+                callback(report)
+            if report['game'] is None:
+                stats['errors'] += 1
+                continue
+            stats['games'] += 1
+            stats['plies'] += report['plies']
+            if report['illegal'] is not None:
+                stats['illegal'] += 1
+            else:
+                stats['results'][report['result']] += 1
+
+    start = time.time()
+    if workers == 1:
+        for path in files:
+            collect(replay_file(path))
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            for reports in pool.imap(replay_file, files):
+                collect(reports)
+        finally:
+            pool.close()
+            pool.join()
+    stats['seconds'] = time.time() - start
+    stats['games/s'] = (
+        stats['games'] / stats['seconds'] if stats['seconds'] > 0 else 0
+    )
+    return stats
@@ -0,0 +1,494 @@
+# rollout.py
+# Random playouts used by Monte Carlo searches.
+#
+# Uniform rollouts run on Playout, a lean copy of the game made only of
+# integers: cells are single int keys built from the axial coordinates so
+# the neighbours of a cell are a few additions, pieces are their ids and the
+# board is a dict of stacks. Playouts keep no hash, symmetry hashes, undo
+# records or frontier sets and the game they are copied from is left
+# untouched. The bee slides of each cell are cached until a neighbour is
+# occupied or vacated, the articulation points of the one hive rule are only
+# searched when a piece has its neighbours in more than one run.
+# Weighted rollouts call weight(hive, piece, cell) so they play
+# Hive._generate_moves through Hive._play_move and undo them at the end,
+# see hive_rollout. So do the games following the repetition draw rule,
+# playouts follow the max turn rule but keep no position hashes.
+#
+# bin/bench_rollout.py -n 30, one core, CPython 3.11 (the machine is noisy):
+#   Playout        30-50 rollouts/s   6.2-9.5k plies/s
+#   hive_rollout   15-25 rollouts/s   2.7-4.4k plies/s
+# Most random games reach the 200 plies cap and every ply generates all the
+# moves, about 135us per ply mostly spent in the ant floods and the
+# articulation points. Tens of thousands of rollouts/s are out of reach of
+# pure Python.
+
+import random
+
+from hivegame.board import SparseHexBoard
+from hivegame.hive import _BEE_SLIDES, Hive
+from hivegame.piece import PIECE_IDS, PIECES
+
+# Rollouts still unfinished after this many plies are a draw
+DEFAULT_MAX_PLIES = 200
+
+# cell keys: (q + _OFFSET) + (r + _OFFSET) * _STRIDE
+_STRIDE = 1 << 20
+_OFFSET = 1 << 19
+# neighbour key deltas in the order of SparseHexBoard.get_neighbors
+# (W, NW, NE, E, SE, SW)
+_DIRS = (-1, -_STRIDE, 1 - _STRIDE, 1, _STRIDE, _STRIDE - 1)
+_ORIGIN = _OFFSET + _OFFSET * _STRIDE
+
+# key deltas of the bee slides for each mask of occupied neighbours
+_SLIDE_DELTAS = tuple(
+    tuple(_DIRS[i] for i in slides) for slides in _BEE_SLIDES
+)
+
+
+def _arcs(occupied):
+    """Number of runs of occupied neighbours around a cell."""
+    return sum(
+        1 for i in range(6)
+        if occupied & (1 << i) and not occupied & (1 << ((i - 1) % 6))
+    ) or (1 if occupied == 63 else 0)
+
+
+# runs of occupied neighbours for every mask, a piece with its neighbours in
+# a single run can leave without breaking the hive
+_ARCS = tuple(_arcs(occupied) for occupied in range(64))
+
+_COLOR = tuple(0 if p.color == 'w' else 1 for p in PIECES)
+_KIND = tuple(p.kind for p in PIECES)
+_QUEENS = (PIECE_IDS['wQ1'], PIECE_IDS['bQ1'])
+
+
+def cell2key(cell):
+    """Returns the playout key of an offset cell (x, y)."""
+    (q, r) = SparseHexBoard.offset2axial(cell)
+    return (q + _OFFSET) + (r + _OFFSET) * _STRIDE
+
+
+def key2cell(key):
+    """Returns the offset cell (x, y) of a playout key."""
+    (r, q) = divmod(key, _STRIDE)
+    return SparseHexBoard.axial2offset((q - _OFFSET, r - _OFFSET))
+
+
+class Playout(object):
+    """
+    Lean copy of a game playing unvalidated moves, (piece id, cell key)
+    pairs, under the rules of Hive._generate_moves and check_victory.
+    The max turn draw rule of the game is followed, the repetition rule is
+    not (playouts keep no position hashes).
+    """
+
+    def __init__(self, hive):
+        self.maxTurns = hive.maxTurns
+        self.turn = hive.turn
+        self.player = hive.activePlayer
+        # cell key: piece ids from the bottom up, occupied cells only
+        self.stacks = {}
+        # cell key of each piece id, None in hand
+        self.cells = [None] * len(PIECES)
+        for (cell, pic) in hive.piecesInCell.items():
+            if len(pic) == 0:
+                continue
+            key = cell2key(cell)
+            self.stacks[key] = [PIECE_IDS[name] for name in pic]
+            for name in pic:
+                self.cells[PIECE_IDS[name]] = key
+        self.hands = [
+            sorted(PIECE_IDS[name] for name in hive.unplayedPieces.get(c, {}))
+            for c in ('w', 'b')
+        ]
+        # cell key: bee slides from the cell, dropped when a neighbour is
+        # occupied or vacated
+        self._slideCache = {}
+
+
+    def result(self):
+        """Same status as Hive.check_victory without the repetition rule."""
+        stacks = self.stacks
+        surrounded = []
+        for queen in _QUEENS:
+            key = self.cells[queen]
+            surrounded.append(key is not None and all(
+                key + d in stacks for d in _DIRS
+            ))
+        (black, white) = surrounded
+        if white and black:
+            return Hive.DRAW
+        if white:
+            return Hive.WHITE_WIN
+        if black:
+            return Hive.BLACK_WIN
+        if self.maxTurns is not None and self.turn > self.maxTurns:
+            return Hive.DRAW
+        return Hive.UNFINISHED
+
+
+    def play(self, pieceId, key):
+        """Plays a move, a pass when pieceId is None, and ends the turn."""
+        if pieceId is not None:
+            stacks = self.stacks
+            cache = self._slideCache
+            start = self.cells[pieceId]
+            if start is None:
+                self.hands[_COLOR[pieceId]].remove(pieceId)
+            else:
+                stack = stacks[start]
+                stack.pop()
+                if len(stack) == 0:
+                    del stacks[start]
+                    for d in _DIRS:
+                        cache.pop(start + d, None)
+            stack = stacks.get(key)
+            if stack is None:
+                stacks[key] = [pieceId]
+                for d in _DIRS:
+                    cache.pop(key + d, None)
+            else:
+                stack.append(pieceId)
+            self.cells[pieceId] = key
+        self.turn += 1
+        self.player ^= 1
+
+
+    def run(self, rnd, maxPlies):
+        """
+        Plays random moves until the game ends or maxPlies plies were
+        played. Returns (result, plies), the result is Hive.DRAW at the cap.
+        """
+        choose = rnd.random
+        generate = self.moves
+        play = self.play
+        plies = 0
+        result = self.result()
+        while result == Hive.UNFINISHED:
+            if plies >= maxPlies:
+                return (Hive.DRAW, plies)
+            moves = generate()
+            if len(moves) == 0:
+                play(None, None)
+            else:
+                play(*moves[int(choose() * len(moves))])
+            plies += 1
+            result = self.result()
+        return (result, plies)
+
+
+    def moves(self):
+        """
+        Returns the (piece id, cell key) moves of the active player, the
+        same moves as Hive._generate_moves.
+        """
+        player = self.player
+        turn = self.turn
+        cells = self.cells
+        stacks = self.stacks
+        res = []
+
+        # the tournament and queen rules of Hive._validate_turn
+        mustPlace = None
+        if turn == 7 and cells[_QUEENS[0]] is None:
+            mustPlace = _QUEENS[0]
+        elif turn == 8 and cells[_QUEENS[1]] is None:
+            mustPlace = _QUEENS[1]
+
+        # placements, the lowest id of each kind in hand
+        placeable = []
+        kinds = set()
+        for pieceId in self.hands[player]:
+            kind = _KIND[pieceId]
+            if kind in kinds:
+                continue
+            kinds.add(kind)
+            if kind == 'Q' and turn <= 2:
+                continue
+            if mustPlace is not None and pieceId != mustPlace:
+                continue
+            placeable.append(pieceId)
+        if len(placeable) > 0:
+            targets = self._placement_keys()
+            for pieceId in placeable:
+                res.extend([(pieceId, k) for k in targets])
+
+        # movements
+        if cells[_QUEENS[player]] is None or mustPlace is not None:
+            return res
+        cut = None
+        for pieceId in range(len(cells)):
+            key = cells[pieceId]
+            if key is None or _COLOR[pieceId] != player:
+                continue
+            stack = stacks[key]
+            if stack[-1] != pieceId:
+                continue
+            if len(stack) == 1 and _ARCS[self._occupied(key)] > 1:
+                # the neighbours may only be connected through the piece
+                if cut is None:
+                    cut = self._cut_keys()
+                if key in cut:
+                    continue
+            kind = _KIND[pieceId]
+            if kind == 'Q':
+                targets = self._slides(key)
+            elif kind == 'G':
+                targets = self._jumps(key)
+            else:
+                # the piece is not part of the hive while it moves
+                stack.pop()
+                if len(stack) == 0:
+                    del stacks[key]
+                if kind == 'A':
+                    targets = self._ant_flood(key)
+                elif kind == 'S':
+                    targets = self._spider_walks(key)
+                else:
+                    targets = self._beetle_steps(key)
+                if len(stack) == 0:
+                    stacks[key] = stack
+                stack.append(pieceId)
+            res.extend([(pieceId, k) for k in targets])
+        return res
+
+
+    def _placement_keys(self):
+        if self.turn == 1:
+            return [_ORIGIN]
+        stacks = self.stacks
+        free = set()
+        player = self.player
+        if self.turn == 2:
+            for key in stacks:
+                for d in _DIRS:
+                    if key + d not in stacks:
+                        free.add(key + d)
+            return list(free)
+        for (key, stack) in stacks.items():
+            if _COLOR[stack[-1]] == player:
+                for d in _DIRS:
+                    if key + d not in stacks:
+                        free.add(key + d)
+        res = []
+        for key in free:
+            for d in _DIRS:
+                stack = stacks.get(key + d)
+                if stack is not None and _COLOR[stack[-1]] != player:
+                    break
+            else:
+                res.append(key)
+        return res
+
+
+    def _slides(self, key):
+        """Cells reached by one bee move, see Hive._bee_moves."""
+        return [key + d for d in _SLIDE_DELTAS[self._occupied(key)]]
+
+
+    def _cached_slides(self, start):
+        """
+        Returns a function giving the bee slides of a cell key for the walks
+        of the piece that left start: the slides of the cells around start
+        are computed, the others are kept in _slideCache while their
+        neighbours don't change. The slides of start itself don't depend on
+        the piece.
+        """
+        cache = self._slideCache
+        slides = self._slides
+        near = set([start + d for d in _DIRS])
+
+        def walk(key):
+            if key in near:
+                return slides(key)
+            res = cache.get(key)
+            if res is None:
+                res = cache[key] = slides(key)
+            return res
+
+        return walk
+
+
+    def _jumps(self, key):
+        stacks = self.stacks
+        res = []
+        for d in _DIRS:
+            k = key + d
+            if k not in stacks:
+                continue
+            while k in stacks:
+                k += d
+            res.append(k)
+        return res
+
+
+    def _ant_flood(self, key):
+        # _cached_slides inlined
+        cache = self._slideCache
+        slides = self._slides
+        near = set([key + d for d in _DIRS])
+        visited = set((key,))
+        toExplore = [key]
+        while len(toExplore) > 0:
+            k = toExplore.pop()
+            if k in near:
+                targets = slides(k)
+            else:
+                targets = cache.get(k)
+                if targets is None:
+                    targets = cache[k] = slides(k)
+            for n in targets:
+                if n not in visited:
+                    visited.add(n)
+                    toExplore.append(n)
+        visited.remove(key)
+        return visited
+
+
+    def _spider_walks(self, key):
+        slides = self._cached_slides(key)
+        paths = [(key,)]
+        for i in range(3):
+            found = []
+            for path in paths:
+                for k in slides(path[-1]):
+                    if k not in path:
+                        found.append(path + (k,))
+            paths = found
+        return set(path[-1] for path in paths)
+
+
+    def _beetle_steps(self, key):
+        stacks = self.stacks
+        if key in stacks:
+            # on top of the hive
+            return [key + d for d in _DIRS]
+        return self._slides(key) + [
+            key + d for d in _DIRS if key + d in stacks
+        ]
+
+
+    def _occupied(self, key):
+        """Bit mask of the occupied neighbours of the cell."""
+        stacks = self.stacks
+        return (
+            (key - 1 in stacks) |
+            (key - _STRIDE in stacks) << 1 |
+            (key + 1 - _STRIDE in stacks) << 2 |
+            (key + 1 in stacks) << 3 |
+            (key + _STRIDE in stacks) << 4 |
+            (key + _STRIDE - 1 in stacks) << 5
+        )
+
+
+    def _cut_keys(self):
+        """
+        Returns the set of occupied cells that are articulation points of
+        the graph of occupied cells, see Hive._pinned_pieces.
+        """
+        stacks = self.stacks
+        cut = set()
+        root = next(iter(stacks))
+        discovery = {root: 0}
+        low = {root: 0}
+        rootChildren = 0
+        stack = [(root, None, iter([root + d for d in _DIRS]))]
+        while len(stack) > 0:
+            (key, parent, neighbours) = stack[-1]
+            for n in neighbours:
+                if n not in stacks:
+                    continue
+                if n not in discovery:
+                    discovery[n] = low[n] = len(discovery)
+                    stack.append((n, key, iter([n + d for d in _DIRS])))
+                    break
+                elif n != parent and discovery[n] < low[key]:
+                    low[key] = discovery[n]
+            else:
+                stack.pop()
+                if parent is None:
+                    continue
+                if low[key] < low[parent]:
+                    low[parent] = low[key]
+                if parent == root:
+                    rootChildren += 1
+                elif low[key] >= discovery[parent]:
+                    cut.add(parent)
+        if rootChildren > 1:
+            cut.add(root)
+        return cut
+
+
+def rollout(hive, rnd=None, maxPlies=DEFAULT_MAX_PLIES, weight=None):
+    """
+    Plays random moves from the current game state until the game ends or
+    maxPlies plies were played and returns (result, plies).
+
+    result is the Hive.check_victory status at the end of the game, or
+    Hive.DRAW when the rollout reaches maxPlies. Moves are chosen uniformly
+    on a Playout unless weight is given or the game follows the repetition
+    draw rule, then the rollout is played by hive_rollout.
+    The game state is the same as before the call when it returns.
+    """
+    if weight is not None or hive.repetitions is not None:
+        return hive_rollout(hive, rnd, maxPlies, weight)
+    if rnd is None:
+        rnd = random
+    result = hive.check_victory()
+    if result != Hive.UNFINISHED:
+        return (result, 0)
+    return Playout(hive).run(rnd, maxPlies)
+
+
+def hive_rollout(hive, rnd=None, maxPlies=DEFAULT_MAX_PLIES, weight=None):
+    """
+    Same as rollout but played on the game itself with Hive._play_move and
+    undone at the end, so the optional draw rules of the game are followed.
+    weight(hive, piece, targetCell) returns the relative (non negative)
+    weight of each move, when it is None or every move weights 0 the move
+    is chosen uniformly.
+    """
+    if rnd is None:
+        rnd = random
+    choose = rnd.random
+    plies = 0
+    result = hive.check_victory()
+    try:
+        while result == Hive.UNFINISHED:
+            if plies >= maxPlies:
+                result = Hive.DRAW
+                break
+            moves = hive._generate_moves()
+            if len(moves) == 0:
+                hive._play_move(None, None)
+                plies += 1
+                result = hive.check_victory()
+                continue
+            weights = None
+            if weight is not None:
+                weights = [weight(hive, p, c) for (p, c) in moves]
+            if weights is not None and sum(weights) > 0:
+                hive._play_move(*rnd.choices(moves, weights)[0])
+            else:
+                hive._play_move(*moves[int(choose() * len(moves))])
+            plies += 1
+            result = hive.check_victory()
+    finally:
+        for i in range(plies):
+            hive.undo()
+    return (result, plies)
+
+
+def rollouts(hive, count, rnd=None, maxPlies=DEFAULT_MAX_PLIES, weight=None):
+    """
+    Runs count rollouts from the current game state.
+    Returns a dict with the number of rollouts ending in each end game
+    status and the total number of 'plies' played.
+    """
+    res = dict((r, 0) for r in (Hive.WHITE_WIN, Hive.BLACK_WIN, Hive.DRAW))
+    res['plies'] = 0
+    for i in range(count):
+        (result, plies) = rollout(hive, rnd, maxPlies, weight)
+        res[result] += 1
+        res['plies'] += plies
+    return res
@@ -0,0 +1,156 @@
+# selfplay.py
+# Plays games between agents, optionally across a pool of processes.
+#
+# An agent is a callable agent(hive, rnd) that returns one of
+# hive.legal_moves(), rnd is a random.Random owned by the game. Agents are
+# given by name (see AGENTS) or as 'module:callable' so they can be loaded
+# by the worker processes.
+
+import importlib
+import multiprocessing
+import os
+import random
+import time
+
+from hivegame.alphabeta import alphabeta_agent
+from hivegame.hive import Hive
+from hivegame.mcts import mcts_agent
+from hivegame.notation import format_action
+
+# Games still unfinished after this many plies are drawn
+DEFAULT_MAX_PLIES = 400
+
+# Self-play games are drawn on the third occurrence of a position
+REPETITIONS = 3
+
+
+def random_agent(hive, rnd):
+    """Plays a random legal action."""
+    return rnd.choice(hive.legal_moves())
+
+
+AGENTS = {
+    'random': random_agent,
+    'mcts': mcts_agent,
+    'alphabeta': alphabeta_agent,
+}
+
+
+def load_agent(spec):
+    """
+    Returns the agent callable given its name in AGENTS, a 'module:callable'
+    string or the callable itself.
+    """
+    if callable(spec):
+        return spec
+    if spec in AGENTS:
+        return AGENTS[spec]
+    if ':' not in spec:
+        raise ValueError('Unknown agent: "%s"' % spec)
+    (moduleName, attr) = spec.split(':', 1)
+    agent = getattr(importlib.import_module(moduleName), attr)
+    if not callable(agent):
+        raise ValueError('Agent is not callable: "%s"' % spec)
+    return agent
+
+
+def play_game(white, black, seed=None, maxPlies=DEFAULT_MAX_PLIES):
+    """
+    Plays one game between two agents.
+    Returns (commands, result) where commands is the list of actions in the
+    log notation and result is one of the Hive end game status. Games that
+    reach maxPlies or repeat a position three times are a Hive.DRAW.
+    """
+    rnd = random.Random(seed)
+    agents = (load_agent(white), load_agent(black))
+    hive = Hive(repetitions=REPETITIONS, maxTurns=maxPlies)
+    hive.setup()
+    commands = []
+    result = hive.check_victory()
+    while result == Hive.UNFINISHED:
+        (actionType, action) = agents[hive.activePlayer](hive, rnd)
+        hive.action(actionType, action)
+        commands.append(format_action(actionType, action))
+        result = hive.check_victory()
+    return (commands, result)
+
+
+def write_game(path, commands):
+    """Writes a game log with one command per line."""
+    with open(path, 'w') as f:
+        for cmd in commands:
+            f.write(cmd + '\n')
+
+
+def _play_job(job):
+    (index, white, black, seed, maxPlies) = job
+    start = time.time()
+    (commands, result) = play_game(white, black, seed, maxPlies)
+    return (index, commands, result, time.time() - start, os.getpid())
+
+
+def run(games, white='random', black='random', outDir=None, workers=None,
+        seed=0, maxPlies=DEFAULT_MAX_PLIES, callback=None):
+    """
+    Plays games between white and black using a pool of worker processes
+    (workers=None uses one per cpu, workers=1 plays in this process).
+    Game i is played with the seed seed + i so runs can be reproduced.
+
+    Finished games are written as outDir/game-<i>.log as soon as they arrive
+    when outDir is given, and passed to callback(index, commands, result).
+
+    Returns a dict with the totals:
+      games, plies, seconds, games/s, results {status: count} and
+      workers {pid: {'games', 'plies', 'seconds'}} where seconds is the
+      time the worker spent playing.
+    """
+    if outDir is not None and not os.path.isdir(outDir):
+        os.makedirs(outDir)
+    jobs = [
+        (i, white, black, seed + i, maxPlies) for i in range(games)
+    ]
+
+    stats = {
+        'games': 0,
+        'plies': 0,
+        'results': dict((r, 0) for r in (
+            Hive.WHITE_WIN, Hive.BLACK_WIN, Hive.DRAW
+        )),
+        'workers': {},
+    }
+
+    def collect(finished):
+        (index, commands, result, elapsed, pid) = finished
+        if outDir is not None:
+            write_game(
+                os.path.join(outDir, 'game-%06d.log' % index), commands
+            )
+        if callback is not None:
+            callback(index, commands, result)
+        stats['games'] += 1
+        stats['plies'] += len(commands)
+        stats['results'][result] += 1
+        worker = stats['workers'].setdefault(
+            pid, {'games': 0, 'plies': 0, 'seconds': 0.0}
+        )
+        worker['games'] += 1
+        worker['plies'] += len(commands)
+        worker['seconds'] += elapsed
+
+    start = time.time()
+    if workers == 1:
+        for job in jobs:
+            collect(_play_job(job))
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            for finished in pool.imap_unordered(_play_job, jobs):
+                collect(finished)
+        finally:
+            pool.close()
+            pool.join()
+    stats['seconds'] = time.time() - start
+    stats['games/s'] = (
+        stats['games'] / stats['seconds'] if stats['seconds'] > 0 else 0
+    )
+    return stats
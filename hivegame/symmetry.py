@@ -0,0 +1,137 @@
+# symmetry.py
+# Position keys that are the same for positions equivalent under
+# translation, the 6 rotations and reflection of the board.
+#
+# The 12 symmetries are applied in axial coordinates (see SparseHexBoard),
+# symmetry s reflects the board when s >= 6 and then rotates it s % 6 times
+# by 60 degrees around the origin.
+#
+# canonical_key computes the exact canonical form of a position. The fast
+# path is Hive.get_canonical_hash: for each symmetry the game keeps a
+# polynomial hash of the pieces
+#     sum(weight(piece, layer) * X ** q * Y ** r)  modulo PRIME
+# where (q, r) is the transformed cell of the piece. Translating a position
+# multiplies the hash by X ** dq * Y ** dr, dividing it by the term of an
+# anchor piece (the lowest id piece in the board, ids don't change under
+# the symmetries) makes it translation invariant.
+
+from hivegame.board import SparseHexBoard
+from hivegame.zobrist import mix64
+
+NUM_SYMMETRIES = 12
+
+PRIME = (1 << 61) - 1
+_X = mix64(0x5359) % PRIME
+_Y = mix64(0x4D4D) % PRIME
+
+
+def transform_axial(s, q, r):
+    """Applies symmetry s to the axial cell (q, r)."""
+    # cube coordinates
+    (x, y, z) = (q, -q - r, r)
+    if s >= 6:
+        (y, z) = (z, y)
+    for i in range(s % 6):
+        (x, y, z) = (-z, -x, -y)
+    return (x, z)
+
+
+def transform_cell(s, cell):
+    """Applies symmetry s to the offset cell (x, y)."""
+    (q, r) = SparseHexBoard.offset2axial(cell)
+    return SparseHexBoard.axial2offset(transform_axial(s, q, r))
+
+
+# Maximum number of cells kept in _cellTerms
+CELL_TERMS_CACHE_SIZE = 16384
+
+_cellTerms = {}
+
+
+def cell_terms(cell):
+    """
+    Returns the X ** q * Y ** r terms of the offset cell for each symmetry
+    and their modular inverses.
+    """
+    res = _cellTerms.get(cell)
+    if res is None:
+        (q, r) = SparseHexBoard.offset2axial(cell)
+        terms = []
+        for s in range(NUM_SYMMETRIES):
+            (tq, tr) = transform_axial(s, q, r)
+            terms.append(pow(_X, tq % (PRIME - 1), PRIME) *
+                         pow(_Y, tr % (PRIME - 1), PRIME) % PRIME)
+        inverses = tuple(pow(t, PRIME - 2, PRIME) for t in terms)
+        res = (tuple(terms), inverses)
+        if len(_cellTerms) >= CELL_TERMS_CACHE_SIZE:
+            _cellTerms.clear()
+        _cellTerms[cell] = res
+    return res
+
+
+_weights = {}
+
+
+def piece_weight(pieceId, layer):
+    """Weight of a piece at a stack layer in the symmetry hashes."""
+    k = (pieceId, layer)
+    res = _weights.get(k)
+    if res is None:
+        res = mix64((7 << 56) | (pieceId << 8) | layer) % PRIME
+        _weights[k] = res
+    return res
+
+
+def canonical_key(hive):
+    """
+    Returns (key, transform) where key is the same for every position that
+    is equivalent to the game position under translation, rotation and
+    reflection, and transform = (s, (dq, dr)) maps the game cells to the
+    canonical cells, see apply_transform.
+    The key is a tuple with the active player and the sorted
+    (piece id, q, r, layer) of every piece in the board.
+    """
+    pieces = []
+    for (cell, pic) in hive.piecesInCell.items():
+        for (layer, name) in enumerate(pic):
+            pieces.append((hive.playedPieces[name]['piece'].id, cell, layer))
+    best = None
+    for s in range(NUM_SYMMETRIES):
+        cells = [
+            transform_axial(s, *SparseHexBoard.offset2axial(cell))
+            for (pieceId, cell, layer) in pieces
+        ]
+        if len(cells) > 0:
+            dq = -min(q for (q, r) in cells)
+            dr = -min(r for (q, r) in cells)
+        else:
+            (dq, dr) = (0, 0)
+        key = (hive.activePlayer,) + tuple(sorted(
+            (pieceId, q + dq, r + dr, layer)
+            for ((pieceId, cell, layer), (q, r)) in zip(pieces, cells)
+        ))
+        if best is None or key < best[0]:
+            best = (key, (s, (dq, dr)))
+    return best
+
+
+def apply_transform(transform, cell):
+    """Maps an offset cell of the game to the canonical offset cell."""
+    (s, (dq, dr)) = transform
+    (q, r) = transform_axial(s, *SparseHexBoard.offset2axial(cell))
+    return SparseHexBoard.axial2offset((q + dq, r + dr))
+
+
+def symmetric_hashes(hive):
+    """
+    Computes the 12 symmetry hashes of the pieces in the board from
+    scratch. Hive keeps them up to date in Hive._symHashes.
+    """
+    res = [0] * NUM_SYMMETRIES
+    for (cell, pic) in hive.piecesInCell.items():
+        terms = cell_terms(cell)[0]
+        for (layer, name) in enumerate(pic):
+            w = piece_weight(hive.playedPieces[name]['piece'].id, layer)
+            for s in range(NUM_SYMMETRIES):
+                res[s] = (res[s] + w * terms[s]) % PRIME
+    return res
@@ -0,0 +1,120 @@
+from hivegame.alphabeta import (
+    EXACT, LOWER, WIN, AlphaBeta, TranspositionTable, default_evaluation
+)
+from hivegame.hive import Hive
+from hivegame.notation import parse_command
+from hivegame.perft import load_fixture
+from hivegame.selfplay import play_game
+from unittest import TestCase
+
+
+def _minimax(hive, depth, ply=0):
+    """Plain negamax without pruning nor transposition table."""
+    result = hive.check_victory()
+    if result != Hive.UNFINISHED:
+        if result == Hive.DRAW:
+            return 0
+        won = (result == Hive.WHITE_WIN) == (hive.activePlayer == 0)
+        return WIN - ply if won else -WIN + ply
+    if depth == 0:
+        return default_evaluation(hive)
+    moves = hive._generate_moves() or [(None, None)]
+    best = None
+    for move in moves:
+        hive._play_move(*move)
+        score = -_minimax(hive, depth - 1, ply + 1)
+        hive.undo()
+        if best is None or score > best:
+            best = score
+    return best
+
+
+class TestAlphaBeta(TestCase):
+    """Verify the alpha-beta searcher"""
+
+    def test_minimax(self):
+        for (name, depth) in (('opening', 3), ('midgame', 2), ('example', 2)):
+            hive = load_fixture(name)
+            state = list(hive.state)
+            searcher = AlphaBeta()
+            action = searcher.search(hive, depth=depth)
+            self.assertIn(action, hive.legal_moves())
+            self.assertEqual(state, list(hive.state))
+            self.assertEqual(depth, len(searcher.iterations))
+            self.assertEqual(
+                _minimax(hive, depth), searcher.iterations[-1]['score']
+            )
+
+
+    def test_statistics(self):
+        searcher = AlphaBeta()
+        searcher.search(load_fixture('midgame'), depth=3)
+        for (d, it) in enumerate(searcher.iterations):
+            self.assertEqual(d + 1, it['depth'])
+            self.assertTrue(it['nodes'] > 0)
+            self.assertTrue(it['branching'] > 1)
+            self.assertTrue(it['firstCutoffs'] <= it['cutoffs'])
+        self.assertTrue(searcher.iterations[-1]['ebf'] > 1)
+
+
+    def test_time_limit(self):
+        hive = load_fixture('midgame')
+        searcher = AlphaBeta()
+        self.assertRaises(ValueError, searcher.search, hive)
+        action = searcher.search(hive, seconds=0.01)
+        self.assertIn(action, hive.legal_moves())
+
+
+    def test_forced_win(self):
+        # the ply before white wins a random game
+        hive = Hive()
+        hive.setup()
+        commands = play_game('random', 'random', 9)[0]
+        for cmd in commands[:-1]:
+            hive.action(*parse_command(cmd))
+        searcher = AlphaBeta()
+        action = searcher.search(hive, depth=3)
+        self.assertEqual(WIN - 1, searcher.iterations[-1]['score'])
+        self.assertEqual(1, len(searcher.iterations))
+        hive.action(*action)
+        self.assertEqual(Hive.WHITE_WIN, hive.check_victory())
+
+
+    def test_pluggable_evaluation(self):
+        calls = []
+        def evaluate(hive):
+            calls.append(hive.turn)
+            return 0
+        searcher = AlphaBeta(evaluate)
+        searcher.search(load_fixture('midgame'), depth=1)
+        self.assertEqual(30, len(calls))
+        self.assertEqual(0, searcher.iterations[-1]['score'])
+
+
+class TestTranspositionTable(TestCase):
+    """Verify the transposition table replacement policy"""
+
+    def test_replacement(self):
+        tt = TranspositionTable(4)
+        tt.store(1, 3, 10, EXACT, 'a')
+        self.assertEqual((3, 10, EXACT, 'a'), tt.probe(1))
+        self.assertIsNone(tt.probe(5))
+        # a shallower entry doesn't replace a deeper one of the same search
+        tt.store(5, 2, 20, LOWER, 'b')
+        self.assertIsNone(tt.probe(5))
+        # but it replaces the same position
+        tt.store(1, 1, 30, LOWER, 'c')
+        self.assertEqual((1, 30, LOWER, 'c'), tt.probe(1))
+        tt.store(5, 2, 20, LOWER, 'b')
+        self.assertEqual((2, 20, LOWER, 'b'), tt.probe(5))
+        # entries of older searches are replaced
+        tt.new_search()
+        tt.store(9, 0, 40, EXACT, 'd')
+        self.assertEqual((0, 40, EXACT, 'd'), tt.probe(9))
+        self.assertEqual(1, len(tt))
+        self.assertEqual(2, tt.replacements)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -1,4 +1,5 @@
-from hivegame.board import Board, HexBoard
+from hivegame import board
+from hivegame.board import Board, HexBoard, SparseHexBoard
 from unittest import TestCase
 
 class TestHexBoard(TestCase):
@@ -25,6 +26,42 @@ class TestHexBoard(TestCase):
         self.assertEqual(expected.sort(), actual.sort())
 
 
+    def test_get_line_dir(self):
+        for start in [(0, 0), (1, 1), (-2, -1), (3, -2)]:
+            for direction in range(1, 7):
+                cell = start
+                for i in range(4):
+                    cell = self.board.get_dir_cell(cell, direction)
+                    self.assertEqual(
+                        direction, self.board.get_line_dir(start, cell)
+                    )
+
+        self.assertEqual(HexBoard.HX_O, self.board.get_line_dir((0, 0), (0, 0)))
+        self.assertEqual(None, self.board.get_line_dir((0, 0), (2, 2)))
+        self.assertEqual(None, self.board.get_line_dir((-2, -2), (0, 1)))
+
+
+    def test_get_neighbors(self):
+        for cell in [(0, 0), (1, 1), (-1, -1), (2, -3)]:
+            neighbors = self.board.get_neighbors(cell)
+            self.assertTrue(isinstance(neighbors, tuple))
+            # sorted by direction starting from W
+            expected = tuple(
+                self.board.get_dir_cell(cell, d) for d in range(1, 7)
+            )
+            self.assertEqual(expected, neighbors)
+            self.assertTrue(neighbors is self.board.get_neighbors(cell))
+
+        cells = [(0, 0), (3, 1), (0, 0)]
+        self.assertEqual(
+            [self.board.get_neighbors(c) for c in cells],
+            self.board.get_neighbors_many(cells)
+        )
+
+        expected = ((-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1))
+        self.assertEqual(expected, HexBoard.get_axial_neighbors((0, 0)))
+
+
 class TestBoard(TestCase):
     """Verify Board class logic"""
 
@@ -44,6 +81,61 @@ class TestBoard(TestCase):
         self.assertEqual((-2, -3, 3, 2), self.board.get_boundaries())
 
 
+class TestSparseHexBoard(TestCase):
+    """Verify the SparseHexBoard logic"""
+
+    def setUp(self):
+        self.board = SparseHexBoard()
+
+
+    def test_neighbor_cache(self):
+        # the cache of neighbours is cleared when it is full
+        for x in range(board.NEIGHBOR_CACHE_SIZE + 10):
+            self.board.get_neighbors((x, 3))
+        self.assertTrue(len(board._hexNeighbors) <= board.NEIGHBOR_CACHE_SIZE)
+        self.assertEqual(
+            ((-1, 3), (0, 2), (1, 2), (1, 3), (1, 4), (0, 4)),
+            self.board.get_neighbors((0, 3))
+        )
+
+
+    def test_axial(self):
+        for x in range(-3, 4):
+            for y in range(-3, 4):
+                axial = self.board.offset2axial((x, y))
+                self.assertEqual((x, y), self.board.axial2offset(axial))
+
+        # in axial coordinates the neighbours are the same for every cell
+        axialDirs = [(-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1)]
+        for cell in [(0, 0), (1, 1), (-1, -1), (2, -3)]:
+            (q, r) = self.board.offset2axial(cell)
+            expected = [
+                self.board.axial2offset((q + dq, r + dr))
+                for (dq, dr) in axialDirs
+            ]
+            self.assertEqual(expected, self.board.get_surrounding(cell))
+
+
+    def test_get_boundaries(self):
+        self.assertEqual((0, 0, 0, 0), self.board.get_boundaries())
+        self.board.occupy((-2, 2))
+        self.board.occupy((3, -3))
+        self.assertEqual((-2, -3, 3, 2), self.board.get_boundaries())
+        self.board.occupy((1, -1))
+        self.assertEqual((-2, -3, 3, 2), self.board.get_boundaries())
+
+        # stacked pieces
+        self.board.occupy((3, -3))
+        self.board.vacate((3, -3))
+        self.assertEqual((-2, -3, 3, 2), self.board.get_boundaries())
+        self.assertTrue(self.board.is_occupied((3, -3)))
+
+        # the board shrinks when the cells are emptied
+        self.board.vacate((3, -3))
+        self.assertEqual((-2, -1, 1, 2), self.board.get_boundaries())
+        self.assertFalse(self.board.is_occupied((3, -3)))
+
+
 if __name__ == '__main__':
     import unittest
     unittest.main()
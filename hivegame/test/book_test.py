@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+from hivegame.alphabeta import AlphaBeta
+from hivegame.book import BookBuilder, OpeningBook, build_book
+from hivegame.hive import Hive
+from hivegame.notation import parse_command, parse_move
+from hivegame.selfplay import play_game
+from unittest import TestCase
+
+
+class TestBook(TestCase):
+    """Verify the opening book"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'book.bin')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def _write_log(self, name, games):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write('\n\n'.join('\n'.join(g) for g in games) + '\n')
+        return path
+
+
+    def _position(self, commands):
+        hive = Hive()
+        hive.setup()
+        for cmd in commands:
+            hive.action(*parse_command(cmd))
+        return hive
+
+
+    def test_build_and_lookup(self):
+        games = [play_game('random', 'random', seed) for seed in (9, 18, 3)]
+        log = self._write_log('games.log', [c for (c, r) in games])
+        builder = build_book([log], self.path, plies=4)
+        self.assertEqual(3, builder.games)
+        self.assertEqual(0, builder.skipped)
+
+        counts = [0, 0, 0]
+        for (commands, result) in games:
+            counts[{Hive.WHITE_WIN: 0, Hive.BLACK_WIN: 2}.get(result, 1)] += 1
+        with OpeningBook(self.path) as book:
+            self.assertEqual(len(builder), len(book))
+            self.assertEqual(4, book.plies)
+            # every game starts from the empty board
+            self.assertEqual(tuple(counts), book.lookup(self._position([])))
+            for (commands, result) in games:
+                stats = book.lookup(self._position(commands[:4]))
+                self.assertTrue(sum(stats) >= 1)
+                self.assertEqual(None, book.lookup(self._position(commands[:5])))
+
+
+    def test_symmetric_positions(self):
+        builder = BookBuilder(plies=2)
+        builder.add_game([parse_move(c) for c in ('wA1', 'bG1*|wA1')])
+        self.assertEqual(3, len(builder))
+        builder.add_game([parse_move(c) for c in ('wA1', 'bG1|*wA1')])
+        builder.add_game([parse_move(c) for c in ('wA1', 'bG1/*wA1')])
+        # the black grasshopper on any side of the ant is the same position
+        self.assertEqual(3, len(builder))
+        self.assertEqual(0, builder.skipped)
+        builder.write(self.path)
+        with OpeningBook(self.path) as book:
+            self.assertEqual((0, 3, 0), book.lookup(
+                self._position(['wA1', 'bG1*\\wA1'])
+            ))
+
+
+    def test_skip_illegal(self):
+        builder = BookBuilder()
+        self.assertFalse(builder.add_game(
+            [parse_move(c) for c in ('wA1', 'bG1*|wA1', 'bA1|*wA1')]
+        ))
+        self.assertEqual(1, builder.skipped)
+        self.assertEqual(0, len(builder))
+
+
+    def test_best_action(self):
+        builder = BookBuilder(plies=2)
+        for (cmd, result) in (('bG1*|wA1', Hive.WHITE_WIN),
+                              ('bS1*|wA1', Hive.BLACK_WIN),
+                              ('bS1*|wA1', Hive.BLACK_WIN),
+                              ('bB1*|wA1', Hive.BLACK_WIN)):
+            builder.add_game([parse_move('wA1'), parse_move(cmd)])
+            # the games are unfinished, label them by hand
+            key = self._position(['wA1', cmd]).get_canonical_hash()[0]
+            stats = builder.stats[key]
+            stats[1] -= 1
+            stats[0 if result == Hive.WHITE_WIN else 2] += 1
+        builder.write(self.path)
+        with OpeningBook(self.path) as book:
+            hive = self._position(['wA1'])
+            candidates = book.candidates(hive)
+            self.assertEqual(3, len(candidates))
+            # same score, more games first
+            self.assertEqual(
+                ['bS1', 'bB1', 'bG1'], [c[0][1][0] for c in candidates]
+            )
+            self.assertEqual([1.0, 1.0, 0.0], [c[1] for c in candidates])
+            self.assertEqual([2, 1, 1], [c[2] for c in candidates])
+            self.assertEqual(candidates[0][0], book.best_action(hive))
+            self.assertEqual(None, book.best_action(hive, minGames=3))
+            # out of the book
+            hive.action(*parse_command('bA1*|wA1'))
+            self.assertEqual(None, book.best_action(hive))
+
+            # past the plies of the book
+            hive.undo()
+            hive.action(*parse_command('bS1*|wA1'))
+            self.assertEqual(3, hive.turn)
+            self.assertEqual([], book.candidates(hive))
+
+            searcher = AlphaBeta(book=book)
+            hive.undo()
+            self.assertEqual(candidates[0][0], searcher.search(hive, depth=1))
+
+
+    def test_bad_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'HVRC' + b'\0' * 20)
+        self.assertRaises(ValueError, OpeningBook, self.path)
+        open(self.path, 'wb').close()
+        self.assertRaises(ValueError, OpeningBook, self.path)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -0,0 +1,119 @@
+import random
+from unittest import TestCase, skipIf
+
+from hivegame.hive import Hive
+from hivegame.perft import load_fixture
+from hivegame.piece import COLORS, get_piece
+
+try:
+    import numpy as np
+    from hivegame.encode import (
+        AXIAL, KINDS, OFFSET, encode, encode_states, num_planes
+    )
+except ImportError:
+    np = None
+
+
+def _naive_encode(hive, size, layers, layout):
+    """Cell by cell encoding used to check the vectorized encoder."""
+    res = np.zeros((num_planes(layers), size, size), dtype=np.float32)
+    cells = [
+        cell for (cell, pic) in hive.piecesInCell.items() if len(pic) > 0
+    ]
+    if layout == AXIAL:
+        coords = dict((c, (c[0] - (c[1] >> 1), c[1])) for c in cells)
+    else:
+        coords = dict((c, c) for c in cells)
+    if len(cells) > 0:
+        cols = [coords[c][0] for c in cells]
+        rows = [coords[c][1] for c in cells]
+        originCol = (min(cols) + max(cols)) // 2 - size // 2
+        originRow = (min(rows) + max(rows)) // 2 - size // 2
+    else:
+        (originCol, originRow) = (-(size // 2), -(size // 2))
+    if layout == OFFSET:
+        originRow -= originRow & 1
+
+    groups = len(COLORS) * len(KINDS)
+    for cell in cells:
+        (col, row) = coords[cell]
+        for (layer, name) in enumerate(hive.get_pieces(cell)):
+            piece = get_piece(name)
+            group = COLORS.index(piece.color) * len(KINDS) + \
+                KINDS.index(piece.kind)
+            plane = group * layers + min(layer, layers - 1)
+            res[plane, row - originRow, col - originCol] = 1
+    for color in COLORS:
+        for (k, kind) in enumerate(KINDS):
+            names = [
+                n for n in hive.unplayedPieces[color] if n[1] == kind
+            ]
+            total = len([
+                n for n in hive._piece_set(color) if n[1] == kind
+            ])
+            res[groups * layers + COLORS.index(color) * len(KINDS) + k] = \
+                float(len(names)) / total
+    res[-1] = hive.activePlayer
+    return res
+
+
+@skipIf(np is None, "numpy is not installed")
+class TestEncode(TestCase):
+    """Verify the feature plane encoder"""
+
+    def test_shape(self):
+        hive = Hive()
+        hive.setup()
+        out = encode([hive, load_fixture('midgame')])
+        self.assertEqual((2, num_planes(), 26, 26), out.shape)
+        self.assertEqual(np.float32, out.dtype)
+        self.assertEqual((0, num_planes(), 26, 26), encode([]).shape)
+
+
+    def test_empty_board(self):
+        hive = Hive()
+        hive.setup()
+        out = encode([hive])[0]
+        groups = len(COLORS) * len(KINDS)
+        self.assertEqual(0, out[:groups * 5].sum())
+        self.assertTrue((out[groups * 5:groups * 6] == 1).all())
+        self.assertTrue((out[-1] == 0).all())
+
+
+    def test_naive(self):
+        rnd = random.Random(3)
+        hives = []
+        for g in range(20):
+            hive = Hive()
+            hive.setup()
+            for ply in range(rnd.randint(0, 60)):
+                moves = hive.legal_moves()
+                if len(moves) == 0:
+                    break
+                hive.action(*rnd.choice(moves))
+            hives.append(hive)
+        for layout in (OFFSET, AXIAL):
+            for layers in (1, 5):
+                out = encode(hives, layers=layers, layout=layout)
+                for (i, hive) in enumerate(hives):
+                    expected = _naive_encode(hive, 26, layers, layout)
+                    self.assertTrue((expected == out[i]).all())
+
+
+    def test_states(self):
+        hive = load_fixture('example')
+        states = np.array([hive.state, hive.state], dtype=np.int32)
+        out = encode_states(states, layout=AXIAL)
+        self.assertTrue((out[0] == out[1]).all())
+        self.assertTrue((encode([hive], layout=AXIAL)[0] == out[0]).all())
+
+
+    def test_errors(self):
+        hive = load_fixture('midgame')
+        self.assertRaises(ValueError, encode, [hive], size=2)
+        self.assertRaises(ValueError, encode, [hive], layout='cube')
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -1,5 +1,6 @@
-from hivegame.hive import Hive
-from hivegame.piece import HivePiece
+from hivegame.hive import Hive, HiveException
+from hivegame.hive import STATE_PIECES, STATE_PLAYER, STATE_TURN
+from hivegame.piece import HivePiece, PIECES
 from unittest import TestCase
 
 
@@ -101,6 +102,21 @@ class TestHive(TestCase):
         )
 
 
+    def test_ant_destinations(self):
+        dests = self.hive.ant_destinations('bA1')
+        self.assertTrue(self.hive._poc2cell('bS1', self.hive.SW) in dests)
+        self.assertTrue(self.hive._poc2cell('wQ1', self.hive.W) in dests)
+        self.assertFalse(self.hive._poc2cell('wS1', self.hive.W) in dests)
+        self.assertFalse(self.hive.locate('bA1') in dests)
+
+        # the set is computed once per position
+        self.assertTrue(dests is self.hive.ant_destinations('bA1'))
+        self.hive.move_piece(self.piece['bB1'], 'bS1', self.hive.O)
+        self.assertFalse(dests is self.hive.ant_destinations('bA1'))
+        self.hive.undo()
+        self.assertTrue(dests is self.hive.ant_destinations('bA1'))
+
+
     def test_beetle_moves(self):
         # moving in the ground level
         beetle = self.piece['bB1']
@@ -250,6 +266,42 @@ class TestHive(TestCase):
         )
 
 
+    def test_spider_moves3(self):
+        """The spider can stop next to its start after a 3 steps path.
+        wS1, bA1|*wS1, wA1*\\wS1, bS1/*bA1, wG1/*wA1, bG1|*bS1, wQ1*|wG1,
+        bQ1/*bS1, wG2*|wA1, bA2*/bG1
+        """
+        hive = Hive()
+        hive.setup()
+        hive.action('play', 'wS1')
+        hive.action('play', ('bA1', 'wS1', hive.W))
+        hive.action('play', ('wA1', 'wS1', hive.NE))
+        hive.action('play', ('bS1', 'bA1', hive.NW))
+        hive.action('play', ('wG1', 'wA1', hive.NW))
+        hive.action('play', ('bG1', 'bS1', hive.W))
+        hive.action('play', ('wQ1', 'wG1', hive.E))
+        hive.action('play', ('bQ1', 'bS1', hive.NW))
+        hive.action('play', ('wG2', 'wA1', hive.E))
+        hive.action('play', ('bA2', 'bG1', hive.SE))
+
+        spider = hive.playedPieces['bS1']['piece']
+        startCell = hive.locate('bS1')
+        # path: bS1*| -> bQ1*| -> bQ1*\
+        endCell = hive._poc2cell('bQ1', hive.NE)
+        self.assertTrue(
+            hive._valid_spider_move(spider, startCell, endCell)
+        )
+        expected = set([
+            hive._poc2cell('bQ1', hive.NW),
+            hive._poc2cell('bQ1', hive.NE),
+            hive._poc2cell('wG1', hive.NW),
+            hive._poc2cell('wG1', hive.NE),
+        ])
+        self.assertEqual(
+            expected, hive._spider_destinations(spider, startCell)
+        )
+
+
     def test_validate_place_piece(self):
         wA1 = HivePiece('w', 'A', 1)
         bB2 = HivePiece('b', 'B', 2)
@@ -348,6 +400,407 @@ class TestHive(TestCase):
         self.assertTrue(hive.check_victory() == hive.WHITE_WIN)
 
 
+    def _brute_force_moves(self, hive):
+        """Find the legal moves by trying every piece on every cell."""
+        player = hive.get_active_player()
+        cells = set()
+        for cell in hive.piecesInCell:
+            if len(hive.piecesInCell[cell]) > 0:
+                cells.add(cell)
+                cells.update(hive.board.get_surrounding(cell))
+        moves = set()
+        for piece in hive._hand_candidates(player):
+            if not hive._validate_turn(piece, 'place'):
+                continue
+            for cell in cells:
+                if hive._validate_place_piece(piece, cell):
+                    moves.add((str(piece), cell))
+        for name, pp in hive.playedPieces.items():
+            piece = pp['piece']
+            if not hive._validate_turn(piece, 'move'):
+                continue
+            for cell in cells:
+                if cell != pp['cell'] and (
+                    hive._validate_move_piece(piece, cell)
+                ):
+                    moves.add((name, cell))
+        return moves
+
+
+    def _naive_pinned_pieces(self, hive):
+        """Find the pinned pieces by removing each one and flooding the hive."""
+        pinned = set()
+        for name, pp in hive.playedPieces.items():
+            cell = pp['cell']
+            if hive.piecesInCell[cell] != [name]:
+                continue
+            occupied = set(
+                c for c in hive.piecesInCell if len(hive.piecesInCell[c]) > 0
+            )
+            occupied.remove(cell)
+            start = occupied.pop()
+            toExplore = [start]
+            while len(toExplore) > 0:
+                c = toExplore.pop()
+                for n in hive.board.get_surrounding(c):
+                    if n in occupied:
+                        occupied.remove(n)
+                        toExplore.append(n)
+            if len(occupied) > 0:
+                pinned.add(name)
+        return pinned
+
+
+    def test_pinned_pieces(self):
+        self.assertEqual(
+            self._naive_pinned_pieces(self.hive), self.hive._pinned_pieces()
+        )
+        self.assertTrue('wS1' in self.hive._pinned_pieces())
+
+        # a beetle on top of a pinned piece frees the piece below
+        self.hive.move_piece(self.piece['bB1'], 'bS1', self.hive.O)
+        self.assertEqual(
+            self._naive_pinned_pieces(self.hive), self.hive._pinned_pieces()
+        )
+        self.assertFalse('bS1' in self.hive._pinned_pieces())
+        self.assertFalse('bB1' in self.hive._pinned_pieces())
+
+
+    def test_hash(self):
+        self.assertEqual(self.hive._compute_hash(), self.hive._hash)
+
+        # black to play, moving the beetle on top and back changes the hash
+        # until the original position is reached again
+        h0 = self.hive.get_hash()
+        self.hive.move_piece(self.piece['bB1'], 'bS1', self.hive.O)
+        h1 = self.hive.get_hash()
+        self.assertNotEqual(h0, h1)
+        self.assertEqual(self.hive._compute_hash(), self.hive._hash)
+        self.hive.move_piece(self.piece['bB1'], 'bS1', self.hive.NE)
+        self.assertEqual(h0, self.hive.get_hash())
+
+        # the active player is part of the hash
+        self.hive.activePlayer = 0
+        self.assertNotEqual(h0, self.hive.get_hash())
+
+
+    def test_hash_transposition(self):
+        hive1 = Hive()
+        hive1.setup()
+        hive1.action('play', 'wA1')
+        hive1.action('play', ('bA1', 'wA1', hive1.E))
+        hive1.action('play', ('wG1', 'wA1', hive1.W))
+        hive1.action('play', ('bG1', 'bA1', hive1.E))
+
+        hive2 = Hive()
+        hive2.setup()
+        hive2.action('play', 'wG1')
+        hive2.action('play', ('bG1', 'wG1', hive2.E))
+        hive2.action('play', ('wA1', 'wG1', hive2.W))
+        hive2.action('play', ('bA1', 'bG1', hive2.E))
+        # same pieces but wG1 and wA1 swapped
+        self.assertNotEqual(hive1.get_hash(), hive2.get_hash())
+
+        # same position reached with a different order of placements
+        hive3 = Hive()
+        hive3.setup()
+        hive3.action('play', 'wA1')
+        hive3.action('play', ('bA1', 'wA1', hive3.E))
+        hive3.action('play', ('wS1', 'wA1', hive3.NW))
+        hive3.action('play', ('bG1', 'bA1', hive3.E))
+        hive3.action('play', ('wG1', 'wA1', hive3.W))
+        hive1.action('play', ('wS1', 'wA1', hive1.NW))
+        self.assertEqual(hive1.get_hash(), hive3.get_hash())
+
+
+    def _game_state(self, hive):
+        return (
+            hive.turn, hive.activePlayer, hive.get_hash(),
+            dict((c, list(p)) for (c, p) in hive.piecesInCell.items() if p),
+            dict((n, pp['cell']) for (n, pp) in hive.playedPieces.items()),
+            dict((c, sorted(h)) for (c, h) in hive.unplayedPieces.items()),
+        )
+
+
+    def test_undo(self):
+        # two plies deep from the test position and back
+        state0 = self._game_state(self.hive)
+        for move in self.hive.legal_moves():
+            self.hive.action(*move)
+            state1 = self._game_state(self.hive)
+            for reply in self.hive.legal_moves():
+                self.hive.action(*reply)
+                self.hive.undo()
+                self.assertEqual(state1, self._game_state(self.hive))
+            self.hive.undo()
+            self.assertEqual(state0, self._game_state(self.hive))
+
+        # a pass
+        self.hive.action('non_play', 'pass')
+        self.hive.undo()
+        self.assertEqual(state0, self._game_state(self.hive))
+
+        # an unknown action does not end the turn
+        self.assertRaises(
+            HiveException, self.hive.action, 'non_play', 'resign'
+        )
+        self.assertEqual(state0, self._game_state(self.hive))
+
+
+    def test_undo_opening(self):
+        hive = Hive()
+        hive.setup()
+        state0 = self._game_state(hive)
+        hive.action('play', 'wA1')
+        hive.action('play', ('bA1', 'wA1', hive.E))
+        hive.undo()
+        hive.undo()
+        self.assertEqual(state0, self._game_state(hive))
+        self.assertRaises(HiveException, hive.undo)
+
+
+    def _naive_frontier(self, hive):
+        """Find the frontier and placement cells by scanning the board."""
+        frontier = set()
+        placeable = {'w': set(), 'b': set()}
+        for (cell, pic) in hive.piecesInCell.items():
+            if len(pic) == 0:
+                continue
+            for c in hive.board.get_surrounding(cell):
+                if hive._is_cell_free(c):
+                    frontier.add(c)
+        for cell in frontier:
+            colors = set(
+                hive.piecesInCell[c][-1][0]
+                for c in hive._occupied_surroundings(cell)
+            )
+            for color in colors:
+                if len(colors) == 1:
+                    placeable[color].add(cell)
+        return (frontier, placeable)
+
+
+    def test_frontier(self):
+        (frontier, placeable) = self._naive_frontier(self.hive)
+        self.assertEqual(frontier, self.hive._frontier)
+        self.assertEqual(placeable, self.hive._placeable)
+
+        # beetle on top of a piece and back
+        self.hive.move_piece(self.piece['bB1'], 'bS1', self.hive.O)
+        self.assertEqual(
+            self._naive_frontier(self.hive)[0], self.hive._frontier
+        )
+        self.hive.undo()
+        self.assertEqual(frontier, self.hive._frontier)
+        self.assertEqual(placeable, self.hive._placeable)
+
+        for move in self.hive.legal_moves():
+            self.hive.action(*move)
+            (frontier, placeable) = self._naive_frontier(self.hive)
+            self.assertEqual(frontier, self.hive._frontier)
+            self.assertEqual(placeable, self.hive._placeable)
+            self.hive.undo()
+
+
+    def test_state(self):
+        hive = self.hive
+
+        def check_state():
+            self.assertEqual(hive.turn, hive.state[STATE_TURN])
+            self.assertEqual(hive.activePlayer, hive.state[STATE_PLAYER])
+            for piece in PIECES:
+                i = STATE_PIECES + 3 * piece.id
+                (x, y, layer) = hive.state[i:i + 3]
+                cell = hive.locate(piece.name)
+                if cell is None:
+                    self.assertEqual((0, 0, -1), (x, y, layer))
+                else:
+                    self.assertEqual(cell, (x, y))
+                    self.assertEqual(
+                        piece.name, hive.piecesInCell[cell][layer]
+                    )
+
+        check_state()
+        state0 = hive.state.tobytes()
+        for move in hive.legal_moves():
+            hive.action(*move)
+            check_state()
+            hive.undo()
+        self.assertEqual(state0, hive.state.tobytes())
+
+
+    def test_legal_moves(self):
+        expected = self._brute_force_moves(self.hive)
+        actual = set(
+            (str(piece), cell) for (piece, cell) in self.hive._generate_moves()
+        )
+        self.assertEqual(expected, actual)
+
+        # every generated action is accepted by the game
+        for (actionType, action) in self.hive.legal_moves():
+            (actPiece, refPiece, direction) = action
+            cell = self.hive._poc2cell(refPiece, direction)
+            self.assertTrue((actPiece, cell) in expected)
+
+
+    def test_legal_moves_opening(self):
+        hive = Hive()
+        hive.setup()
+        moves = hive.legal_moves()
+        self.assertEqual(4, len(moves))
+        self.assertTrue(('play', 'wA1') in moves)
+        self.assertFalse(('play', 'wA2') in moves)
+        self.assertFalse(('play', 'wQ1') in moves)
+
+        hive.action('play', 'wA1')
+        moves = hive.legal_moves()
+        self.assertEqual(4 * 6, len(moves))
+        for (actionType, action) in moves:
+            self.assertEqual('wA1', action[1])
+
+
+    def test_legal_moves_queen_rule(self):
+        """The queen must be placed by the 4th action of each player."""
+        hive = Hive()
+        hive.setup()
+        hive.action('play', 'wA1')
+        hive.action('play', ('bA1', 'wA1', hive.E))
+        hive.action('play', ('wA2', 'wA1', hive.W))
+        hive.action('play', ('bA2', 'bA1', hive.E))
+        hive.action('play', ('wA3', 'wA2', hive.W))
+        hive.action('play', ('bA3', 'bA2', hive.E))
+        moves = hive.legal_moves()
+        self.assertTrue(len(moves) > 0)
+        for (actionType, action) in moves:
+            self.assertEqual('wQ1', action[0])
+
+
+    def test_queen_liberties(self):
+        hive = self.hive
+        # wQ1 touches wS1, bQ1 touches bS1, bG1 and bA1
+        self.assertEqual(5, hive.queen_liberties('w'))
+        self.assertEqual(3, hive.queen_liberties('b'))
+
+        def check_liberties():
+            for color in ('w', 'b'):
+                cell = hive.locate(color + 'Q1')
+                if cell is None:
+                    self.assertIsNone(hive.queen_liberties(color))
+                else:
+                    self.assertEqual(
+                        6 - len(hive._occupied_surroundings(cell)),
+                        hive.queen_liberties(color)
+                    )
+
+        for move in hive.legal_moves():
+            hive.action(*move)
+            check_liberties()
+            for reply in hive.legal_moves():
+                hive.action(*reply)
+                check_liberties()
+                hive.undo()
+            hive.undo()
+        check_liberties()
+
+        hive = Hive()
+        hive.setup()
+        self.assertIsNone(hive.queen_liberties('w'))
+
+
+    def test_snapshot(self):
+        hive = self.hive
+        hive.action(*hive.legal_moves()[-1])
+        snapshot = hive.snapshot()
+
+        def check_same(other):
+            self.assertEqual(list(hive.state), list(other.state))
+            self.assertEqual(hive.get_hash(), other.get_hash())
+            self.assertEqual(hive._history, other._history)
+            self.assertEqual(hive.legal_moves(), other.legal_moves())
+            self.assertEqual(hive._frontier, other._frontier)
+            self.assertEqual(hive._placeable, other._placeable)
+            self.assertEqual(
+                sorted(hive.unplayedPieces['w']),
+                sorted(other.unplayedPieces['w'])
+            )
+            for (cell, pic) in hive.piecesInCell.items():
+                self.assertEqual(pic, other.get_pieces(cell))
+
+        clone = hive.clone()
+        check_same(clone)
+        # the clone is independent and keeps the undo history
+        clone.action(*clone.legal_moves()[0])
+        self.assertEqual(snapshot, hive.snapshot())
+        clone.undo()
+        check_same(clone)
+        while len(clone._history) > 0:
+            clone.undo()
+            hive.undo()
+            check_same(clone)
+
+        other = Hive()
+        other.restore(snapshot)
+        hive.restore(snapshot)
+        check_same(other)
+        self.assertRaises(ValueError, other.restore, snapshot[:-4])
+
+        # copies and pickles use the snapshot
+        import copy
+        import pickle
+        check_same(copy.deepcopy(hive))
+        check_same(pickle.loads(pickle.dumps(hive)))
+
+
+    def test_repetition(self):
+        from hivegame.notation import parse_command
+        opening = ('wG1', 'bG1*|wG1', 'wQ1|*wG1', 'bQ1*|bG1')
+        # the queens step away and back to the position of the opening
+        cycle = ('wQ1/*wG1', 'bQ1*\\bG1', 'wQ1|*wG1', 'bQ1*|bG1')
+        hive = Hive(repetitions=3)
+        hive.setup()
+        for cmd in opening:
+            hive.action(*parse_command(cmd))
+        self.assertEqual(1, hive.repetition_count())
+        for cmd in cycle:
+            hive.action(*parse_command(cmd))
+        self.assertEqual(2, hive.repetition_count())
+        self.assertEqual(hive.UNFINISHED, hive.check_victory())
+        for cmd in cycle:
+            hive.action(*parse_command(cmd))
+        self.assertEqual(3, hive.repetition_count())
+        self.assertEqual(hive.DRAW, hive.check_victory())
+        self.assertEqual([], hive.legal_moves())
+
+        # the counts follow undo, copies and restore
+        other = hive.clone()
+        self.assertEqual(hive.DRAW, other.check_victory())
+        hive.undo()
+        # also reached by the first cycle
+        self.assertEqual(2, hive.repetition_count())
+        self.assertEqual(hive.UNFINISHED, hive.check_victory())
+        other.restore(hive.snapshot())
+        self.assertEqual(hive._hashCounts, other._hashCounts)
+        hive.action(*parse_command(cycle[-1]))
+        self.assertEqual(hive.DRAW, hive.check_victory())
+        while len(hive._history) > 0:
+            hive.undo()
+        self.assertEqual({}, hive._hashCounts)
+        self.assertEqual([], hive._hashHistory)
+
+        # the rules are off by default
+        hive = Hive(maxTurns=10)
+        hive.setup()
+        for cmd in opening + cycle:
+            hive.action(*parse_command(cmd))
+        self.assertEqual(hive.UNFINISHED, hive.check_victory())
+        for cmd in cycle[:2]:
+            hive.action(*parse_command(cmd))
+        self.assertEqual(hive.DRAW, hive.check_victory())
+        self.assertEqual(10, hive.clone().maxTurns)
+        hive.undo()
+        self.assertEqual(hive.UNFINISHED, hive.check_victory())
+
+
 if __name__ == '__main__':
     import unittest
     unittest.main()
@@ -0,0 +1,114 @@
+from hivegame.hive import Hive
+from hivegame.mcts import MCTS, PUCT, result_value
+from hivegame.notation import parse_command
+from hivegame.perft import load_fixture
+from hivegame.selfplay import play_game
+from unittest import TestCase
+
+
+class TestMCTS(TestCase):
+    """Verify the Monte Carlo Tree Search player"""
+
+    def setUp(self):
+        self.hive = load_fixture('midgame')
+
+
+    def assertTreeConsistent(self, mcts):
+        for node in range(len(mcts)):
+            first = mcts.firstChild[node]
+            if first < 0:
+                continue
+            children = range(first, first + mcts.numChildren[node])
+            for c in children:
+                self.assertEqual(node, mcts.parents[c])
+            self.assertEqual(
+                mcts.visits[node], 1 + sum(mcts.visits[c] for c in children)
+            )
+
+
+    def test_search(self):
+        state = list(self.hive.state)
+        mcts = MCTS(seed=1, maxPlies=20)
+        action = mcts.search(self.hive, iterations=50)
+        self.assertIn(action, self.hive.legal_moves())
+        self.assertEqual(state, list(self.hive.state))
+        self.assertEqual(50, mcts.visits[0])
+        self.assertEqual(50, mcts.stats['iterations'])
+        self.assertEqual(
+            len(self.hive.legal_moves()), len(mcts.child_stats())
+        )
+        self.assertTreeConsistent(mcts)
+
+
+    def test_puct(self):
+        mcts = MCTS(PUCT, seed=1, maxPlies=20)
+        action = mcts.search(self.hive, iterations=30)
+        self.assertIn(action, self.hive.legal_moves())
+        self.assertTreeConsistent(mcts)
+
+
+    def test_budget(self):
+        mcts = MCTS(seed=1, maxPlies=20)
+        self.assertRaises(ValueError, mcts.search, self.hive)
+        mcts.search(self.hive, seconds=0.05)
+        self.assertTrue(mcts.stats['iterations'] > 0)
+        self.assertRaises(ValueError, MCTS, 'minimax')
+
+
+    def test_no_iteration(self):
+        # the root is not expanded, the first move is played
+        moves = self.hive._generate_moves()
+        first = self.hive._move2action(*moves[0])
+        self.assertEqual(first, MCTS().search(self.hive, iterations=0))
+        mcts = MCTS()
+        self.assertEqual(first, mcts.search(self.hive, seconds=0))
+        self.assertEqual(0, mcts.stats['iterations'])
+
+
+    def test_reuse(self):
+        mcts = MCTS(seed=1, maxPlies=20)
+        self.hive.action(*mcts.search(self.hive, iterations=200))
+        # reply with the most visited answer to the best move
+        first = mcts.firstChild[0]
+        best = max(
+            range(first, first + mcts.numChildren[0]),
+            key=lambda c: mcts.visits[c]
+        )
+        reply = max(
+            range(mcts.firstChild[best],
+                  mcts.firstChild[best] + mcts.numChildren[best]),
+            key=lambda c: mcts.visits[c]
+        )
+        visits = mcts.visits[reply]
+        self.hive.action(*self.hive._move2action(*mcts._move(reply)))
+
+        first = len(mcts)
+        mcts.search(self.hive, iterations=20)
+        reused = mcts.stats['reused']
+        self.assertTrue(0 < reused < first)
+        self.assertEqual(visits + 20, mcts.visits[0])
+        self.assertTreeConsistent(mcts)
+
+        # a different game starts a new tree
+        hive = load_fixture('example')
+        mcts.search(hive, iterations=5)
+        self.assertEqual(0, mcts.stats['reused'])
+        self.assertEqual(5, mcts.visits[0])
+
+
+    def test_finished(self):
+        self.assertEqual(1.0, result_value(Hive.WHITE_WIN, 0))
+        self.assertEqual(0.0, result_value(Hive.WHITE_WIN, 1))
+        self.assertEqual(0.5, result_value(Hive.DRAW, 1))
+        # a random game won by black
+        hive = Hive()
+        hive.setup()
+        for cmd in play_game('random', 'random', 18)[0]:
+            hive.action(*parse_command(cmd))
+        self.assertEqual(Hive.BLACK_WIN, hive.check_victory())
+        self.assertIsNone(MCTS().search(hive, iterations=10))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
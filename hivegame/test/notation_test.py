@@ -0,0 +1,99 @@
+import io
+from hivegame.hive import Hive
+from hivegame.notation import (
+    NONE, PASS, NotationError, _COMMANDS, action2move, format_action,
+    format_move, iter_games, iter_moves, move2action, parse_command,
+    parse_move
+)
+from hivegame.piece import PIECE_IDS
+from hivegame.perft import FIXTURES
+from unittest import TestCase
+
+
+class TestNotation(TestCase):
+    """Verify the move notation"""
+
+    def test_format_action(self):
+        self.assertEqual('wA1', format_action('play', 'wA1'))
+        self.assertEqual(
+            'bA1*|wA1', format_action('play', ('bA1', 'wA1', Hive.E))
+        )
+        self.assertEqual(
+            'wB1=*bA3', format_action('play', ('wB1', 'bA3', Hive.O))
+        )
+        self.assertEqual('pass', format_action('non_play', 'pass'))
+
+
+    def test_parse_command(self):
+        self.assertEqual(('play', 'wA1'), parse_command('wA1'))
+        self.assertEqual(
+            ('play', ('wQ1', 'wA1', Hive.NW)), parse_command('wQ1/*wA1')
+        )
+        self.assertEqual(('non_play', 'pass'), parse_command('pass'))
+        self.assertRaises(ValueError, parse_command, 'wQ1/?wA1')
+        self.assertRaises(ValueError, parse_command, 'wQ1/*')
+
+
+    def test_example_game(self):
+        with open('exampleGame.log') as f:
+            commands = [line.strip() for line in f][:11]
+        actions = [parse_command(cmd) for cmd in commands]
+        self.assertEqual(FIXTURES['example'], actions)
+        self.assertEqual(
+            commands, [format_action(*action) for action in actions]
+        )
+
+
+    def test_moves(self):
+        wA1 = PIECE_IDS['wA1']
+        bA1 = PIECE_IDS['bA1']
+        self.assertEqual((wA1, NONE, NONE), parse_move('wA1'))
+        self.assertEqual((bA1, wA1, Hive.E), parse_move('bA1*|wA1'))
+        self.assertEqual(PASS, parse_move('pass'))
+        for (cmd, move) in _COMMANDS.items():
+            self.assertEqual(cmd, format_move(move))
+            self.assertEqual(move, action2move(*move2action(move)))
+            self.assertEqual(cmd, format_action(*parse_command(cmd)))
+        self.assertRaises(NotationError, format_move, (wA1, wA1, Hive.E))
+
+
+    def test_errors(self):
+        for (cmd, message) in (
+            ('wQ1/', 'Expected'),
+            ('wZ1', 'Unknown piece "wZ1"'),
+            ('wQ1/?wA1', 'Invalid point of contact "/?"'),
+            ('wQ1/*wA4', 'Unknown reference piece "wA4"'),
+            ('wQ1/*wQ1', 'own reference'),
+        ):
+            with self.assertRaises(NotationError) as cm:
+                parse_move(cmd)
+            self.assertTrue(message in str(cm.exception))
+            self.assertEqual(cmd, cm.exception.cmd)
+
+        lines = io.StringIO(u'wA1\nbA1*|wA1\n\nwA1\nbA1*?wA1\n')
+        with self.assertRaises(NotationError) as cm:
+            list(iter_moves(lines, 'games.log'))
+        self.assertEqual(5, cm.exception.lineno)
+        self.assertTrue(str(cm.exception).startswith('games.log:5: '))
+
+
+    def test_iter_games(self):
+        lines = io.StringIO(
+            u'# two games\nwA1\nbA1*|wA1\n\n\nwS1\r\nbS1/*wS1\npass'
+        )
+        games = list(iter_games(lines))
+        self.assertEqual([
+            [parse_move('wA1'), parse_move('bA1*|wA1')],
+            [parse_move('wS1'), parse_move('bS1/*wS1'), PASS],
+        ], games)
+
+        # the parser is lazy
+        lines = io.StringIO(u'wA1\n\nwA1\nbad\n')
+        games = iter_games(lines)
+        self.assertEqual([parse_move('wA1')], next(games))
+        self.assertRaises(NotationError, next, games)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -0,0 +1,70 @@
+from hivegame.alphabeta import WIN, AlphaBeta
+from hivegame.parallel import ParallelSearch, _combine
+from hivegame.perft import load_fixture
+from unittest import TestCase
+
+
+class TestParallelSearch(TestCase):
+    """Verify the root split search"""
+
+    def test_single_worker(self):
+        hive = load_fixture('midgame')
+        searcher = ParallelSearch(1)
+        action = searcher.search(hive, depth=2)
+        self.assertIsNone(searcher.pool)
+        self.assertEqual(action, searcher.search(hive, depth=2))
+
+        alphabeta = AlphaBeta()
+        alphabeta.search(hive, depth=2)
+        self.assertEqual(
+            alphabeta.iterations[-1]['score'], searcher.stats['score']
+        )
+        self.assertEqual(2, searcher.stats['depth'])
+
+
+    def test_workers(self):
+        single = ParallelSearch(1)
+        with ParallelSearch(3) as parallel:
+            for name in ('opening', 'midgame', 'example'):
+                hive = load_fixture(name)
+                state = list(hive.state)
+                action = parallel.search(hive, depth=2)
+                self.assertEqual(state, list(hive.state))
+                self.assertEqual(3, len(parallel.stats['workers']))
+                self.assertEqual(single.search(hive, depth=2), action)
+                self.assertEqual(
+                    single.stats['score'], parallel.stats['score']
+                )
+        self.assertIsNone(parallel.pool)
+
+
+    def test_combine(self):
+        order = {'a': 0, 'b': 1, 'c': 2}
+        shares = [
+            [(1, 'a', 5, 10), (2, 'a', 3, 50)],
+            [(1, 'b', 7, 10)],
+        ]
+        # the deepest iteration every share completed
+        self.assertEqual((1, 'b', 7), _combine(shares, order))
+        shares[1].append((2, 'b', 3, 40))
+        self.assertEqual((2, 'a', 3), _combine(shares, order))
+        # a share with no completed iteration leaves its moves unknown
+        self.assertIsNone(_combine(shares + [[]], order))
+        # unless another share found a forced win
+        shares.append([])
+        shares[1].append((3, 'b', WIN - 3, 90))
+        self.assertEqual((3, 'b', WIN - 3), _combine(shares, order))
+
+
+    def test_time_limit(self):
+        hive = load_fixture('midgame')
+        searcher = ParallelSearch(1)
+        self.assertRaises(ValueError, searcher.search, hive)
+        self.assertIn(
+            searcher.search(hive, seconds=0.01), hive.legal_moves()
+        )
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -0,0 +1,38 @@
+from hivegame.perft import REFERENCE_COUNTS, divide, load_fixture, perft
+from unittest import TestCase
+
+
+class TestPerft(TestCase):
+    """Verify the move generation counts against the reference counts"""
+
+    def test_opening(self):
+        reference = REFERENCE_COUNTS['opening']
+        for depth in range(4):
+            hive = load_fixture('opening')
+            self.assertEqual(reference[depth], perft(hive, depth))
+
+
+    def test_midgame(self):
+        reference = REFERENCE_COUNTS['midgame']
+        for depth in range(3):
+            hive = load_fixture('midgame')
+            self.assertEqual(reference[depth], perft(hive, depth))
+
+
+    def test_example(self):
+        reference = REFERENCE_COUNTS['example']
+        for depth in range(3):
+            hive = load_fixture('example')
+            self.assertEqual(reference[depth], perft(hive, depth))
+
+
+    def test_divide(self):
+        hive = load_fixture('midgame')
+        res = divide(hive, 2)
+        self.assertEqual(REFERENCE_COUNTS['midgame'][1], len(res))
+        self.assertEqual(REFERENCE_COUNTS['midgame'][2], sum(res.values()))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -0,0 +1,37 @@
+import copy
+import pickle
+from hivegame.piece import HivePiece, NUM_PIECES, PIECES, get_piece
+from unittest import TestCase
+
+
+class TestHivePiece(TestCase):
+    """Verify the HivePiece logic"""
+
+    def test_interned(self):
+        piece = HivePiece('w', 'A', 1)
+        self.assertTrue(piece is HivePiece('w', 'A', 1))
+        self.assertTrue(piece is get_piece('wA1'))
+        self.assertTrue(piece is copy.deepcopy(piece))
+        self.assertTrue(piece is pickle.loads(pickle.dumps(piece)))
+        self.assertEqual('wA1', str(piece))
+        self.assertRaises(ValueError, HivePiece, 'w', 'A', 4)
+
+
+    def test_ids(self):
+        self.assertEqual(22, NUM_PIECES)
+        ids = set()
+        for piece in PIECES:
+            self.assertTrue(piece is get_piece(piece.id))
+            self.assertTrue(piece is get_piece(piece.name))
+            ids.add(piece.id)
+        self.assertEqual(set(range(NUM_PIECES)), ids)
+
+
+    def test_slots(self):
+        piece = HivePiece('b', 'Q', 1)
+        self.assertFalse(hasattr(piece, '__dict__'))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
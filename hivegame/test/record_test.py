@@ -0,0 +1,114 @@
+import io
+import os
+import shutil
+import tempfile
+from hivegame.notation import PASS, _COMMANDS, parse_move
+from hivegame.record import (
+    RESULT_UNKNOWN, RecordReader, notation2records, pack_move,
+    records2notation, unpack_move, write_records
+)
+from hivegame.selfplay import play_game
+from unittest import TestCase
+
+
+class TestRecord(TestCase):
+    """Verify the binary game records"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'games.rec')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def test_pack_move(self):
+        for move in _COMMANDS.values():
+            code = pack_move(move)
+            self.assertTrue(0 <= code < 1 << 13)
+            self.assertEqual(move, unpack_move(code))
+        self.assertEqual(PASS, unpack_move(pack_move(PASS)))
+
+
+    def test_random_access(self):
+        games = []
+        for seed in range(4):
+            (commands, result) = play_game('random', 'random', seed, 60)
+            games.append(([parse_move(c) for c in commands], result))
+        games.append(([], RESULT_UNKNOWN))
+        self.assertEqual(5, write_records(self.path, games))
+        # 24 bytes header, 8 bytes per game and index entry, 2 per move
+        self.assertEqual(
+            24 + 16 * 5 + 2 * sum(len(m) for (m, r) in games),
+            os.path.getsize(self.path)
+        )
+
+        with RecordReader(self.path) as reader:
+            self.assertEqual(5, len(reader))
+            for n in (3, 0, 4, 1):
+                (moves, result) = games[n]
+                self.assertEqual(moves, reader.game(n))
+                self.assertEqual(result, reader.result(n))
+                self.assertEqual(len(moves), reader.num_moves(n))
+                for k in (0, 7, len(moves) - 1):
+                    if 0 <= k < len(moves):
+                        self.assertEqual(moves[k], reader.move(n, k))
+            self.assertEqual(
+                [pack_move(m) for m in games[2][0]], list(reader.moves(2))
+            )
+            self.assertRaises(IndexError, reader.game, 5)
+            self.assertRaises(IndexError, reader.move, 0, 60)
+
+
+    def test_notation_round_trip(self):
+        logs = []
+        for (i, seed) in enumerate((9, 1)):
+            path = os.path.join(self.dir, '%d.log' % i)
+            with open(path, 'w') as f:
+                f.write('\n'.join(play_game('random', 'random', seed)[0]))
+                f.write('\n')
+            logs.append(path)
+        with open(logs[1], 'a') as f:
+            f.write('\nwS1\nbS1/*wS1\npass\n')
+        self.assertEqual(3, notation2records(logs, self.path))
+
+        out = io.StringIO()
+        records2notation(self.path, out)
+        expected = '\n'.join(open(p).read() for p in logs)
+        self.assertEqual(expected, out.getvalue())
+
+
+    def test_not_a_record(self):
+        path = os.path.join(self.dir, 'games.log')
+        with open(path, 'w') as f:
+            f.write('wA1\nbA1*|wA1\n' * 10)
+        self.assertRaises(ValueError, RecordReader, path)
+        open(path, 'w').close()
+        self.assertRaises(ValueError, RecordReader, path)
+
+
+    def test_truncated(self):
+        games = [[parse_move('wA1'), parse_move('bA1*|wA1')]] * 3
+        write_records(self.path, games)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for size in (len(data) - 4, len(data) - 8, 30):
+            with open(self.path, 'wb') as f:
+                f.write(data[:size])
+            self.assertRaises(ValueError, RecordReader, self.path)
+
+
+    def test_close_with_views(self):
+        write_records(self.path, [[parse_move('wA1')]])
+        reader = RecordReader(self.path)
+        moves = reader.moves(0)
+        self.assertRaises(BufferError, reader.close)
+        self.assertTrue(reader.file.closed)
+        self.assertEqual([pack_move(parse_move('wA1'))], list(moves))
+        moves.release()
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
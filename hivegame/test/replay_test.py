@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+from hivegame.hive import Hive
+from hivegame.notation import PASS, format_action, parse_move
+from hivegame.perft import load_fixture
+from hivegame.replay import (
+    find_logs, illegal_reason, replay_file, replay_moves, run
+)
+from hivegame.selfplay import play_game
+from unittest import TestCase
+
+
+class TestReplay(TestCase):
+    """Verify the replay of game logs"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.dir, 'sub'))
+        # a won game and an unfinished one in the same file
+        games = [
+            play_game('random', 'random', 9)[0],
+            play_game('random', 'random', 1, maxPlies=20)[0],
+        ]
+        self.write('sub/two.log', '\n\n'.join('\n'.join(g) for g in games))
+        shutil.copy('exampleGame.log', os.path.join(self.dir, 'example.log'))
+        self.write('bad.log', 'wA1\nbA1*?wA1\n')
+        self.write('notes.txt', 'not a game')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def write(self, name, text):
+        with open(os.path.join(self.dir, name), 'w') as f:
+            f.write(text)
+
+
+    def test_find_logs(self):
+        self.assertEqual(
+            ['bad.log', 'example.log', os.path.join('sub', 'two.log')],
+            [os.path.relpath(p, self.dir) for p in find_logs([self.dir])]
+        )
+
+
+    def test_illegal_reason(self):
+        hive = load_fixture('midgame')
+        self.assertIsNone(illegal_reason(hive, parse_move('wQ1*|wG1')))
+        self.assertEqual(
+            'illegal move for wQ1',
+            illegal_reason(hive, parse_move('wQ1/*wS1'))
+        )
+        self.assertEqual(
+            'pass with legal moves', illegal_reason(hive, PASS)
+        )
+        self.assertEqual(
+            'not the turn of bA2', illegal_reason(hive, parse_move('bA2*|bA1'))
+        )
+        self.assertEqual(
+            'reference piece wA1 is not in play',
+            illegal_reason(hive, parse_move('wA2*|wA1'))
+        )
+        self.assertEqual(
+            'missing reference piece', illegal_reason(hive, parse_move('wA1'))
+        )
+        # wG2 is still in hand
+        cmd = format_action('play', ('wG3', 'wG1', hive.W))
+        self.assertIsNone(illegal_reason(hive, parse_move('wG2' + cmd[3:])))
+        self.assertEqual(
+            'wG3 placed out of number order',
+            illegal_reason(hive, parse_move(cmd))
+        )
+
+
+    def test_replay_file(self):
+        reports = replay_file(os.path.join(self.dir, 'sub', 'two.log'))
+        self.assertEqual([0, 1], [r['game'] for r in reports])
+        self.assertEqual(Hive.WHITE_WIN, reports[0]['result'])
+        self.assertEqual(Hive.UNFINISHED, reports[1]['result'])
+        self.assertEqual(20, reports[1]['plies'])
+        self.assertIsNone(reports[0]['illegal'])
+
+        reports = replay_file(os.path.join(self.dir, 'example.log'))
+        self.assertEqual(11, reports[0]['plies'])
+        (lineno, cmd, reason) = reports[0]['illegal']
+        self.assertEqual((12, 'bA3|*wA2'), (lineno, cmd))
+
+        reports = replay_file(os.path.join(self.dir, 'bad.log'))
+        self.assertIsNone(reports[0]['game'])
+        self.assertTrue('bad.log:2:' in reports[0]['error'])
+
+
+    def test_repetitions(self):
+        # external games are not cut by the optional repetition rule
+        cycle = ['wQ1/*wG1', 'bQ1*\\bG1', 'wQ1|*wG1', 'bQ1*|bG1']
+        commands = (
+            ['wG1', 'bG1*|wG1', 'wQ1|*wG1', 'bQ1*|bG1'] + cycle * 2 +
+            ['wA1|*wQ1']
+        )
+        report = replay_moves([parse_move(c) for c in commands])
+        self.assertIsNone(report['illegal'])
+        self.assertEqual(13, report['plies'])
+        self.assertEqual(Hive.UNFINISHED, report['result'])
+
+
+    def test_run(self):
+        for workers in (1, 2):
+            reports = []
+            stats = run([self.dir], workers, callback=reports.append)
+            self.assertEqual(3, stats['files'])
+            self.assertEqual(3, stats['games'])
+            self.assertEqual(1, stats['illegal'])
+            self.assertEqual(1, stats['errors'])
+            self.assertEqual(1, stats['results'][Hive.WHITE_WIN])
+            self.assertEqual(1, stats['results'][Hive.UNFINISHED])
+            self.assertEqual(4, len(reports))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
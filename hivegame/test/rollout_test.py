@@ -0,0 +1,124 @@
+import random
+from hivegame.hive import Hive
+from hivegame.perft import load_fixture
+from hivegame.piece import PIECES
+from hivegame.rollout import (
+    Playout, cell2key, hive_rollout, key2cell, rollout, rollouts
+)
+from unittest import TestCase
+
+
+class TestRollout(TestCase):
+    """Verify the random playouts"""
+
+    def setUp(self):
+        self.hive = load_fixture('midgame')
+
+
+    def test_restore(self):
+        state = list(self.hive.state)
+        h = self.hive.get_hash()
+        moves = self.hive.legal_moves()
+        for i in range(5):
+            rollout(self.hive, random.Random(i))
+        self.assertEqual(state, list(self.hive.state))
+        self.assertEqual(h, self.hive.get_hash())
+        self.assertEqual(moves, self.hive.legal_moves())
+
+
+    def test_deterministic(self):
+        self.assertEqual(
+            rollout(self.hive, random.Random(7)),
+            rollout(self.hive, random.Random(7))
+        )
+
+
+    def test_max_plies(self):
+        self.assertEqual((Hive.DRAW, 0), rollout(self.hive, maxPlies=0))
+        (result, plies) = rollout(self.hive, random.Random(1), maxPlies=3)
+        self.assertTrue(plies <= 3)
+
+
+    def test_result(self):
+        # replay a rollout and check its result with check_victory
+        rnd = random.Random(3)
+        (result, plies) = hive_rollout(self.hive, random.Random(3), 500)
+        for i in range(plies):
+            moves = self.hive._generate_moves()
+            if len(moves) == 0:
+                self.hive.action('non_play', 'pass')
+            else:
+                (piece, cell) = moves[int(rnd.random() * len(moves))]
+                self.hive.action(*self.hive._move2action(piece, cell))
+        if result != Hive.DRAW or plies < 500:
+            self.assertEqual(result, self.hive.check_victory())
+        else:
+            self.assertEqual(Hive.UNFINISHED, self.hive.check_victory())
+
+
+    def test_playout(self):
+        # play random games on a Playout and on the game in lockstep
+        rnd = random.Random(5)
+        for name in ('opening', 'midgame', 'example'):
+            hive = load_fixture(name)
+            if name == 'example':
+                hive.maxTurns = hive.turn + 60
+            playout = Playout(hive)
+            for i in range(150):
+                result = hive.check_victory()
+                self.assertEqual(result, playout.result())
+                if result != Hive.UNFINISHED:
+                    break
+                moves = sorted(playout.moves())
+                self.assertEqual(
+                    sorted(
+                        (piece.id, cell2key(cell))
+                        for (piece, cell) in hive._generate_moves()
+                    ),
+                    moves
+                )
+                if len(moves) == 0:
+                    hive._play_move(None, None)
+                    playout.play(None, None)
+                    continue
+                (pieceId, key) = moves[int(rnd.random() * len(moves))]
+                hive._play_move(PIECES[pieceId], key2cell(key))
+                playout.play(pieceId, key)
+
+
+    def test_draw_rules(self):
+        # the max turn rule ends a playout, the repetition rule is only
+        # followed by the rollouts on the game itself
+        self.hive.maxTurns = self.hive.turn + 4
+        (result, plies) = rollout(self.hive, random.Random(4))
+        self.assertEqual(Hive.DRAW, result)
+        self.assertTrue(plies <= 5)
+        self.hive.maxTurns = None
+        self.hive.repetitions = 2
+        self.assertEqual(
+            hive_rollout(self.hive, random.Random(4), 50),
+            rollout(self.hive, random.Random(4), 50)
+        )
+
+
+    def test_weight(self):
+        # only the queen moves
+        def queen_only(hive, piece, cell):
+            return 1 if piece.kind == 'Q' else 0
+        (result, plies) = rollout(
+            self.hive, random.Random(2), maxPlies=6, weight=queen_only
+        )
+        self.assertEqual((Hive.DRAW, 6), (result, plies))
+
+
+    def test_rollouts(self):
+        res = rollouts(self.hive, 4, random.Random(0), maxPlies=20)
+        self.assertEqual(
+            4, res[Hive.WHITE_WIN] + res[Hive.BLACK_WIN] + res[Hive.DRAW]
+        )
+        self.assertTrue(res['plies'] <= 80)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+from hivegame.hive import Hive
+from hivegame.notation import parse_command
+from hivegame.selfplay import load_agent, play_game, random_agent, run
+from unittest import TestCase
+
+
+def first_agent(hive, rnd):
+    return hive.legal_moves()[0]
+
+
+class TestSelfPlay(TestCase):
+    """Verify the self-play runner"""
+
+    def setUp(self):
+        self.outDir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.outDir)
+
+
+    def test_load_agent(self):
+        self.assertIs(random_agent, load_agent('random'))
+        self.assertIs(first_agent, load_agent(first_agent))
+        self.assertIs(
+            random_agent, load_agent('hivegame.selfplay:random_agent')
+        )
+        self.assertRaises(ValueError, load_agent, 'nobody')
+
+
+    def test_play_game(self):
+        (commands, result) = play_game('random', 'random', seed=1)
+        self.assertEqual((commands, result), play_game(
+            'random', 'random', seed=1
+        ))
+        self.assertNotEqual(Hive.UNFINISHED, result)
+
+        (commands, result) = play_game(
+            first_agent, first_agent, maxPlies=10
+        )
+        self.assertEqual(10, len(commands))
+        self.assertEqual(Hive.DRAW, result)
+
+
+    def test_run(self):
+        stats = run(
+            3, outDir=self.outDir, workers=1, seed=5, maxPlies=60
+        )
+        self.assertEqual(3, stats['games'])
+        self.assertEqual(3, sum(stats['results'].values()))
+        self.assertEqual(1, len(stats['workers']))
+
+        plies = 0
+        for i in range(3):
+            path = os.path.join(self.outDir, 'game-%06d.log' % i)
+            with open(path) as f:
+                commands = [line.strip() for line in f]
+            self.assertEqual(
+                play_game('random', 'random', 5 + i, 60)[0], commands
+            )
+            # the logs can be replayed
+            hive = Hive()
+            hive.setup()
+            for cmd in commands:
+                hive.action(*parse_command(cmd))
+            plies += len(commands)
+        self.assertEqual(plies, stats['plies'])
+
+
+    def test_run_pool(self):
+        games = []
+        stats = run(
+            4, workers=2, seed=5, maxPlies=20,
+            callback=lambda i, commands, result: games.append(i)
+        )
+        self.assertEqual([0, 1, 2, 3], sorted(games))
+        self.assertEqual(4, sum(
+            w['games'] for w in stats['workers'].values()
+        ))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -0,0 +1,128 @@
+import random
+from hivegame.board import HexBoard, SparseHexBoard
+from hivegame.hive import Hive
+from hivegame.perft import load_fixture
+from hivegame.symmetry import (
+    NUM_SYMMETRIES, apply_transform, canonical_key, symmetric_hashes,
+    transform_cell
+)
+from unittest import TestCase
+
+
+def _random_moves(seed, plies):
+    """(piece, targetCell) moves of a random game."""
+    rnd = random.Random(seed)
+    hive = Hive()
+    hive.setup()
+    moves = []
+    for i in range(plies):
+        generated = hive._generate_moves()
+        if hive.check_victory() != Hive.UNFINISHED:
+            break
+        move = rnd.choice(generated) if generated else (None, None)
+        hive._play_move(*move)
+        moves.append(move)
+    return moves
+
+
+def _translate(cell, dx, dy):
+    # translation by an even number of rows keeps the row parity
+    return (cell[0] + dx, cell[1] + 2 * dy)
+
+
+class TestSymmetry(TestCase):
+    """Verify the canonical position keys"""
+
+    def test_transform_cell(self):
+        board = HexBoard()
+        cells = [(x, y) for x in range(-3, 4) for y in range(-3, 4)]
+        self.assertEqual((0, 0), transform_cell(5, (0, 0)))
+        images = set()
+        for s in range(NUM_SYMMETRIES):
+            image = tuple(transform_cell(s, c) for c in cells)
+            images.add(image)
+            for c in cells:
+                # neighbours stay neighbours
+                self.assertEqual(
+                    set(transform_cell(s, n) for n in board.get_neighbors(c)),
+                    set(board.get_neighbors(transform_cell(s, c)))
+                )
+        self.assertEqual(NUM_SYMMETRIES, len(images))
+        self.assertEqual(cells, [transform_cell(0, c) for c in cells])
+
+
+    def test_equivalent_positions(self):
+        for seed in range(4):
+            moves = _random_moves(seed, 30)
+            hive = Hive()
+            hive.setup()
+            for move in moves:
+                hive._play_move(*move)
+            (key, transform) = canonical_key(hive)
+            fast = hive.get_canonical_hash()[0]
+
+            for s in range(NUM_SYMMETRIES):
+                other = Hive()
+                other.setup()
+                for (piece, cell) in moves:
+                    if piece is not None:
+                        cell = _translate(transform_cell(s, cell), 3, -1)
+                    other._play_move(piece, cell)
+                self.assertEqual(key, canonical_key(other)[0])
+                self.assertEqual(fast, other.get_canonical_hash()[0])
+
+            # the transform maps the pieces to the canonical cells
+            (s, offset) = transform
+            cells = set(
+                (hive.playedPieces[name]['piece'].id,
+                 apply_transform(transform, cell), layer)
+                for (cell, pic) in hive.piecesInCell.items()
+                for (layer, name) in enumerate(pic)
+            )
+            self.assertEqual(cells, set(
+                (pieceId, SparseHexBoard.axial2offset((q, r)), layer)
+                for (pieceId, q, r, layer) in key[1:]
+            ))
+
+
+    def test_incremental_hashes(self):
+        hive = Hive()
+        hive.setup()
+        for move in _random_moves(5, 40):
+            hive._play_move(*move)
+            self.assertEqual(symmetric_hashes(hive), hive._symHashes)
+        while len(hive._history) > 0:
+            hive.undo()
+            self.assertEqual(symmetric_hashes(hive), hive._symHashes)
+        self.assertEqual([0] * NUM_SYMMETRIES, hive._symHashes)
+
+        other = Hive()
+        other.restore(load_fixture('example').snapshot())
+        self.assertEqual(symmetric_hashes(other), other._symHashes)
+
+
+    def test_different_positions(self):
+        keys = set()
+        fast = set()
+        hive = load_fixture('midgame')
+        for (actionType, action) in hive.legal_moves():
+            hive.action(actionType, action)
+            keys.add(canonical_key(hive)[0])
+            fast.add(hive.get_canonical_hash()[0])
+            hive.undo()
+        self.assertEqual(len(keys), len(fast))
+        # the opening has a single placement up to symmetry
+        hive = Hive()
+        hive.setup()
+        hive.action('play', 'wA1')
+        keys = set()
+        for (actionType, action) in hive.legal_moves():
+            hive.action(actionType, action)
+            keys.add(hive.get_canonical_hash()[0])
+            hive.undo()
+        self.assertEqual(4, len(keys))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
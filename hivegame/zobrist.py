@@ -0,0 +1,71 @@
+# zobrist.py
+# Deterministic 64 bit keys used to hash the state of a game.
+#
+# Keys are derived from the piece name, cell and stack layer with the
+# splitmix64 finalizer, so they are the same on every run and on every
+# machine and there is no table to size for an unbounded board.
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# key domains, keep them apart from each other
+_PIECE_DOMAIN = 1 << 60
+_HAND_DOMAIN = 2 << 60
+_SIDE_DOMAIN = 3 << 60
+
+# offset applied to the coordinates so they fit in 12 bits
+_COORD_OFFSET = 1 << 11
+
+
+def mix64(value):
+    """splitmix64 finalizer, a bijection of the 64 bit integers."""
+    z = (value + 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def _name_code(pieceName):
+    """21 bit code of a piece name (3 ascii chars)."""
+    return (
+        (ord(pieceName[0]) << 14) | (ord(pieceName[1]) << 7) |
+        ord(pieceName[2])
+    )
+
+
+# Maximum number of keys kept in _pieceKeys
+PIECE_KEY_CACHE_SIZE = 65536
+
+_pieceKeys = {}
+
+
+def piece_key(pieceName, cell, layer):
+    """Key of a piece placed in cell (x, y) at the given stack layer."""
+    k = (pieceName, cell, layer)
+    res = _pieceKeys.get(k)
+    if res is None:
+        (x, y) = cell
+        res = mix64(
+            _PIECE_DOMAIN | (_name_code(pieceName) << 28) |
+            (((x + _COORD_OFFSET) & 0xFFF) << 16) |
+            (((y + _COORD_OFFSET) & 0xFFF) << 4) | (layer & 0xF)
+        )
+        if len(_pieceKeys) >= PIECE_KEY_CACHE_SIZE:
+            _pieceKeys.clear()
+        _pieceKeys[k] = res
+    return res
+
+
+_handKeys = {}
+
+
+def hand_key(pieceName):
+    """Key of a piece that is still in the player hand."""
+    res = _handKeys.get(pieceName)
+    if res is None:
+        res = mix64(_HAND_DOMAIN | _name_code(pieceName))
+        _handKeys[pieceName] = res
+    return res
+
+
+# Key xored when black is the active player.
+SIDE_KEY = mix64(_SIDE_DOMAIN)